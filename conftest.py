@@ -11,3 +11,5 @@
 
     Reference: https://stackoverflow.com/a/50610630
     """
+
+pytest_plugins = ["pytester", "timebandit.pytest_plugin"]
@@ -0,0 +1,23 @@
+import pytest
+
+from timebandit.stats import t_quantile
+from timebandit.timeit import Timer
+
+
+def test_t_quantile():
+    assert t_quantile(0.975, 2) == pytest.approx(4.303, abs=1e-3)
+    assert t_quantile(0.975, 10) == pytest.approx(2.228, abs=1e-3)
+    assert t_quantile(0.975, 1000) == pytest.approx(1.962, abs=1e-3)
+
+
+def test_adaptive():
+    result = Timer(func=list).adaptive(precision=0.05, max_time=2.0)
+    assert result.per_loop > 0
+    assert len(result.samples) >= 5
+    assert result.converged == (result.precision <= 0.05)
+
+
+def test_adaptive_budget():
+    result = Timer(func=list).adaptive(precision=0.0, max_time=0.05)
+    assert not result.converged
+    assert result.elapsed >= 0.05
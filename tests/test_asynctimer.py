@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from timebandit.asynctimer import AsyncTimer
+
+
+async def _sleep():
+    await asyncio.sleep(0.001)
+
+
+def test_sequential():
+    with AsyncTimer(_sleep) as t:
+        r = t.repeat(3, 10)
+    assert len(r) == 3
+    assert r.min() >= 0.009
+
+
+def test_concurrent():
+    with AsyncTimer(_sleep, concurrency=20) as t:
+        per_loop = t.timeit(10) / 10
+    # 20 concurrent sleeps take about as long as one
+    assert 0.0009 <= per_loop < 0.005
+
+
+def test_overhead_subtracted():
+    calls = []
+
+    async def work():
+        calls.append(1)
+
+    with AsyncTimer(work) as t:
+        assert t.overhead() > 0
+        t.timeit(100)
+        raw = AsyncTimer(work, correct=False, loop=t.loop).timeit(100)
+        assert raw > 0
+    assert len(calls) == 200
+
+
+def test_rejects_plain_function():
+    with pytest.raises(ValueError):
+        AsyncTimer(list)
+
+
+def test_repeat_keywords():
+    with AsyncTimer(_sleep) as t:
+        assert t.repeat(2, 5, stabilize=True).stability is not None
+        assert t.repeat(2, 5, clocks=True).clocks is not None
+        assert t.repeat(2, 5, memory=True).memory is not None
+        assert t.repeat(2, 5, stacks=0.001).stacks is not None
+        with pytest.raises(ValueError):
+            t.repeat(2, 5, workers=2)
+
+
+def test_per_call_not_corrected_twice(monkeypatch):
+    with AsyncTimer(_sleep) as t:
+        monkeypatch.setattr(t, "repeat", lambda repeat, number: [0.02])
+        assert t.per_call(10) == pytest.approx(0.002)
@@ -0,0 +1,54 @@
+from timebandit._cli import main
+from timebandit.cache import ResultCache, timer_key
+from timebandit.timeit import Timer, repeat, timeit
+
+calls = []
+
+
+def _counted():
+    calls.append(None)
+
+
+def _helper():
+    return 1
+
+
+def _uses_helper():
+    return _helper()
+
+
+def test_timer_key_follows_code_and_closures():
+    def make(n):
+        return lambda: n + 1
+    assert timer_key(Timer(make(1))) == timer_key(Timer(make(1)))
+    assert timer_key(Timer(make(1))) != timer_key(Timer(make(2)))
+    assert timer_key(Timer(_uses_helper)) != timer_key(Timer(_helper))
+    assert timer_key(Timer(list, setup=_helper)) != timer_key(Timer(list))
+
+
+def test_hit_skips_timing(tmp_path):
+    with ResultCache(str(tmp_path / "c.sqlite")) as cache:
+        first = repeat(_counted, number=10, repeat=3, cache=cache)
+        assert len(calls) == 30
+        second = Timer(_counted, cache=cache).repeat(3, 10)
+        assert len(calls) == 30
+        assert list(second) == list(first) and second.number == 10
+        t = timeit(_counted, number=5, cache=cache)
+        assert timeit(_counted, number=5, cache=cache) == t
+        assert len(calls) == 35
+        Timer(_counted, cache=cache).repeat(3, 10, memory=True)
+        assert len(calls) > 35
+        assert len(cache) == 2
+
+
+def test_lru_eviction_and_invalidation(tmp_path):
+    db = str(tmp_path / "c.sqlite")
+    with ResultCache(db, max_entries=2) as cache:
+        for number in (1, 2, 3):
+            Timer(_helper, cache=cache).timeit(number)
+        assert [e.key.split(":")[1] for e in cache.entries()] == [
+            "timeit(3)", "timeit(2)"]
+        assert cache.invalidate("*other*") == 0
+    assert main(["cache", "--db", db, "clear", "_helper"]) is None
+    with ResultCache(db) as cache:
+        assert len(cache) == 0
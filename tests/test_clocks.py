@@ -0,0 +1,30 @@
+import time
+
+from timebandit import clocks
+from timebandit.timeit import Timer
+
+
+def test_reading_difference():
+    a = clocks.read()
+    sum(range(100000))
+    d = clocks.read() - a
+    assert isinstance(d, clocks.ClockDelta)
+    assert d.wall_ns > 0 and d.thread_ns > 0
+    assert 0.0 < d.cpu_share <= 1.0
+    assert d.context_switches >= 0 and d.page_faults >= 0
+
+
+def test_sleep_is_off_cpu():
+    d, = clocks.repeat_clocks(Timer(lambda: time.sleep(0.01)), 1, 3)
+    assert d.off_cpu > 0.02
+    assert d.cpu < d.wall / 2
+    if clocks.resource is not None:
+        assert d.voluntary >= 1
+
+
+def test_repeat_with_clocks():
+    r = Timer(func=list).repeat(3, 1000, clocks=True)
+    assert len(r) == len(r.clocks) == 3
+    assert list(r) == [d.wall for d in r.clocks]
+    assert r.per_loop().clocks is r.clocks
+    assert Timer(func=list).repeat(3, 1000).clocks is None
@@ -0,0 +1,92 @@
+import pytest
+
+from timebandit._cli import main
+from timebandit.coldstart import measure, resolve, run
+
+_module = '''
+import time
+time.sleep(0.01)
+_cache = {}
+
+def prepare():
+    _cache.clear()
+
+def work():
+    if not _cache:
+        time.sleep(0.005)
+        _cache["ready"] = True
+    return len(_cache)
+'''
+
+
+@pytest.fixture
+def target(tmp_path, monkeypatch):
+    (tmp_path / "coldmod.py").write_text(_module)
+    monkeypatch.chdir(tmp_path)
+    return "coldmod:work"
+
+
+def test_resolve():
+    func, seconds, warm = resolve("os.path:join")
+    assert func.__name__ == "join" and warm and seconds >= 0
+    with pytest.raises(ValueError):
+        resolve("os.path.join")
+
+
+def test_run(target):
+    report = run(target, "coldmod:prepare", number=100, repeat=2)
+    assert not report["warm"] and report["import"] >= 0.01
+    assert report["first_call"] >= 0.005
+    assert report["number"] == 100 and len(report["times"]) == 2
+    assert report["best"] < report["first_call"]
+    with pytest.raises(RuntimeError, match="ModuleNotFoundError"):
+        run("no_such_module:work", number=1, repeat=1)
+
+
+def test_setup_runs_once(tmp_path, monkeypatch):
+    (tmp_path / "countmod.py").write_text(
+        "calls = []\ndef prepare():\n    calls.append(1)\n"
+        "def work():\n    pass\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    report = measure("countmod:work", "countmod:prepare", repeat=3)
+    import countmod
+    assert countmod.calls == [1] and len(report["times"]) == 3
+
+
+def test_cli_target(target, capsys):
+    assert main([target, "--setup", "coldmod:prepare", "-n", "10",
+                 "-r", "2"]) is None
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("import: ") and lines[0].endswith("(cold)")
+    assert lines[1].startswith("first call: ")
+    assert lines[2].startswith("10 loops, best of 2: ")
+    assert main([target, "-s", "x = 1"]) == 2
+
+
+def test_cli_statements(capsys):
+    assert main(["-n", "10", "-r", "2", "-s", "import math", "-s", "x = 4",
+                 "for i in range(2):", "    math.sqrt(x)"]) is None
+    assert capsys.readouterr().out.startswith("10 loops, best of 2: ")
+    # setup names are locals of the timed loop, as with stdlib timeit
+    assert main(["-n", "10", "-r", "2", "-s", "x = 0", "x += 1"]) is None
+    with pytest.raises(SyntaxError):
+        main(["return 1"])
+
+
+@pytest.mark.parametrize("args", [
+    ["-n", "10", "coldmod:work", "-s", "coldmod:prepare", "-r", "2"],
+    ["-p", "coldmod:work", "-n", "10", "-r", "2", "--stabilize"],
+])
+def test_cli_options_around_target(target, capsys, args):
+    assert main(args) is None
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("import: ")
+    assert lines[2].startswith("10 loops, best of ")
+
+
+def test_cli_reports_widened_repeat(monkeypatch, capsys):
+    from timebandit import stabilize
+    monkeypatch.setattr(stabilize, "probe_noise", lambda timer: 1.0)
+    assert main(["-n", "10", "-r", "3", "--stabilize", "pass"]) is None
+    assert capsys.readouterr().out.startswith(
+        "10 loops, best of %d: " % (3 * stabilize.max_widen))
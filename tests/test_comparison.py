@@ -0,0 +1,41 @@
+import pytest
+
+import timebandit
+
+
+def _fast():
+    return 1
+
+
+def _slow():
+    return sum(range(200))
+
+
+def test_compare_orders_and_drops():
+    result = timebandit.compare(_slow, _fast, max_time=5.0, seed=1)
+    assert result.fastest.name.endswith("_fast")
+    slow = result.candidates[1]
+    assert slow.ratio > 1
+    assert slow.significant
+    assert slow.dropped is not None
+
+
+def test_compare_needs_two():
+    with pytest.raises(ValueError):
+        timebandit.compare(_fast)
+
+
+def test_compare_runs_one_round_without_time():
+    result = timebandit.compare(_slow, _fast, max_time=0)
+    assert result.rounds == 1
+    assert all(len(c.samples) == 1 for c in result.candidates)
+    assert not result.candidates[1].significant
+
+
+@pytest.mark.parametrize("bad", ["no_such_module:f", "os:no_such_name",
+                                 "os.getcwd"])
+def test_cli_bad_target(capsys, bad):
+    from timebandit._cli import main
+    assert main(["compare", "os:getcwd", bad]) == 2
+    assert capsys.readouterr().err.startswith(bad + ": ")
+    assert main(["compare", "-s", bad, "os:getcwd", "os:getpid"]) == 2
@@ -0,0 +1,27 @@
+import math
+
+from timebandit.complexity import fit, sweep
+
+SIZES = [16, 64, 256, 1024, 4096, 16384]
+
+
+def test_fit_models():
+    cases = {
+        "O(1)": lambda n: 5e-7,
+        "O(log n)": lambda n: 1e-7 * math.log(n) + 1e-8,
+        "O(n)": lambda n: 2e-9 * n + 1e-7,
+        "O(n log n)": lambda n: 3e-9 * n * math.log(n) + 1e-7,
+        "O(n^2)": lambda n: 1e-10 * n * n + 1e-7,
+    }
+    for model, cost in cases.items():
+        best = fit(SIZES, [cost(n) for n in SIZES])[0]
+        assert best.model == model
+        assert best.error < 1e-6
+
+
+def test_sweep():
+    result = sweep(lambda data: [x for x in data for y in data],
+                   lambda n: list(range(n)), sizes=[8, 16, 32, 64, 128],
+                   trial_time=0.002)
+    assert result.sizes == [8, 16, 32, 64, 128]
+    assert result.grows_faster_than("O(n)")
@@ -0,0 +1,58 @@
+from timebandit._cli import main
+from timebandit.history import History, code_hash
+from timebandit.result import TimingResult
+
+
+def _f():
+    return 1
+
+
+def _g():
+    return 2
+
+
+def test_code_hash():
+    assert code_hash(_f) == code_hash(_f)
+    assert code_hash(_f) != code_hash(_g)
+    assert code_hash("x = 1", "pass") != code_hash("x = 2", "pass")
+
+
+def test_record_and_check(tmp_path):
+    with History(str(tmp_path / "h.sqlite")) as history:
+        for i in range(5):
+            history.record("f", TimingResult([1.0 + i * 0.01] * 3, 10),
+                           code=_f)
+        run_id = history.record("f", [1.0, 1.1], number=10, code=_f)
+        runs = history.runs("f")
+        assert runs[0].id == run_id and len(runs) == 6
+        assert runs[0].best == 0.1
+        check = history.check("f")
+        assert check.baseline == 5 and not check.regression
+        history.record("f", TimingResult([2.0], 10), code=_g)
+        check = history.check("f")
+        assert check.regression and check.code_changed
+        assert check.ratio > 1.5
+        assert history.names() == ["f"]
+
+
+def test_cli_check(tmp_path, capsys):
+    db = str(tmp_path / "h.sqlite")
+    for _ in range(3):
+        assert main(["-n", "100", "-r", "2", "-S", "pass", "--db", db,
+                     "pass"]) is None
+    assert main(["history", "--db", db]) is None
+    out = capsys.readouterr().out
+    assert "\npass\n  #3 " in out
+    with History(db) as history:
+        history.record("pass", [1.0], code="pass")
+    assert main(["check", "--db", db]) == 1
+
+
+def test_check_skips_zero_times(tmp_path):
+    with History(str(tmp_path / "h.sqlite")) as history:
+        for best in (1.0, 0.0, 1.01, 0.99):
+            history.record("f", [best], code=_f)
+        assert history.check("f").baseline == 2
+        history.record("f", [0.0], code=_f)
+        check = history.check("f")
+        assert check.ratio == 0.0 and not check.regression
@@ -0,0 +1,33 @@
+import pytest
+
+from timebandit import hooks
+from timebandit.timeit import Timer
+
+
+def test_hooks_see_events():
+    seen = []
+    pairs = [("on_timer_created", lambda timer: seen.append("created")),
+             ("on_trial", lambda timer, number, dt: seen.append(number)),
+             ("on_repeat_done",
+              lambda timer, result: seen.append(len(result)))]
+    for event, hook in pairs:
+        hooks.register(event, hook)
+    try:
+        Timer(list).repeat(2, 10)
+    finally:
+        for event, hook in pairs:
+            hooks.unregister(event, hook)
+    assert seen == ["created", 10, 10, 2]
+    Timer(list).repeat(2, 10)
+    assert len(seen) == 4
+
+
+def test_register_decorator_and_errors():
+    @hooks.register("on_trial")
+    def trial(timer, number, dt):
+        pass
+    assert hooks.on_trial == [trial]
+    hooks.clear("on_trial")
+    assert hooks.on_trial == []
+    with pytest.raises(ValueError):
+        hooks.register("on_nothing", trial)
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# cumulative microseconds 'import timebandit' may take in a fresh process
+import_budget_us = 20000
+
+
+def _fresh(code, *options):
+    env = dict(os.environ, PYTHONPATH=root)
+    return subprocess.run([sys.executable, *options, "-c", code],
+                          env=env, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, universal_newlines=True,
+                          check=True)
+
+
+def _import_time_us():
+    proc = _fresh("import timebandit", "-X", "importtime")
+    for line in proc.stderr.splitlines():
+        fields = [f.strip() for f in line.split("|")]
+        if len(fields) == 3 and fields[2] == "timebandit":
+            return int(fields[1])
+    raise AssertionError("no import time reported for timebandit")
+
+
+def test_import_is_lazy_and_quiet():
+    proc = _fresh("import sys, timebandit; print(sorted(m for m in "
+                  "('loguru', 'timebandit.timeit', 'timebandit._cli', "
+                  "'getopt') if m in sys.modules))")
+    assert proc.stdout.strip() == "[]"
+    assert proc.stderr == ""
+
+
+def test_import_time_benchmark():
+    best = min(_import_time_us() for _ in range(3))
+    assert best < import_budget_us, "import timebandit took %d us" % best
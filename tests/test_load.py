@@ -0,0 +1,37 @@
+import time
+
+import pytest
+
+from timebandit.load import load
+
+
+def test_load_keeps_rate():
+    result = load(lambda: None, rate=1000, duration=0.2, workers=2)
+    assert result.scheduled == 200
+    assert result.completed >= 190 and result.errors == 0
+    assert 800 < result.throughput < 1200
+    assert not result.saturated
+
+
+def test_saturation_is_corrected():
+    # one worker, 10 ms calls, 200 calls/sec due: falls behind by 2x
+    result = load(lambda: time.sleep(0.01), rate=200, duration=0.3,
+                  workers=1)
+    assert result.saturated and result.dropped > 0
+    service = result.percentiles(service=True)[50]
+    latency = result.percentiles()[99]
+    assert service < 0.02
+    assert latency > 0.1
+
+
+def test_load_counts_errors():
+    result = load(lambda: 1 / 0, rate=500, duration=0.05)
+    assert result.errors == result.completed > 0
+    with pytest.raises(ValueError):
+        load(lambda: None, rate=0, duration=1)
+
+
+def test_timer_load():
+    from timebandit.timeit import Timer
+    result = Timer(list).load(rate=500, duration=0.05, workers=1)
+    assert result.completed > 0 and result.workers == 1
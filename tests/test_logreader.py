@@ -0,0 +1,34 @@
+from timebandit.logreader import LogReader, parse_duration
+
+LINES = [
+    "2020-09-01 12:00:00.000 | INFO     | app.db:query:10 - query took 1.5 msec",
+    "2020-09-01 12:00:00.001 | INFO     | app.db:query:10 - query took 2 msec",
+    "2020-09-01 12:00:00.002 | DEBUG    | app.web:handle:20 - 250 usec",
+    "2020-09-01 12:00:00.003 | INFO     | app.web:handle:21 - 3 samples",
+    "Traceback (most recent call last):",
+]
+
+
+def test_parse_duration():
+    assert parse_duration("best of 5: 14 nsec per loop") == 14
+    assert parse_duration("took 1.5e-3 sec") == 1500000
+    assert parse_duration("3 samples") is None
+
+
+def test_aggregate_and_resume(tmp_path):
+    log = tmp_path / "timing.log"
+    log.write_text("\n".join(LINES) + "\n2020-09-01 12:00")
+    reader = LogReader(log)
+    histograms = reader.aggregate()
+    assert histograms["app.db:query"].total == 2
+    assert histograms["app.web:handle"].total == 1
+    assert histograms["app.db:query"].max == 2000000
+
+    state = tmp_path / "state.json"
+    reader.save(state)
+    with log.open("a") as f:
+        f.write(":01.000 | INFO     | app.db:query:10 - 4 msec\n")
+    resumed = LogReader.load(state)
+    records = list(resumed.records())
+    assert len(records) == 1
+    assert records[0].offset == log.stat().st_size
@@ -0,0 +1,52 @@
+import sys
+
+import pytest
+
+from timebandit import matrix, suite
+from timebandit._cli import main
+
+source = '''
+def bench_sum():
+    print("benchmark output goes to stderr")
+    sum(range(100))
+
+def bench_fail():
+    1 / 0
+'''
+
+
+def test_run_and_table(tmp_path):
+    (tmp_path / "bench_demo.py").write_text(source)
+    benchmarks = suite.discover(str(tmp_path))
+    seen = []
+    result = matrix.run([sys.executable, sys.executable], benchmarks,
+                        number=100, repeat=2,
+                        callback=lambda b, i, r: seen.append((b.name, i)))
+    assert sorted(seen) == [("bench_fail", 0), ("bench_fail", 1),
+                            ("bench_sum", 0), ("bench_sum", 1)]
+    assert result.interpreters[0].python == result.interpreters[1].python
+    assert result.failed
+    bench_sum = benchmarks[0].id
+    ok = result.results[bench_sum, 1]
+    assert ok["number"] == 100 and len(ok["times"]) == 2
+    assert "ZeroDivisionError" in result.results[benchmarks[1].id, 0]["error"]
+    assert result.speedup(bench_sum, 0) == 1.0
+    lines = result.table().splitlines()
+    assert lines[0].split() == ["benchmark", "[1]", "[2]"]
+    assert lines[1].startswith(bench_sum) and "1.00x" in lines[1]
+    assert lines[2].split()[1:] == ["error", "error"]
+    assert lines[-1].startswith("[2] " + result.interpreters[1].label)
+
+
+def test_bad_interpreter(tmp_path):
+    with pytest.raises(RuntimeError, match="no-such-python"):
+        matrix.run([str(tmp_path / "no-such-python")], [])
+
+
+def test_cli(tmp_path, capsys):
+    (tmp_path / "bench_demo.py").write_text(source)
+    assert main(["matrix", "-p", sys.executable, "-n", "10", "-r", "1",
+                 "-k", "sum", str(tmp_path)]) is None
+    out = capsys.readouterr().out
+    assert "bench_sum" in out and "bench_fail" not in out
+    assert main(["matrix", str(tmp_path)]) == 2
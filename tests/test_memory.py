@@ -0,0 +1,23 @@
+import tracemalloc
+
+from timebandit.timeit import Timer
+
+
+def test_memory_allocations():
+    stats = Timer(lambda: bytearray(10000)).memory(500)
+    assert stats.number == 500
+    assert 10000 <= stats.allocated_per_call < 11000
+    assert stats.retained_per_call < 100
+    assert not tracemalloc.is_tracing()
+
+
+def test_memory_gc_collections():
+    stats = Timer(lambda: [[] for _ in range(1000)]).memory(200)
+    assert stats.collections[0] > 0
+
+
+def test_repeat_with_memory():
+    r = Timer(func=list).repeat(3, 1000, memory=True)
+    assert len(r.memory) == 3
+    assert r.per_loop().memory is r.memory
+    assert Timer(func=list).repeat(3, 1000).memory is None
@@ -0,0 +1,17 @@
+from timebandit import parallel
+from timebandit.timeit import Timer
+
+
+def test_parallel_repeat():
+    t = Timer(func=list)
+    r = t.repeat(4, 1000, workers=2)
+    assert len(r) == 4
+    assert all(isinstance(dt, float) for dt in r)
+    assert sum(len(w.timings) for w in t.worker_reports) == 4
+
+
+def test_mark_noisy():
+    reports = [parallel.WorkerReport(i, 0, [1.0], noise)
+               for i, noise in enumerate([0.01, 0.02, 0.01, 0.5])]
+    flags = [r.noisy for r in parallel._mark_noisy(reports)]
+    assert flags == [False, False, False, True]
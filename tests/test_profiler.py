@@ -0,0 +1,60 @@
+import threading
+import time
+
+from timebandit.histogram import LogHistogram
+from timebandit.profiler import profile, profiles
+from timebandit.timeit import Timer
+
+
+def _noop():
+    pass
+
+
+def test_histogram_percentiles():
+    h = LogHistogram()
+    h.update(range(1, 100001))
+    assert h.total == 100000
+    assert h.min == 1 and h.max == 100000
+    for percent in (50, 99, 99.9):
+        exact = 100000 * percent / 100
+        assert abs(h.percentile(percent) - exact) / exact < 2 ** (1 - h.bits)
+
+
+def test_histogram_bounds():
+    h = LogHistogram()
+    for value in (0, 5, 127, 128, 1000, 123456789, 2 ** 63 - 1):
+        low, high = h.bounds(h.index(value))
+        assert low <= value <= high
+
+
+def test_profile_threads():
+    @profile(name="test_profile_threads", buffer_size=64)
+    def work():
+        time.sleep(0)
+
+    def run():
+        for _ in range(1000):
+            work()
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    summary = work.profile.summary()
+    assert summary["count"] == 4000
+    assert 0 < summary["p50"] <= summary["p99"] <= summary["p999"]
+    assert profiles()["test_profile_threads"] is work.profile
+
+
+def test_profile_overhead():
+    """ Recording must cost well under a microsecond per call. """
+    wrapped = Timer(profile(_noop, name="test_profile_overhead"))
+    plain = Timer(_noop)
+    number = 50000
+
+    wrapped_time = plain_time = float("inf")
+    for _ in range(21):
+        wrapped_time = min(wrapped_time, wrapped.timeit(number))
+        plain_time = min(plain_time, plain.timeit(number))
+    assert (wrapped_time - plain_time) / number < 1e-6
@@ -12,7 +12,7 @@ def test_timebandit_basics():
 
 
 def test_timebandit_repeat():
-    assert isinstance(timebandit.repeat(func=set), list)
+    assert isinstance(timebandit.repeat(func=set), timebandit.TimingResult)
 
 
 def test_add():
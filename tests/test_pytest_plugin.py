@@ -0,0 +1,87 @@
+import json
+
+
+def _add(a, b):
+    return a + b
+
+
+def test_bandit_fixture(bandit):
+    result = bandit(_add, args=(1, 2), repeat=3)
+    assert len(result) == 3
+    assert result.number == 1
+    assert 0 < result.min() < 1e-3
+    assert 0 < result.overhead < result.min()
+
+
+def test_bandit_overhead_subtracted(bandit, pytestconfig):
+    session = pytestconfig.pluginmanager.get_plugin("bandit-session")
+    result = bandit(_add, args=(1, 2), number=1000, repeat=3)
+    assert result.overhead == session.calibration.loop
+    assert session.results[-1]["best"] == result.min() >= 0
+
+
+def test_loop_count_from_probe(pytestconfig):
+    from timebandit import hooks
+    from timebandit.timeit import Timer
+    session = pytestconfig.pluginmanager.get_plugin("bandit-session")
+    session.calibration
+    trials = []
+    hook = hooks.register("on_trial", lambda t, n, s: trials.append(n))
+    try:
+        number = session.loops(Timer(list))
+    finally:
+        hooks.unregister("on_trial", hook)
+    assert len(trials) <= 2 and trials[0] == 1 and number > 1
+
+
+plugin_test = '''
+def test_timed(bandit):
+    assert bandit(sorted, args=([3, 1, 2],), number=100, repeat=2).min() > 0
+
+def test_plain():
+    pass
+'''
+
+
+def test_bandit_only_and_results_file(pytester, tmp_path):
+    pytester.makepyfile(plugin_test)
+    path = tmp_path / "bandit.json"
+    result = pytester.runpytest("-p", "timebandit.pytest_plugin",
+                                "--bandit-only", "--bandit-json", str(path))
+    result.assert_outcomes(passed=1, deselected=1)
+    data = json.loads(path.read_text())
+    bench, = data["benchmarks"]
+    assert bench["name"] == "sorted" and bench["number"] == 100
+    assert len(bench["times"]) == 2
+    assert data["calibration"]["trial_time"] > 0
+
+
+def test_bandit_skip(pytester):
+    pytester.makepyfile(plugin_test)
+    result = pytester.runpytest("-p", "timebandit.pytest_plugin",
+                                "--bandit-skip")
+    result.assert_outcomes(passed=1, skipped=1)
+
+
+def test_xdist_workers_sharing_cores(pytester, monkeypatch):
+    from timebandit.parallel import available_cpus
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw0")
+    monkeypatch.setenv("PYTEST_XDIST_WORKER_COUNT",
+                       str(len(available_cpus()) + 1))
+    pytester.makepyfile(plugin_test)
+    result = pytester.runpytest("-p", "timebandit.pytest_plugin", "-rs")
+    result.assert_outcomes(passed=1, skipped=1)
+    result.stdout.fnmatch_lines(["*pytest-xdist workers share*"])
+
+
+def test_xdist_pinning_deferred(monkeypatch):
+    from timebandit import parallel
+    from timebandit.pytest_plugin import Bandit
+    pinned = []
+    monkeypatch.setattr(parallel, "pin_to_cpu", pinned.append)
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw0")
+    monkeypatch.setenv("PYTEST_XDIST_WORKER_COUNT", "1")
+    session = Bandit(None)
+    assert pinned == []
+    assert session.conflict is None and len(pinned) == 1
+    assert session.conflict is None and len(pinned) == 1
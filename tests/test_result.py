@@ -0,0 +1,35 @@
+import pytest
+
+from timebandit.result import TimingResult
+
+
+def test_statistics():
+    r = TimingResult([4.0, 1.0, 3.0, 2.0], number=2, backend="array")
+    assert len(r) == 4 and r[1] == 1.0
+    assert r.min() == 1.0 and r.max() == 4.0
+    assert r._sorted is None  # extremes need no sorted copy
+    assert r.median() == 2.5
+    assert r.mean() == 2.5
+    assert r.per_loop() == [2.0, 0.5, 1.5, 1.0]
+    assert r.nbytes == 32
+
+
+def test_reject_outliers():
+    r = TimingResult([1.0, 1.1, 0.9, 1.0, 1.05, 50.0], backend="array")
+    assert r.mad() > 0
+    assert r.reject_outliers().max() == 1.1
+
+
+def test_buffer_is_zero_copy():
+    r = TimingResult([1.0, 2.0], backend="array")
+    view = r.buffer()
+    assert view.format == "d" and view.nbytes == 16
+    r.samples[0] = 5.0
+    assert view[0] == 5.0
+
+
+def test_numpy_backend():
+    pytest.importorskip("numpy")
+    r = TimingResult([4.0, 1.0, 3.0, 2.0], number=2, backend="numpy")
+    assert r.median() == 2.5
+    assert r.per_loop() == [2.0, 0.5, 1.5, 1.0]
@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from timebandit.sampler import StackSampler, root_label
+from timebandit.timeit import Timer
+
+
+def _leaf():
+    return sum(range(2000))
+
+
+def _work():
+    return _leaf() + _leaf()
+
+
+def test_repeat_with_stacks():
+    r = Timer(_work).repeat(3, 2000, stacks=0.0005)
+    profile = r.stacks
+    assert profile.total > 0 and profile.elapsed == sum(r)
+    for stack in profile.stacks:
+        assert stack[0] == root_label
+    labels = dict(profile.inclusive())
+    work = next(label for label in labels if label.startswith("_work "))
+    assert labels[work] > 0.5
+    assert any(label.startswith("_leaf ") for label in labels)
+    text = profile.collapsed()
+    assert text.splitlines()[0].rsplit(" ", 1)[1].isdigit()
+    usec = sum(int(line.rsplit(" ", 1)[1])
+               for line in profile.collapsed("usec").splitlines())
+    assert usec == pytest.approx(sum(r) * 1e6, rel=0.05)
+
+
+def test_thread_mode():
+    with StackSampler(0.001, mode="thread") as sampler:
+        end = time.perf_counter() + 0.05
+        while time.perf_counter() < end:
+            _work()
+    assert sampler.profile().total > 0
+
+
+def test_stacks_not_with_workers():
+    with pytest.raises(ValueError):
+        Timer(_work).repeat(2, 10, workers=2, stacks=0.001)
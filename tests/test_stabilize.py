@@ -0,0 +1,69 @@
+import gc
+import os
+
+import pytest
+
+from timebandit import stabilize
+from timebandit.timeit import Timer
+
+
+def test_repeat_stabilized():
+    r = Timer(func=list).repeat(3, 1000, stabilize=True)
+    s = r.stability
+    assert s.noise >= 0 and s.gc_mode == "disabled"
+    assert len(r) == s.repeat >= 3
+    assert s.warmup_rounds >= stabilize.warmup_window or not s.steady
+    assert r.per_loop().stability is s
+
+
+def test_noisy_machine_refused_or_widened(monkeypatch):
+    monkeypatch.setattr(stabilize, "probe_noise", lambda timer: 0.5)
+    with pytest.raises(stabilize.NoisyMachine):
+        stabilize.stable_repeat(Timer(list), 3, 100, on_noise="refuse")
+    r = stabilize.stable_repeat(Timer(list), 3, 100, warmup=False)
+    assert r.stability.widened and len(r) == 3 * stabilize.max_widen
+
+
+def test_gc_modes():
+    assert gc.isenabled()
+    for mode in ("frozen", "enabled"):
+        t = Timer(lambda: [[] for _ in range(10)], gc_mode=mode)
+        assert t.timeit(1000) > 0
+        assert gc.isenabled() and gc.get_freeze_count() == 0
+    with pytest.raises(ValueError):
+        Timer(list, gc_mode="sometimes")
+
+
+def test_workers_see_all_cpus(monkeypatch):
+    from timebandit import parallel
+    available = parallel.available_cpus
+    cpus = available()
+    seen = []
+    monkeypatch.setattr(parallel, "available_cpus",
+                        lambda: seen.append(available()) or seen[-1])
+    r = Timer(func=list).repeat(4, 100, workers=2, stabilize=True)
+    assert seen == [cpus] and r.stability.cpu is None
+    assert available() == cpus
+
+
+@pytest.mark.skipif(len(os.sched_getaffinity(0)) < 2
+                    if hasattr(os, "sched_getaffinity") else True,
+                    reason="needs two CPUs")
+def test_stabilized_workers_use_several_cpus():
+    t = Timer(func=list)
+    t.repeat(4, 100, workers=2, stabilize=True)
+    assert len({report.cpu for report in t.worker_reports}) > 1
+
+
+def _needs_gc():
+    if not gc.isenabled():
+        raise AssertionError("GC is disabled")
+
+
+def test_gc_mode_on_every_path():
+    t = Timer(_needs_gc, gc_mode="enabled")
+    t.sample(10)
+    assert len(t.repeat(2, 10, clocks=True).clocks) == 2
+    assert len(t.repeat(2, 10, workers=2, stabilize=True)) >= 2
+    with pytest.raises(AssertionError):
+        Timer(_needs_gc).repeat(2, 10, workers=2)
@@ -0,0 +1,53 @@
+import json
+
+from timebandit import suite
+from timebandit._cli import main
+
+source = '''
+from timebandit.suite import tags
+
+def bench_sum():
+    sum(range(100))
+
+@tags("slow")
+def bench_sorted():
+    sorted(range(100, 0, -1))
+
+def bench_fail():
+    1 / 0
+
+def bench_chatty():
+    import sys
+    sys.stdout.write(".")
+
+def helper():
+    pass
+'''
+
+
+def test_discover_and_select(tmp_path):
+    (tmp_path / "bench_demo.py").write_text(source)
+    (tmp_path / "other.py").write_text(source)
+    found = suite.discover(str(tmp_path))
+    assert [b.name for b in found] == ["bench_sum", "bench_sorted",
+                                       "bench_fail", "bench_chatty"]
+    assert found[1].tags == ("slow",)
+    assert [b.name for b in suite.select(found, tags=["slow"])] == [
+        "bench_sorted"]
+    assert [b.name for b in suite.select(found, "so")] == ["bench_sorted"]
+    assert [b.name for b in suite.select(found, "bench_s*")] == [
+        "bench_sum", "bench_sorted"]
+
+
+def test_run_streams_json(tmp_path, capsys):
+    (tmp_path / "bench_demo.py").write_text(source)
+    assert main(["run", "-n", "100", "-r", "2", str(tmp_path)]) == 1
+    results = {r["name"]: r for r in map(
+        json.loads, capsys.readouterr().out.splitlines())}
+    assert set(results) == {"bench_sum", "bench_sorted", "bench_fail",
+                            "bench_chatty"}
+    assert results["bench_chatty"]["number"] == 100
+    assert results["bench_sum"]["number"] == 100
+    assert len(results["bench_sum"]["times"]) == 2
+    assert results["bench_sorted"]["tags"] == ["slow"]
+    assert "ZeroDivisionError" in results["bench_fail"]["error"]
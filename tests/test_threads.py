@@ -0,0 +1,18 @@
+from timebandit.threads import scaling, thread_levels
+
+
+def test_thread_levels():
+    assert thread_levels(1) == [1]
+    assert thread_levels(8) == [1, 2, 4, 8]
+    assert thread_levels(6) == [1, 2, 4, 6]
+
+
+def test_scaling():
+    report = scaling(lambda: sum(range(50)), threads=[1, 2, 4],
+                     number=2000, repeat=2)
+    assert [level.threads for level in report.levels] == [1, 2, 4]
+    assert report.levels[0].efficiency == 1.0
+    assert all(len(level.latency) == level.threads
+               for level in report.levels)
+    assert all(level.throughput > 0 for level in report.levels)
+    assert len(report.table().splitlines()) == 4
@@ -0,0 +1,50 @@
+import time
+
+from timebandit.timeit import Timer
+
+
+def test_sample():
+    result = Timer(func=list).sample(2000)
+    assert len(result.samples) == 2000
+    assert result.overhead > 0
+    assert min(result.samples) >= 0
+    p = result.percentiles()
+    assert p[50] <= p[90] <= p[99] <= p[99.9]
+
+
+def test_sample_tail():
+    calls = iter(range(1000))
+
+    def spiky():
+        if next(calls) % 100 == 99:
+            time.sleep(0.001)
+
+    result = Timer(spiky).sample(1000, correct=False)
+    assert result.overhead == 0.0
+    assert result.percentile(50) < 0.0005
+    assert result.percentile(99.5) >= 0.001
+
+
+def test_calibrate_cached():
+    from timebandit.timeit import calibrate
+    overhead = calibrate()
+    assert overhead.loop > 0
+    assert overhead.call >= 0
+    assert calibrate() is overhead
+
+
+def test_unroll():
+    calls = []
+    Timer(lambda: calls.append(1), unroll=4).timeit(25)
+    assert len(calls) == 100
+    assert Timer(func=list, unroll=4).per_call(1000) > 0
+
+
+def test_argument_pool():
+    seen = []
+    t = Timer(lambda x, y=0: seen.append((x, y)),
+              pool=(entry for entry in [1, (2,), ((3,), {"y": 4})]))
+    assert isinstance(t.pool, tuple) and len(t.pool) == 3
+    t.timeit(6)
+    assert seen == [(1, 0), (2, 0), (3, 4)] * 2
+    assert len(Timer(abs, pool=range(-5, 5)).repeat(3, 1000)) == 3
@@ -24,6 +24,14 @@
     -s/--setup S: statement to be executed once initially (default 'pass').
                     Execution time of this setup statement is NOT timed.
     -p/--process: use time.process_time() (default is time.perf_counter())
+    -a/--adaptive P: time adaptively until the per-loop time is known to
+                    within +/- P (a fraction, e.g. 0.01); ignores -n and -r
+    -m/--max-time S: time budget in seconds for -a (default 10)
+    -S/--save NAME: record the run as benchmark NAME in the history file
+                    (see 'timebandit history' and 'timebandit check')
+    --db PATH: history file for -S (default $TIMEBANDIT_HISTORY or
+                    .timebandit.sqlite)
+    --stabilize: pin, probe noise and warm up first (see timebandit.stabilize)
     -v/--verbose: print raw timing results; repeat for more digits precision
     -u/--unit: set the output time unit (nsec, usec, msec, or sec)
     -h/--help: print this usage message and exit
@@ -35,6 +43,12 @@
     argument in quotes and using leading spaces.  Multiple -s options are
     treated similarly.
 
+    A single 'module:callable' argument is a target instead: it is imported
+    and timed in a fresh interpreter, which reports the cold import time,
+    the first call (lazy initialization, cache fills) and the steady-state
+    time per loop.  -s must then also be a 'module:callable'; it is called
+    once before the first call.  See timebandit.coldstart.
+
     If -n is not given, a suitable number of loops is calculated by trying
     increasing numbers from the sequence 1, 2, 5, 10, 20, 50, ... until the
     total time is at least 0.2 seconds.
@@ -47,31 +61,74 @@
     Classes:
 
         Timer
+        AsyncTimer
 
     Functions:
 
+        compare(func, func, ...) -> Comparison
+        profile(func) -> func
         timeit(string, string) -> float
-        repeat(string, string) -> list
+        repeat(string, string) -> TimingResult
         default_timer() -> float
 
     """
 
 
+import importlib
 import sys
-from pathlib import Path
+import types
 
-from loguru import logger
-from timebandit._cli import main as CLI
-from timebandit.timeit import *
+# public name -> (module, attribute), imported on first access
+_lazy = {
+    "CLI": ("timebandit._cli", "main"),
+    "AsyncTimer": ("timebandit.asynctimer", "AsyncTimer"),
+    "compare": ("timebandit.comparison", "compare"),
+    "profile": ("timebandit.profiler", "profile"),
+}
+for _name in ("Timer", "TimingResult", "Overhead", "calibrate", "timeit",
+              "repeat", "default_timer", "default_repeat"):
+    _lazy[_name] = ("timebandit.timeit", _name)
 
-# from .timeit import *
+_submodules = frozenset((
+    "adaptive", "asynctimer", "cache", "clocks", "coldstart", "comparison",
+    "complexity", "histogram", "history", "hooks", "load", "logreader",
+    "matrix", "memory", "parallel", "profiler", "pytest_plugin", "result",
+    "sampler", "stabilize", "stats", "suite", "threads"))
 
+__all__ = sorted(_lazy)
+
+
+def __getattr__(name):
+    """ Import public names and submodules on first access. """
+    if name in _lazy:
+        module, attr = _lazy[name]
+        value = getattr(importlib.import_module(module), attr)
+        globals()[name] = value
+        return value
+    if name in _submodules:
+        return importlib.import_module("timebandit." + name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy) | _submodules)
 
-__version__: str = None
 
-logger.info(f"filename: {Path(__file__).name}")
-logger.info(f"{Path().cwd().parent=}")
-logger.info("version: ", __version__)
+class _Package(types.ModuleType):
+    """ Importing the 'timebandit.timeit' submodule binds it on the package
+        and would hide the timeit() function of the same name, which the
+        package has always exported; keep the function.
+        """
+
+    def __setattr__(self, name, value):
+        if name == "timeit" and isinstance(value, types.ModuleType):
+            value = value.timeit
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+__version__: str = None
 
 # for line in Path('../pyproject.toml').open(mode='rt').readlines():
 #     if line.startswith("version = "):
@@ -82,7 +139,7 @@ if not __version__:
     __version__ = 'unknown'
 
 if __name__ == "__main__":
-
+    from timebandit._cli import main as CLI
     sys.exit(CLI())
 
 
@@ -0,0 +1,8 @@
+#! /usr/bin/env python3
+""" Command line entry point: python -m timebandit [command] [options]. """
+import sys
+
+from timebandit._cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,16 +15,19 @@
     is not None, it must be a callable that accepts a timer function
     and returns another timer function (used for unit testing).
     """
-from timeit import default_timer, Timer, timeit, repeat, default_repeat
-import gc
+import re
 import sys
 import time
-import itertools
-from loguru import logger
 
-LOGURU_LEVEL = 1
+from timebandit.adaptive import adaptive as adaptive_range
+from timebandit.result import TimingResult, units
+from timebandit.result import format_time as _format_time
+from timebandit.timeit import Timer, default_timer, default_repeat, reindent
+from timebandit.timeit import (_compile_inner, dummy_src_name,
+                               sample_template, template)
 
-logger.info(f'logger initialized: {logger=}')
+# a single argument of this form is a target, not a statement
+_target = re.compile(r"^[A-Za-z_][\w.]*:[A-Za-z_][\w.]*$")
 
 
 def main(args=None, *, _wrap_timer=None):
@@ -46,12 +49,19 @@ def main(args=None, *, _wrap_timer=None):
         """
     if args is None:
         args = sys.argv[1:]
+    if args and args[0] in commands:
+        return commands[args[0]](args[1:])
     import getopt
+    shortopts = "n:u:s:r:a:m:S:tcpvh"
+    longopts = ["number=", "setup=", "repeat=", "adaptive=", "max-time=",
+                "save=", "db=", "stabilize", "time", "clock", "process",
+                "verbose", "unit=", "help"]
     try:
-        opts, args = getopt.getopt(args, "n:u:s:r:tcpvh",
-                                   ["number=", "setup=", "repeat=",
-                                    "time", "clock", "process",
-                                    "verbose", "unit=", "help"])
+        opts, rest = getopt.getopt(args, shortopts, longopts)
+        # options may follow a target ('timebandit mod:func -s mod:setup')
+        if any(_target.match(arg) for arg in rest):
+            opts, rest = getopt.gnu_getopt(args, shortopts, longopts)
+        args = rest
     except getopt.error as err:
         print(err)
         print("use -h/--help for command line help")
@@ -64,8 +74,12 @@ def main(args=None, *, _wrap_timer=None):
     repeat = default_repeat
     verbose = 0
     time_unit = None
-    units = {"nsec": 1e-9, "usec": 1e-6, "msec": 1e-3, "sec": 1.0}
     precision = 3
+    adaptive = 0.0
+    max_time = 10.0
+    save = None
+    db = None
+    stabilize = False
     for o, a in opts:
         if o in ("-n", "--number"):
             number = int(a)
@@ -82,6 +96,16 @@ def main(args=None, *, _wrap_timer=None):
             repeat = int(a)
             if repeat <= 0:
                 repeat = 1
+        if o in ("-a", "--adaptive"):
+            adaptive = float(a)
+        if o in ("-m", "--max-time"):
+            max_time = float(a)
+        if o in ("-S", "--save"):
+            save = a
+        if o == "--db":
+            db = a
+        if o == "--stabilize":
+            stabilize = True
         if o in ("-p", "--process"):
             timer = time.process_time
         if o in ("-v", "--verbose"):
@@ -91,6 +115,14 @@ def main(args=None, *, _wrap_timer=None):
         if o in ("-h", "--help"):
             print(__doc__, end=' ')
             return 0
+    if len(args) == 1 and _target.match(args[0]):
+        if adaptive:
+            print("-a/--adaptive cannot be used with a module:callable target",
+                  file=sys.stderr)
+            return 2
+        return _main_target(args[0], setup, number, repeat,
+                            timer is time.process_time, stabilize, verbose,
+                            time_unit, precision, save, db)
     setup = "\n".join(setup) or "pass"
 
     # Include the current directory, so that local imports work (sys.path
@@ -101,16 +133,26 @@ def main(args=None, *, _wrap_timer=None):
     if _wrap_timer is not None:
         timer = _wrap_timer(timer)
 
-    t = Timer(stmt, setup, timer)
+    t = _statement_timer(stmt, setup, timer)
+    callback = None
+    if verbose:
+        def callback(number, time_taken):
+            msg = "{num} loop{s} -> {secs:.{prec}g} secs"
+            plural = (number != 1)
+            print(msg.format(num=number, s='s' if plural else '',
+                             secs=time_taken, prec=precision))
+    if save:
+        def record(result):
+            from timebandit.history import History
+            with History(db) as history:
+                history.record(save, result, code=(stmt, setup))
+    else:
+        record = None
+    if adaptive:
+        return _main_adaptive(t, adaptive, max_time, callback,
+                              time_unit, precision, record)
     if number == 0:
         # determine number so that 0.2 <= total time < 2.0
-        callback = None
-        if verbose:
-            def callback(number, time_taken):
-                msg = "{num} loop{s} -> {secs:.{prec}g} secs"
-                plural = (number != 1)
-                print(msg.format(num=number, s='s' if plural else '',
-                                 secs=time_taken, prec=precision))
         try:
             number, _ = t.autorange(callback)
         except:
@@ -121,38 +163,27 @@ def main(args=None, *, _wrap_timer=None):
             print()
 
     try:
-        raw_timings = t.repeat(repeat, number)
+        raw_timings = t.repeat(repeat, number, stabilize=stabilize)
     except:
         t.print_exc()
         return 1
+    if record is not None:
+        record(raw_timings)
 
     def format_time(dt):
-        unit = time_unit
-        scale: float = 1.0
-
-        if unit is not None:
-            scale = units[unit]
-        else:
-            scales = [(scale, unit) for unit, scale in units.items()]
-            scales.sort(reverse=True)
-            for scale, unit in scales:
-                if dt >= scale:
-                    break
-
-        return "%.*g %s" % (precision, dt / scale, unit)
+        return _format_time(dt, time_unit, precision)
 
     if verbose:
         print("raw times: %s" % ", ".join(map(format_time, raw_timings)))
         print()
-    timings = [dt / number for dt in raw_timings]
+    timings = raw_timings.per_loop()
 
-    best = min(timings)
+    best = timings.min()
     print("%d loop%s, best of %d: %s per loop"
           % (number, 's' if number != 1 else '',
-             repeat, format_time(best)))
+             len(raw_timings), format_time(best)))
 
-    best = min(timings)
-    worst = max(timings)
+    worst = timings.max()
     if worst >= best * 4:
         import warnings
         warnings.warn_explicit("The test results are likely unreliable. "
@@ -161,3 +192,487 @@ def main(args=None, *, _wrap_timer=None):
                                % (format_time(worst), format_time(best)),
                                UserWarning, '', 0)
     return None
+
+
+def _main_adaptive(t, target, max_time, callback, time_unit, precision,
+                   record=None):
+    """ Run the statistically adaptive engine instead of autorange/repeat. """
+    try:
+        result = adaptive_range(t, precision=target, max_time=max_time,
+                                callback=callback)
+    except:
+        t.print_exc()
+        return 1
+    if record is not None and result.samples:
+        record(TimingResult(result.samples, 1))
+    print("%d loop%s, %d sample%s: %s per loop +/- %.2g%%"
+          % (result.number, 's' if result.number != 1 else '',
+             len(result.samples), 's' if len(result.samples) != 1 else '',
+             _format_time(result.per_loop, time_unit, precision),
+             result.precision * 100))
+    if not result.converged:
+        import warnings
+        warnings.warn_explicit("The time budget of %g secs ran out before "
+                               "the target precision of %.2g%% was reached."
+                               % (max_time, target * 100),
+                               UserWarning, '', 0)
+    return None
+
+
+def _statement_timer(stmt, setup, timer):
+    """ Return a Timer running the statement strings, as the standard
+        library timeit does: setup and statement are compiled into the
+        one function scope of the timing template, so names bound by the
+        setup are locals of the timed loop.
+        """
+    # compile each on its own first, so that e.g. 'return' is rejected
+    compile(setup, dummy_src_name, "exec")
+    compile(stmt, dummy_src_name, "exec")
+    t = Timer(timer=timer)
+    stmt, setup = reindent(stmt, 8), reindent(setup, 4)
+    namespace = {"__name__": "__timebandit__"}
+    t.src = template.format(stmt=stmt, setup=setup, init="")
+    t.inner = _compile_inner(t.src, namespace, {})
+    t.sample_inner = _compile_inner(
+        sample_template.format(stmt=stmt, setup=setup, init=""),
+        namespace, {})
+    return t
+
+
+def _main_target(target, setup, number, repeat, process, stabilize, verbose,
+                 time_unit, precision, save=None, db=None):
+    """ Time a 'module:callable' target in a fresh interpreter and print its
+        cold import, first-call and steady-state costs.
+        """
+    from timebandit.coldstart import run
+    if len(setup) > 1 or (setup and not _target.match(setup[0])):
+        print("-s/--setup must be a single module:callable with a target",
+              file=sys.stderr)
+        return 2
+    try:
+        report = run(target, setup[0] if setup else None, number, repeat,
+                     process, stabilize)
+    except RuntimeError as err:
+        print("%s: %s" % (target, err), file=sys.stderr)
+        return 1
+    number = report["number"]
+    times = report["times"]
+    if save:
+        from timebandit.history import History
+        with History(db) as history:
+            history.record(save, TimingResult([dt * number for dt in times],
+                                              number),
+                           code=(report["code_hash"],))
+
+    def format_time(dt):
+        return _format_time(dt, time_unit, precision)
+
+    print("import: %s (%s)" % (format_time(report["import"]),
+                               "warm" if report["warm"] else "cold"))
+    print("first call: %s" % format_time(report["first_call"]))
+    if verbose:
+        print("raw times: %s" % ", ".join(format_time(dt * number)
+                                          for dt in times))
+    print("%d loop%s, best of %d: %s per loop"
+          % (number, 's' if number != 1 else '', len(times),
+             format_time(report["best"])))
+    return None
+
+
+def _main_compare(args):
+    """ timebandit compare [-s module:setup] [-m S] [-c C] [-u U] target...
+
+        Compare 'module:callable' targets with interleaved trials and
+        print the speed of each relative to the fastest.
+
+        -s/--setup T: 'module:callable' run once before timing
+        -m/--max-time S: time budget in seconds (default 10)
+        -c/--confidence C: confidence level of the ratios (default 0.95)
+        -u/--unit U: output time unit (nsec, usec, msec, or sec)
+        """
+    import getopt
+    import os
+    from timebandit.coldstart import resolve
+    from timebandit.comparison import compare
+    try:
+        opts, targets = getopt.getopt(args, "s:m:c:u:h",
+                                      ["setup=", "max-time=", "confidence=",
+                                       "unit=", "help"])
+    except getopt.error as err:
+        print(err)
+        print("use -h/--help for command line help")
+        return 2
+    setup = None
+    max_time = 10.0
+    confidence = 0.95
+    time_unit = None
+    for o, a in opts:
+        if o in ("-s", "--setup"):
+            setup = a
+        if o in ("-m", "--max-time"):
+            max_time = float(a)
+        if o in ("-c", "--confidence"):
+            confidence = float(a)
+        if o in ("-u", "--unit"):
+            if a not in units:
+                print("Unrecognized unit. Please select nsec, usec, msec, "
+                      "or sec.", file=sys.stderr)
+                return 2
+            time_unit = a
+        if o in ("-h", "--help"):
+            print(_main_compare.__doc__, end=' ')
+            return 0
+    if len(targets) < 2:
+        print("compare needs at least two targets", file=sys.stderr)
+        return 2
+
+    sys.path.insert(0, os.curdir)
+    funcs = []
+    for target in targets + ([setup] if setup else []):
+        try:
+            funcs.append(resolve(target)[0])
+        except (ImportError, AttributeError, ValueError) as err:
+            print("%s: %s" % (target, err), file=sys.stderr)
+            return 2
+    setup_func = funcs.pop() if setup else None
+    result = compare(*funcs, setup=setup_func, names=targets,
+                     max_time=max_time, confidence=confidence)
+
+    width = max(len(c.name) for c in result.candidates)
+    print("%d round%s, %d%% confidence"
+          % (result.rounds, 's' if result.rounds != 1 else '',
+             round(confidence * 100)))
+    for c in result.candidates:
+        if c is result.fastest:
+            verdict = "fastest"
+        else:
+            verdict = "%.2fx slower [%.2f-%.2f]%s" % (
+                c.ratio, c.ratio_low, c.ratio_high,
+                "" if c.significant else " (not significant)")
+            if c.dropped is not None:
+                verdict += ", dropped after round %d" % c.dropped
+        print("%-*s  %s per loop  %s"
+              % (width, c.name, _format_time(c.per_loop, time_unit), verdict))
+    return None
+
+
+def _main_history(args):
+    """ timebandit history [--db PATH] [-n N] [-u U] [name...]
+
+        List the latest recorded runs of each benchmark (all by default),
+        newest first.
+
+        --db PATH: history file (default $TIMEBANDIT_HISTORY or
+                   .timebandit.sqlite)
+        -n/--limit N: runs listed per benchmark (default 10)
+        -u/--unit U: output time unit (nsec, usec, msec, or sec)
+        """
+    import getopt
+    from timebandit.history import History
+    try:
+        opts, names = getopt.getopt(args, "n:u:h",
+                                    ["db=", "limit=", "unit=", "help"])
+    except getopt.error as err:
+        print(err)
+        print("use -h/--help for command line help")
+        return 2
+    db = None
+    limit = 10
+    time_unit = None
+    for o, a in opts:
+        if o == "--db":
+            db = a
+        if o in ("-n", "--limit"):
+            limit = int(a)
+        if o in ("-u", "--unit"):
+            if a not in units:
+                print("Unrecognized unit. Please select nsec, usec, msec, "
+                      "or sec.", file=sys.stderr)
+                return 2
+            time_unit = a
+        if o in ("-h", "--help"):
+            print(_main_history.__doc__, end=' ')
+            return 0
+    with History(db) as history:
+        for name in names or history.names():
+            print(name)
+            for run in history.runs(name, limit):
+                print("  #%-5d %s  %-16s %s  %s  best %s per loop"
+                      % (run.id, time.strftime("%Y-%m-%d %H:%M",
+                                               time.localtime(run.created)),
+                         run.python, run.host, run.code_hash,
+                         _format_time(run.best, time_unit)))
+    return None
+
+
+def _main_check(args):
+    """ timebandit check [--db PATH] [-b N] [-c C] [-t T] [name...]
+
+        Compare the latest run of each benchmark (all by default) with a
+        rolling baseline of earlier runs on the same Python version and
+        host.  The exit status is 1 if any benchmark got significantly
+        slower, so the command can gate merges.
+
+        --db PATH: history file (default $TIMEBANDIT_HISTORY or
+                   .timebandit.sqlite)
+        -b/--baseline N: earlier runs in the baseline (default 10)
+        -c/--confidence C: one-sided confidence level (default 0.95)
+        -t/--threshold T: smallest slowdown reported, as a fraction
+                   (default 0.05)
+        """
+    import getopt
+    from timebandit import history as hist
+    try:
+        opts, names = getopt.getopt(args, "b:c:t:h",
+                                    ["db=", "baseline=", "confidence=",
+                                     "threshold=", "help"])
+    except getopt.error as err:
+        print(err)
+        print("use -h/--help for command line help")
+        return 2
+    db = None
+    baseline = hist.default_baseline
+    confidence = hist.default_confidence
+    threshold = hist.default_threshold
+    for o, a in opts:
+        if o == "--db":
+            db = a
+        if o in ("-b", "--baseline"):
+            baseline = int(a)
+        if o in ("-c", "--confidence"):
+            confidence = float(a)
+        if o in ("-t", "--threshold"):
+            threshold = float(a)
+        if o in ("-h", "--help"):
+            print(_main_check.__doc__, end=' ')
+            return 0
+    failed = False
+    with hist.History(db) as history:
+        for name in names or history.names():
+            try:
+                check = history.check(name, baseline, confidence, threshold)
+            except KeyError:
+                print("%s: no recorded runs" % name, file=sys.stderr)
+                failed = True
+                continue
+            if check.baseline < 2:
+                verdict = "not enough history (%d earlier run%s)" % (
+                    check.baseline, 's' if check.baseline != 1 else '')
+            else:
+                verdict = "%.3fx baseline of %d runs (limit %.3fx)%s" % (
+                    check.ratio, check.baseline, check.limit,
+                    ", code changed" if check.code_changed else "")
+                if check.regression:
+                    verdict = "REGRESSION " + verdict
+                    failed = True
+            print("%s: %s" % (name, verdict))
+    return 1 if failed else None
+
+
+def _main_run(args):
+    """ timebandit run [-j N] [-k PATTERN] [-t TAG] [-n N] [-r N] path...
+
+        Discover the 'bench_*' functions of the 'bench*.py' files below
+        each path (or of each file given), run every one in a fresh
+        subprocess and print its result as a JSON line when it finishes.
+        The exit status is 1 if any benchmark failed.
+
+        -j/--jobs N: subprocesses run at a time, one per CPU (default:
+                   all available CPUs)
+        -k/--keyword PATTERN: only names matching PATTERN (a wildcard, or
+                   a substring)
+        -t/--tag TAG: only benchmarks tagged TAG; may be repeated
+        -n/--number N: loops per repetition (default: autorange)
+        -r/--repeat N: repetitions per benchmark (default 5)
+        -o/--output FILE: write the JSON lines to FILE instead of stdout
+        -l/--list: list the selected benchmarks without running them
+        """
+    import getopt
+    import json
+    from timebandit import suite
+    try:
+        opts, paths = getopt.getopt(args, "j:k:t:n:r:o:lh",
+                                    ["jobs=", "keyword=", "tag=", "number=",
+                                     "repeat=", "output=", "list", "help"])
+    except getopt.error as err:
+        print(err)
+        print("use -h/--help for command line help")
+        return 2
+    jobs = None
+    pattern = None
+    tags = []
+    number = 0
+    repeat = default_repeat
+    output = None
+    listing = False
+    for o, a in opts:
+        if o in ("-j", "--jobs"):
+            jobs = int(a)
+        if o in ("-k", "--keyword"):
+            pattern = a
+        if o in ("-t", "--tag"):
+            tags.append(a)
+        if o in ("-n", "--number"):
+            number = int(a)
+        if o in ("-r", "--repeat"):
+            repeat = max(1, int(a))
+        if o in ("-o", "--output"):
+            output = a
+        if o in ("-l", "--list"):
+            listing = True
+        if o in ("-h", "--help"):
+            print(_main_run.__doc__, end=' ')
+            return 0
+    if not paths:
+        print("run needs at least one path", file=sys.stderr)
+        return 2
+
+    benchmarks = suite.select(
+        [b for path in paths for b in suite.discover(path)], pattern, tags)
+    if listing:
+        for b in benchmarks:
+            print(b.id + ("  [%s]" % ", ".join(b.tags) if b.tags else ""))
+        return None
+    out = open(output, "w") if output else sys.stdout
+    failed = False
+    try:
+        for result in suite.run(benchmarks, jobs, number, repeat):
+            failed = failed or "error" in result
+            print(json.dumps(result), file=out, flush=True)
+    finally:
+        if output:
+            out.close()
+    return 1 if failed else None
+
+
+def _main_matrix(args):
+    """ timebandit matrix -p PYTHON [-p PYTHON...] [-j N] [-k PATTERN]
+                          [-t TAG] [-n N] [-r N] [-u U] path...
+
+        Time the 'bench_*' functions found below each path (see 'timebandit
+        run') under every interpreter given with -p, in parallel worker
+        processes, and print one table with a column per interpreter and
+        the speedup of each relative to the first.  The exit status is 1
+        if any benchmark failed.
+
+        -p/--python PYTHON: interpreter to run; may be repeated
+        -j/--jobs N: benchmarks run at a time, one per CPU (default: all
+                   available CPUs)
+        -k/--keyword PATTERN: only names matching PATTERN (a wildcard, or
+                   a substring)
+        -t/--tag TAG: only benchmarks tagged TAG; may be repeated
+        -n/--number N: loops per repetition (default: autorange)
+        -r/--repeat N: repetitions per benchmark (default 5)
+        -u/--unit U: time unit of the table (nsec, usec, msec, or sec)
+        """
+    import getopt
+    from timebandit import matrix, suite
+    try:
+        opts, paths = getopt.getopt(args, "p:j:k:t:n:r:u:h",
+                                    ["python=", "jobs=", "keyword=", "tag=",
+                                     "number=", "repeat=", "unit=", "help"])
+    except getopt.error as err:
+        print(err)
+        print("use -h/--help for command line help")
+        return 2
+    pythons = []
+    jobs = None
+    pattern = None
+    tags = []
+    number = 0
+    repeat = default_repeat
+    time_unit = None
+    for o, a in opts:
+        if o in ("-p", "--python"):
+            pythons.append(a)
+        if o in ("-j", "--jobs"):
+            jobs = int(a)
+        if o in ("-k", "--keyword"):
+            pattern = a
+        if o in ("-t", "--tag"):
+            tags.append(a)
+        if o in ("-n", "--number"):
+            number = int(a)
+        if o in ("-r", "--repeat"):
+            repeat = max(1, int(a))
+        if o in ("-u", "--unit"):
+            if a not in units:
+                print("Unrecognized unit. Please select nsec, usec, msec, "
+                      "or sec.", file=sys.stderr)
+                return 2
+            time_unit = a
+        if o in ("-h", "--help"):
+            print(_main_matrix.__doc__, end=' ')
+            return 0
+    if not pythons or not paths:
+        print("matrix needs at least one -p PYTHON and one path",
+              file=sys.stderr)
+        return 2
+
+    benchmarks = suite.select(
+        [b for path in paths for b in suite.discover(path)], pattern, tags)
+    try:
+        result = matrix.run(pythons, benchmarks, jobs, number, repeat)
+    except (OSError, RuntimeError) as err:
+        print("matrix: %s" % err, file=sys.stderr)
+        return 1
+    print(result.table(time_unit))
+    for (bench_id, i), r in sorted(result.results.items()):
+        if "error" in r:
+            print("%s [%d]: %s" % (bench_id, i + 1, r["error"]),
+                  file=sys.stderr)
+    return 1 if result.failed else None
+
+
+def _main_cache(args):
+    """ timebandit cache [--db PATH] [clear [PATTERN]]
+
+        List the cached timing results, most recently used first, or
+        with 'clear' remove the entries whose function name matches the
+        wildcard PATTERN (all entries by default).
+
+        --db PATH: cache file (default $TIMEBANDIT_CACHE or
+                   .timebandit-cache.sqlite)
+        """
+    import getopt
+    from timebandit.cache import ResultCache
+    try:
+        opts, args = getopt.getopt(args, "h", ["db=", "help"])
+    except getopt.error as err:
+        print(err)
+        print("use -h/--help for command line help")
+        return 2
+    db = None
+    for o, a in opts:
+        if o == "--db":
+            db = a
+        if o in ("-h", "--help"):
+            print(_main_cache.__doc__, end=' ')
+            return 0
+    if args and (args[0] != "clear" or len(args) > 2):
+        print("usage: timebandit cache [--db PATH] [clear [PATTERN]]",
+              file=sys.stderr)
+        return 2
+    with ResultCache(db) as cache:
+        if args:
+            removed = cache.invalidate(args[1] if len(args) > 1 else None)
+            print("removed %d entr%s" % (removed,
+                                         'ies' if removed != 1 else 'y'))
+            return None
+        for entry in cache.entries():
+            print("%s  %s  %s  best %s per loop"
+                  % (time.strftime("%Y-%m-%d %H:%M",
+                                   time.localtime(entry.used)),
+                     entry.key.split(":", 1)[1], entry.name,
+                     _format_time(entry.samples.per_loop().min())))
+    return None
+
+
+commands = {
+    "cache": _main_cache,
+    "check": _main_check,
+    "compare": _main_compare,
+    "history": _main_history,
+    "matrix": _main_matrix,
+    "run": _main_run,
+}
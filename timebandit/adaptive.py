@@ -0,0 +1,105 @@
+#! /usr/bin/env python3
+""" Statistically adaptive replacement for Timer.autorange().
+
+    Timer.autorange() walks the fixed 1, 2, 5, 10, ... sequence until a
+    single trial takes 0.2 seconds and the caller then runs repeat() on
+    top of that.  The engine here grows the loop count geometrically,
+    keeps every trial that is long enough to be above the timer's noise
+    floor as a sample, and stops as soon as the confidence interval on
+    the per-loop time is tighter than the requested precision, or when
+    the time budget is used up.
+
+    It works with any object that has a timeit(number) method, so it can
+    drive both timebandit.timeit.Timer and the standard library Timer.
+
+    Classes:
+
+        AdaptiveResult
+
+    Functions:
+
+        adaptive(timer, precision, ...) -> AdaptiveResult
+    """
+
+import time
+import typing as t
+
+from timebandit.stats import confidence_interval
+
+__all__ = ["AdaptiveResult", "adaptive"]
+
+default_precision: float = 0.01
+default_confidence: float = 0.95
+default_max_time: float = 10.0
+# trials shorter than this are calibration only, not samples
+default_min_trial: float = 0.001
+# the loop count stops growing once a trial takes this long
+default_trial_time: float = 0.02
+
+
+class AdaptiveResult(t.NamedTuple):
+    """ Outcome of an adaptive run.
+
+        - number: loop count of the final trials
+        - per_loop: mean time per loop, in seconds
+        - precision: achieved half width of the confidence interval,
+            as a fraction of 'per_loop'
+        - samples: per-loop time of every trial used as a sample
+        - elapsed: wall-clock time spent, including calibration
+        - converged: False if the time budget ran out first
+        """
+    number: int
+    per_loop: float
+    precision: float
+    samples: t.List[float]
+    elapsed: float
+    converged: bool
+
+
+def adaptive(timer, precision: float = default_precision,
+             confidence: float = default_confidence,
+             max_time: float = default_max_time,
+             min_samples: int = 5,
+             growth: float = 2.0,
+             min_trial: float = default_min_trial,
+             trial_time: float = default_trial_time,
+             callback: t.Callable = None) -> AdaptiveResult:
+    """ Time 'timer' until the per-loop estimate is stable.
+
+        The loop count starts at one and is multiplied by 'growth' after
+        every trial until a trial takes at least 'trial_time' seconds.
+        Every trial taking at least 'min_trial' seconds counts as a
+        sample, so calibration is not wasted.  Sampling stops once there
+        are 'min_samples' samples and the 'confidence' interval on the
+        mean per-loop time is within +/- 'precision' (a fraction), or
+        once 'max_time' seconds have passed.
+
+        If *callback* is given it is called after each trial with
+        ``callback(number, time_taken)``, as in Timer.autorange().
+        """
+    if growth <= 1:
+        raise ValueError("growth must be greater than 1")
+    start = time.perf_counter()
+    number = 1
+    samples: t.List[float] = []
+    while True:
+        time_taken = timer.timeit(number)
+        if callback:
+            callback(number, time_taken)
+        if time_taken >= min_trial:
+            samples.append(time_taken / number)
+        if len(samples) >= max(min_samples, 2):
+            mean, half = confidence_interval(samples, confidence)
+            if mean > 0 and half / mean <= precision:
+                converged = True
+                break
+        if time.perf_counter() - start >= max_time:
+            converged = False
+            break
+        if time_taken < trial_time:
+            number = max(number + 1, int(number * growth))
+    mean, half = confidence_interval(samples or [time_taken / number],
+                                     confidence)
+    return AdaptiveResult(number, mean,
+                          half / mean if mean > 0 else float("inf"),
+                          samples, time.perf_counter() - start, converged)
@@ -0,0 +1,183 @@
+#! /usr/bin/env python3
+""" Timing of coroutine functions.
+
+    Timer only calls its function, so timing an 'async def' with it
+    measures nothing but coroutine creation.  AsyncTimer compiles an
+    'async def' variant of the timing templates in which every call is
+    awaited, and drives it inside one event loop that is reused across
+    runs.  Calls are either awaited one after the other or, with
+    'concurrency' N, gathered N at a time as concurrent tasks.
+
+    The cost the event loop adds around each loop iteration (coroutine
+    creation, awaiting and, for concurrent runs, task scheduling and
+    gathering) is measured once per timer, concurrency and unroll setting
+    by timing an empty coroutine the same way, and subtracted from every
+    timeit() result.
+
+    Because AsyncTimer is a Timer, repeat(), autorange(), adaptive() and
+    sample() work unchanged; per_call() does not subtract the loop
+    overhead a second time.  It cannot be used from code
+    already running inside an event loop.
+
+    Classes:
+
+        AsyncTimer
+    """
+
+import asyncio
+import inspect
+import typing as t
+
+from timebandit.timeit import (Timer, _compile_inner, _globals, _pass,
+                               default_timer, reindent, sample_template,
+                               template)
+
+__all__ = ["AsyncTimer"]
+
+# loops used to measure the event-loop overhead, best of 'repeat'
+overhead_number: int = 1000
+overhead_repeat: int = 5
+
+# per-loop overhead, by (timer, concurrency, unroll)
+_overhead_cache: t.Dict[t.Tuple[t.Callable, int, int], float] = {}
+
+
+async def _anoop():
+    """ Coroutine form of doing nothing, used to measure loop overhead. """
+    pass
+
+
+def _asynchronous(src: str) -> str:
+    """ Turn a formatted timing template into an 'async def'. """
+    return src.replace("\ndef inner(", "\nasync def inner(", 1)
+
+
+class AsyncTimer(Timer):
+    """ Timer for coroutine functions.
+
+        Parameters are those of Timer, plus:
+
+        - concurrency: number of calls gathered as concurrent tasks per
+            loop iteration (default 1: calls are awaited sequentially)
+        - correct: subtract the measured event-loop overhead from every
+            timeit() result (default True)
+        - loop: event loop to use; by default a new loop is created and
+            closed by close() or on leaving a 'with' block
+
+        'func' must be a coroutine function; 'setup' may be a plain or a
+        coroutine function.  With 'concurrency' N and 'unroll' k, each
+        loop iteration makes N * k calls.
+        """
+
+    def __init__(self, func: t.Callable = None,
+                 setup: t.Callable = None,
+                 timer: t.Callable = default_timer,
+                 globals: t.Dict[str, t.Any] = None,
+                 unroll: int = 1,
+                 concurrency: int = 1,
+                 correct: bool = True,
+                 loop: asyncio.AbstractEventLoop = None):
+        """Constructor.  See class doc string. """
+        func = func if func else _anoop
+        if not inspect.iscoroutinefunction(func):
+            raise ValueError("func is not a coroutine function")
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        super().__init__(func, setup, timer, globals, unroll)
+        self.concurrency: int = concurrency
+        self.correct: bool = correct
+        self._own_loop: bool = loop is None
+        self.loop = asyncio.new_event_loop() if loop is None else loop
+
+        local_ns: t.Dict[str, t.Any] = {"_func": self.func,
+                                        "_setup": self.setup,
+                                        "_gather": asyncio.gather,
+                                        "_tasks": range(concurrency)}
+        init = ", _setup=_setup, _func=_func, _gather=_gather, _tasks=_tasks"
+        setup = ("await _setup()" if inspect.iscoroutinefunction(self.setup)
+                 else "_setup()")
+        if concurrency == 1:
+            stmt = "await _func()"
+        else:
+            stmt = "await _gather(*[_func() for _j in _tasks])"
+        global_ns = _globals() if globals is None else globals
+
+        src = _asynchronous(template.format(
+            stmt=reindent("\n".join([stmt] * unroll), 8),
+            setup=setup, init=init))
+        self.src = src  # Save for traceback display
+        async_inner = _compile_inner(src, global_ns, dict(local_ns))
+        async_sample_inner = _compile_inner(_asynchronous(
+            sample_template.format(stmt=stmt, setup=setup, init=init)),
+            global_ns, dict(local_ns))
+
+        run = self.loop.run_until_complete
+        self.inner = lambda _it, _timer: run(async_inner(_it, _timer))
+        self.sample_inner = lambda _it, _timer, _buf: run(
+            async_sample_inner(_it, _timer, _buf))
+
+    def overhead(self) -> float:
+        """ Return the event-loop overhead per loop iteration, in seconds.
+
+            Measured once per (timer, concurrency, unroll) by timing an
+            empty coroutine on this timer's loop, then cached.
+            """
+        key = (self.timer, self.concurrency, self.unroll)
+        if key not in _overhead_cache:
+            empty = AsyncTimer(_anoop, _pass, self.timer,
+                               unroll=self.unroll,
+                               concurrency=self.concurrency,
+                               correct=False, loop=self.loop)
+            _overhead_cache[key] = min(
+                empty.repeat(overhead_repeat, overhead_number)
+            ) / overhead_number
+        return _overhead_cache[key]
+
+    def timeit(self, number: int = 1000) -> float:
+        """ Time 'number' loop iterations of awaiting the coroutine.
+
+            The result has the event-loop overhead removed (see
+            overhead()) unless the timer was created with correct=False,
+            and is clipped at zero.
+            """
+        timing = super().timeit(number)
+        if self.correct:
+            timing = max(timing - number * self.overhead(), 0.0)
+        return timing
+
+    def per_call(self, number: int = 1000, repeat: int = 5,
+                 body_only: bool = False) -> float:
+        """ Return the best time of one call; see Timer.per_call().
+
+            With correct=True, timeit() has already subtracted the whole
+            cost of awaiting an empty coroutine, loop iteration included,
+            so nothing more is subtracted (and 'body_only' changes
+            nothing).  Otherwise Timer.per_call() subtracts the calibrated
+            loop (and call) overhead.
+            """
+        if not self.correct:
+            return super().per_call(number, repeat, body_only)
+        return min(self.repeat(repeat, number)) / (number * self.unroll)
+
+    def repeat(self, repeat: int = 5, number: int = 1000,
+               workers: int = None, **kwargs):
+        """ Call timeit() a few times; see Timer.repeat() for the keyword
+            arguments.
+
+            'workers' is not supported, since coroutines and event loops
+            cannot be sent to other processes.
+            """
+        if workers:
+            raise ValueError("AsyncTimer does not support workers")
+        return super().repeat(repeat, number, **kwargs)
+
+    def close(self) -> None:
+        """ Close the event loop if this timer created it. """
+        if self._own_loop and not self.loop.is_closed():
+            self.loop.close()
+
+    def __enter__(self) -> "AsyncTimer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
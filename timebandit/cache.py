@@ -0,0 +1,175 @@
+#! /usr/bin/env python3
+""" Content-hash cache of timing results.
+
+    Re-running a suite after a small change re-measures mostly unchanged
+    code.  A Timer created with 'cache' looks its results up by a key
+    hashing
+
+    - the timed function and the setup function (see
+      timebandit.history.code_hash: bytecode, constants, defaults,
+      closure values and the module-level functions they call),
+    - the timer function, 'unroll', the argument pool and the GC mode,
+    - the interpreter and platform (Python version and build, bytecode
+      cache tag, OS, host fingerprint),
+    - the method and its arguments (repeat and number),
+
+    and reuses the stored timings on a hit.  Entries live in a SQLite file
+    and are evicted least recently used first once there are more than
+    'max_entries'.
+
+    Typical use:
+
+        Timer(func, cache=True).repeat()       # default cache file
+        timeit(func, cache=ResultCache("my.sqlite"))
+
+    and 'timebandit cache' lists the cache, 'timebandit cache clear
+    [PATTERN]' invalidates entries.
+
+    Classes:
+
+        ResultCache
+        Entry
+
+    Functions:
+
+        timer_key(timer) -> str
+        default_cache() -> ResultCache
+    """
+
+import fnmatch
+import os
+import platform
+import sqlite3
+import sys
+import time
+import typing as t
+from array import array
+
+from timebandit.history import code_hash, host_fingerprint, python_version
+from timebandit.result import TimingResult
+
+__all__ = ["ResultCache", "Entry", "timer_key", "default_cache",
+           "default_cache_path"]
+
+default_cache_path: str = os.environ.get("TIMEBANDIT_CACHE",
+                                         ".timebandit-cache.sqlite")
+default_max_entries: int = 1000
+
+_schema = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    samples BLOB NOT NULL,
+    created REAL NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+"""
+
+
+def _environment() -> t.Tuple[str, ...]:
+    return (python_version(), sys.version, sys.implementation.cache_tag,
+            platform.platform(), host_fingerprint())
+
+
+def timer_key(timer) -> str:
+    """ Return the part of the cache key identifying a Timer's code. """
+    return code_hash(timer.func, timer.setup, timer.timer, timer.unroll,
+                     timer.pool, timer.gc_mode, _environment())
+
+
+class Entry(t.NamedTuple):
+    """ A cached result: the raw timings of 'number' loops each. """
+    key: str
+    name: str
+    number: int
+    samples: TimingResult
+    created: float
+    used: float
+
+
+class ResultCache:
+    """ LRU cache of timings in a SQLite file; a context manager. """
+
+    def __init__(self, path: str = None,
+                 max_entries: int = default_max_entries):
+        self.path = path or default_cache_path
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(_schema)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _entry(self, row: tuple) -> Entry:
+        samples = array("d")
+        samples.frombytes(row[3])
+        return Entry(row[0], row[1], row[2],
+                     TimingResult(samples, row[2], backend="array"),
+                     row[4], row[5])
+
+    def get(self, key: str) -> t.Optional[Entry]:
+        """ Return the entry for 'key' and mark it used, or None. """
+        row = self.connection.execute(
+            "SELECT key, name, number, samples, created, used FROM entries"
+            " WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self.connection:
+            self.connection.execute(
+                "UPDATE entries SET used = ? WHERE key = ?",
+                (time.time(), key))
+        return self._entry(row)
+
+    def put(self, key: str, name: str, samples: t.Iterable[float],
+            number: int) -> None:
+        """ Store raw timings under 'key', evicting the least recently
+            used entries beyond 'max_entries'.
+            """
+        now = time.time()
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (key, name, number, array("d", samples).tobytes(), now, now))
+            self.connection.execute(
+                "DELETE FROM entries WHERE key NOT IN (SELECT key FROM"
+                " entries ORDER BY used DESC LIMIT ?)", (self.max_entries,))
+
+    def entries(self) -> t.List[Entry]:
+        """ Return all entries, most recently used first. """
+        return [self._entry(row) for row in self.connection.execute(
+            "SELECT key, name, number, samples, created, used FROM entries"
+            " ORDER BY used DESC")]
+
+    def invalidate(self, pattern: str = None) -> int:
+        """ Remove the entries whose name matches wildcard 'pattern' (all
+            entries by default); return the number removed.
+            """
+        keys = [e.key for e in self.entries()
+                if pattern is None or fnmatch.fnmatchcase(e.name, pattern)]
+        with self.connection:
+            self.connection.executemany("DELETE FROM entries WHERE key = ?",
+                                        [(key,) for key in keys])
+        return len(keys)
+
+
+_default: t.Optional[ResultCache] = None
+
+
+def default_cache() -> ResultCache:
+    """ Return the process-wide cache on default_cache_path. """
+    global _default
+    if _default is None:
+        _default = ResultCache()
+    return _default
@@ -0,0 +1,135 @@
+#! /usr/bin/env python3
+""" Several clocks and resource counters sampled in one run.
+
+    A Timer's template only ever calls '_timer()' twice around the loop
+    and subtracts the readings, so any callable returning values that can
+    be subtracted works as a timer.  read() returns a ClockReading with
+    perf_counter_ns(), process_time_ns(), thread_time_ns() and the
+    resource.getrusage() counters of the calling thread (where the
+    platform has RUSAGE_THREAD, else the process); subtracting two
+    readings gives a ClockDelta.  One run therefore tells whether the
+    time went to CPU in user or kernel mode, to blocking (wall time not
+    spent on the thread's CPU), to context switches or to page faults.
+
+    Classes:
+
+        ClockReading
+        ClockDelta
+
+    Functions:
+
+        read() -> ClockReading
+        repeat_clocks(timer, repeat, number) -> list
+    """
+
+import itertools
+import time
+import typing as t
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+__all__ = ["ClockReading", "ClockDelta", "read", "repeat_clocks"]
+
+_rusage_who = (getattr(resource, "RUSAGE_THREAD", None)
+               if resource is not None else None)
+if resource is not None and _rusage_who is None:
+    _rusage_who = resource.RUSAGE_SELF
+
+
+class ClockDelta(t.NamedTuple):
+    """ Difference of two ClockReadings.
+
+        - wall_ns, process_ns, thread_ns: elapsed time on each clock
+        - user, system: CPU seconds in user and kernel mode (rusage)
+        - voluntary, involuntary: context switches (rusage)
+        - minor_faults, major_faults: page faults (rusage)
+
+        The rusage fields are zero where the resource module is missing.
+        """
+    wall_ns: int
+    process_ns: int
+    thread_ns: int
+    user: float
+    system: float
+    voluntary: int
+    involuntary: int
+    minor_faults: int
+    major_faults: int
+
+    @property
+    def wall(self) -> float:
+        return self.wall_ns * 1e-9
+
+    @property
+    def cpu(self) -> float:
+        """ CPU seconds of the timing thread. """
+        return self.thread_ns * 1e-9
+
+    @property
+    def off_cpu(self) -> float:
+        """ Wall seconds the timing thread was not on a CPU (blocked,
+            sleeping or preempted).
+            """
+        return max(self.wall_ns - self.thread_ns, 0) * 1e-9
+
+    @property
+    def cpu_share(self) -> float:
+        """ Fraction of the wall time spent on the thread's CPU. """
+        return min(self.thread_ns / self.wall_ns, 1.0) if self.wall_ns else 0.0
+
+    @property
+    def context_switches(self) -> int:
+        return self.voluntary + self.involuntary
+
+    @property
+    def page_faults(self) -> int:
+        return self.minor_faults + self.major_faults
+
+
+class ClockReading(t.NamedTuple):
+    """ One reading of every clock; subtract two to get a ClockDelta. """
+    wall_ns: int
+    process_ns: int
+    thread_ns: int
+    user: float
+    system: float
+    voluntary: int
+    involuntary: int
+    minor_faults: int
+    major_faults: int
+
+    def __sub__(self, other: "ClockReading") -> ClockDelta:
+        return ClockDelta(*(a - b for a, b in zip(self, other)))
+
+
+def read() -> ClockReading:
+    """ Read all clocks now.  Usable as the 'timer' of a compiled template.
+        """
+    if _rusage_who is None:
+        return ClockReading(time.perf_counter_ns(), time.process_time_ns(),
+                            time.thread_time_ns(), 0.0, 0.0, 0, 0, 0, 0)
+    ru = resource.getrusage(_rusage_who)
+    return ClockReading(time.perf_counter_ns(), time.process_time_ns(),
+                        time.thread_time_ns(), ru.ru_utime, ru.ru_stime,
+                        ru.ru_nvcsw, ru.ru_nivcsw, ru.ru_minflt, ru.ru_majflt)
+
+
+def repeat_clocks(timer, repeat: int, number: int) -> t.List[ClockDelta]:
+    """ Run 'repeat' loops of 'number' calls, reading every clock.
+
+        'timer' is any object with a compiled 'inner(_it, _timer)', such
+        as a timebandit Timer or the standard library's timeit.Timer.  GC
+        is handled as in Timer.timeit(), following the timer's 'gc_mode'
+        (disabled if it has none).
+        """
+    from timebandit.timeit import _gc_mode
+    mode = getattr(timer, "gc_mode", "disabled")
+    deltas = []
+    for _ in range(repeat):
+        it = itertools.repeat(None, number)
+        with _gc_mode(mode):
+            deltas.append(timer.inner(it, read))
+    return deltas
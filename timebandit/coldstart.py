@@ -0,0 +1,115 @@
+#! /usr/bin/env python3
+""" Cold import, first call and steady-state cost of a 'module:callable'.
+
+    run() starts a fresh interpreter that runs this module.  Before it
+    measures anything the child has imported only the standard modules
+    the interpreter starts with and the (lazy) timebandit package, so
+    the costs it reports are those a short-lived worker pays:
+
+    - import: importing the target's module (marked warm if the module
+      was already loaded at startup, e.g. 'os');
+    - first call: one call of the target right after import, after the
+      setup callable ran, which covers lazy initialization and cache
+      fills;
+    - steady state: the per-loop times of Timer.repeat() afterwards.
+
+    The child prints its results as one JSON line on stdout.
+
+    Functions:
+
+        run(target, setup, ...) -> dict
+        measure(target, setup, ...) -> dict
+        resolve(spec) -> (object, float, bool)
+    """
+
+import importlib
+import sys
+import time
+import typing as t
+
+__all__ = ["run", "measure", "resolve"]
+
+
+def resolve(spec: str) -> t.Tuple[t.Any, float, bool]:
+    """ Import the object named by 'module:qualname'.
+
+        Returns (object, seconds spent importing the module, warm), where
+        'warm' is True if the module was already imported.
+        """
+    module, sep, name = spec.partition(":")
+    if not sep or not module or not name:
+        raise ValueError("expected 'module:callable', got %r" % spec)
+    warm = module in sys.modules
+    start = time.perf_counter()
+    obj = importlib.import_module(module)
+    elapsed = time.perf_counter() - start
+    for attr in name.split("."):
+        obj = getattr(obj, attr)
+    return obj, elapsed, warm
+
+
+def measure(target: str, setup: str = None, number: int = 0,
+            repeat: int = 5, process: bool = False,
+            stabilize: bool = False) -> t.Dict[str, t.Any]:
+    """ Measure 'target' in this process; see the module docstring.
+
+        'number' 0 picks the loop count with Timer.autorange().
+        'process' times the steady state with time.process_time().
+        """
+    func, import_time, warm = resolve(target)
+    setup_func = resolve(setup)[0] if setup else None
+    if setup_func is not None:
+        setup_func()
+    start = time.perf_counter()
+    func()
+    first_call = time.perf_counter() - start
+
+    from timebandit.history import code_hash
+    from timebandit.timeit import Timer, default_timer
+    # the setup ran once above; the steady state must not redo it
+    timer = Timer(func, None, time.process_time if process else default_timer)
+    if number <= 0:
+        number, _ = timer.autorange()
+    result = timer.repeat(repeat, number, stabilize=stabilize)
+    times = result.per_loop()
+    return {"target": target, "import": import_time, "warm": warm,
+            "first_call": first_call, "number": number,
+            "times": list(times), "best": times.min(),
+            "noise": (result.stability.noise
+                      if result.stability is not None else None),
+            "code_hash": code_hash(func, setup_func)}
+
+
+def run(target: str, setup: str = None, number: int = 0, repeat: int = 5,
+        process: bool = False, stabilize: bool = False,
+        python: str = None) -> t.Dict[str, t.Any]:
+    """ measure() 'target' in a fresh 'python' (default: this one).
+
+        The current directory is put on the child's sys.path so local
+        modules resolve.  Raises RuntimeError with the child's last error
+        line if it fails.
+        """
+    import json
+    import os
+    import subprocess
+    options = {"target": target, "setup": setup, "number": number,
+               "repeat": repeat, "process": process, "stabilize": stabilize}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (os.path.abspath(os.curdir), root, env.get("PYTHONPATH"))
+        if p)
+    proc = subprocess.run([python or sys.executable, "-m",
+                           "timebandit.coldstart", json.dumps(options)],
+                          env=env, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, universal_newlines=True)
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines
+                           else "exit status %d" % proc.returncode)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    import json as _json
+    print(_json.dumps(measure(**_json.loads(sys.argv[1]))))
@@ -0,0 +1,165 @@
+#! /usr/bin/env python3
+""" Interleaved comparison of several candidate functions.
+
+    Timing candidates one after the other lets thermal drift and
+    background load favour whichever runs first.  compare() instead runs
+    short trials of every candidate in a randomized round-robin, so all
+    of them see the same machine conditions.  Speed is reported relative
+    to the fastest candidate, with a confidence interval on the ratio; a
+    candidate whose interval lies clearly above the fastest one is
+    dropped early so no more time is spent on it.
+
+    Ratios are estimated on the logarithm of the per-loop times (Welch's
+    interval on the difference of log means), which keeps the interval
+    on the ratio symmetric in log space and well behaved for skewed
+    timing distributions.
+
+    Classes:
+
+        Candidate
+        Comparison
+
+    Functions:
+
+        compare(*funcs, ...) -> Comparison
+    """
+
+import math
+import random
+import statistics
+import time
+import typing as t
+
+from timebandit.stats import welch_interval
+from timebandit.timeit import Timer, _loops_for, default_timer
+
+__all__ = ["Candidate", "Comparison", "compare"]
+
+# target duration of a single interleaved trial, in seconds
+default_trial_time: float = 0.005
+default_max_time: float = 10.0
+default_confidence: float = 0.95
+# a candidate is dropped once it is significantly slower by this fraction
+default_drop_margin: float = 0.05
+
+
+class Candidate(t.NamedTuple):
+    """ Result for one candidate of a comparison.
+
+        - name: display name of the candidate
+        - number: loops per trial
+        - samples: per-loop time of every trial, in seconds
+        - per_loop: median per-loop time, in seconds
+        - ratio: per-loop time relative to the fastest candidate
+        - ratio_low, ratio_high: confidence interval on 'ratio'
+        - significant: True if the interval excludes 1.0
+        - dropped: round after which the candidate was dropped, or None
+        """
+    name: str
+    number: int
+    samples: t.List[float]
+    per_loop: float
+    ratio: float
+    ratio_low: float
+    ratio_high: float
+    significant: bool
+    dropped: t.Optional[int]
+
+
+class Comparison(t.NamedTuple):
+    """ Candidates sorted fastest first, plus rounds run and time spent. """
+    candidates: t.List[Candidate]
+    rounds: int
+    elapsed: float
+    confidence: float
+
+    @property
+    def fastest(self) -> Candidate:
+        return self.candidates[0]
+
+
+def _log_ratio(samples: t.List[float], best: t.List[float],
+               confidence: float) -> t.Tuple[float, float]:
+    """ Welch interval on log(samples) - log(best). """
+    return welch_interval([math.log(x) for x in samples],
+                          [math.log(x) for x in best], confidence)
+
+
+def _name(func: t.Callable) -> str:
+    return getattr(func, "__qualname__", None) or repr(func)
+
+
+def compare(*funcs: t.Callable,
+            setup: t.Callable = None,
+            timer: t.Callable = default_timer,
+            names: t.Sequence[str] = None,
+            trial_time: float = default_trial_time,
+            min_rounds: int = 5,
+            max_rounds: int = 200,
+            max_time: float = default_max_time,
+            confidence: float = default_confidence,
+            drop_margin: float = default_drop_margin,
+            seed: int = None) -> Comparison:
+    """ Compare the speed of 'funcs' with interleaved trials.
+
+        Every round runs one trial of each remaining candidate in a
+        random order ('seed' makes the order reproducible).  After
+        'min_rounds' rounds, a candidate is dropped once the lower end of
+        the 'confidence' interval on its ratio to the current fastest
+        candidate exceeds 1 + 'drop_margin'.  Comparison stops when only
+        one candidate remains, after 'max_rounds' rounds, or after
+        'max_time' seconds (at least one round always runs).
+
+        'setup' is run before every trial, as with Timer.timeit().  'names'
+        overrides the display names, which default to each function's
+        qualified name.
+        """
+    if len(funcs) < 2:
+        raise ValueError("compare() needs at least two candidates")
+    names = list(names) if names else [_name(f) for f in funcs]
+    if len(names) != len(funcs):
+        raise ValueError("need one name per candidate")
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    timers = [Timer(f, setup, timer) for f in funcs]
+    numbers = [_loops_for(tm, trial_time) for tm in timers]
+    samples: t.List[t.List[float]] = [[] for _ in funcs]
+    dropped: t.List[t.Optional[int]] = [None] * len(funcs)
+    active = list(range(len(funcs)))
+    rounds = 0
+    # at least one round, even if calibration used up 'max_time'
+    while rounds == 0 or (len(active) > 1 and rounds < max_rounds
+                          and time.perf_counter() - start < max_time):
+        rounds += 1
+        order = active[:]
+        rng.shuffle(order)
+        for i in order:
+            samples[i].append(timers[i].timeit(numbers[i]) / numbers[i])
+        if rounds < min_rounds:
+            continue
+        best = min(active, key=lambda i: statistics.median(samples[i]))
+        for i in active[:]:
+            if i == best:
+                continue
+            diff, half = _log_ratio(samples[i], samples[best], confidence)
+            if math.exp(diff - half) > 1 + drop_margin:
+                dropped[i] = rounds
+                active.remove(i)
+
+    medians = [statistics.median(s) for s in samples]
+    best = min(range(len(funcs)), key=medians.__getitem__)
+    candidates = []
+    for i in range(len(funcs)):
+        if i == best:
+            low = high = ratio = 1.0
+        else:
+            diff, half = _log_ratio(samples[i], samples[best], confidence)
+            ratio = math.exp(diff)
+            low, high = math.exp(diff - half), math.exp(diff + half)
+        candidates.append(Candidate(names[i], numbers[i], samples[i],
+                                    medians[i], ratio, low, high,
+                                    i != best and not low <= 1.0 <= high,
+                                    dropped[i]))
+    candidates.sort(key=lambda c: c.per_loop)
+    return Comparison(candidates, rounds, time.perf_counter() - start,
+                      confidence)
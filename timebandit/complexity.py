@@ -0,0 +1,167 @@
+#! /usr/bin/env python3
+""" Input-size sweeps with empirical complexity fitting.
+
+    sweep() times a function at a range of input sizes.  The input for
+    each size is built by a generator function before timing starts, so
+    input construction is never part of the timed region.  The best
+    per-call times are then fitted against the models
+
+        O(1), O(log n), O(n), O(n log n), O(n^2)
+
+    as t(n) = a + b * g(n) by least squares on relative error (times at
+    different sizes span orders of magnitude).  The best fit is the
+    slowest-growing model that explains the data about as well as any
+    other; it is reported together with its constants, and
+    grows_faster_than() flags e.g. accidental quadratic behaviour.
+
+    Typical use:
+
+        result = sweep(sorted, lambda n: random.sample(range(n), n))
+        print(result.best)        # O(n log n): 12.1 nsec * n log n + ...
+
+    The same input object is passed to every call at a given size, so the
+    function should not mutate it.
+
+    Classes:
+
+        Fit
+        SweepResult
+
+    Functions:
+
+        sweep(func, make_input, sizes) -> SweepResult
+        fit(sizes, times, tolerance) -> list
+    """
+
+import functools
+import math
+import typing as t
+
+from timebandit.timeit import Timer, _loops_for, default_timer
+
+__all__ = ["Fit", "SweepResult", "sweep", "fit", "models"]
+
+default_sizes: t.Tuple[int, ...] = (16, 64, 256, 1024, 4096, 16384)
+# target duration of one timing trial at each size, in seconds
+default_trial_time: float = 0.01
+# relative slack given to slower-growing models when picking the best fit
+default_tolerance: float = 0.25
+
+# name -> g(n), in increasing order of growth
+models: t.Dict[str, t.Callable[[float], float]] = {
+    "O(1)": lambda n: 0.0,
+    "O(log n)": lambda n: math.log(n),
+    "O(n)": lambda n: n,
+    "O(n log n)": lambda n: n * math.log(n),
+    "O(n^2)": lambda n: n * n,
+}
+
+
+class Fit(t.NamedTuple):
+    """ One model fitted as t(n) = a + b * g(n), times in seconds.
+
+        - error: root-mean-square relative error of the fit
+        """
+    model: str
+    a: float
+    b: float
+    error: float
+
+    def predict(self, n: float) -> float:
+        return self.a + self.b * models[self.model](n)
+
+    def __str__(self) -> str:
+        term = self.model[2:-1]
+        if term == "1":
+            return "%s: %.4g sec (rms error %.1f%%)" % (
+                self.model, self.a, self.error * 100)
+        return "%s: %.4g sec * %s + %.4g sec (rms error %.1f%%)" % (
+            self.model, self.b, term, self.a, self.error * 100)
+
+
+class SweepResult(t.NamedTuple):
+    """ Per-call times by size and all model fits, best fit first. """
+    sizes: t.List[int]
+    times: t.List[float]
+    fits: t.List[Fit]
+
+    @property
+    def best(self) -> Fit:
+        return self.fits[0]
+
+    def grows_faster_than(self, model: str) -> bool:
+        """ Return True if the best fit grows faster than 'model'. """
+        order = list(models)
+        return order.index(self.best.model) > order.index(model)
+
+
+def _fit_model(name: str, sizes: t.Sequence[int],
+               times: t.Sequence[float]) -> Fit:
+    """ Weighted least squares of t = a + b * g(n), weights 1 / t**2. """
+    g = models[name]
+    xs = [g(n) for n in sizes]
+    ws = [1 / (y * y) for y in times]
+    sw = sum(ws)
+    if name == "O(1)":
+        a, b = sum(w * y for w, y in zip(ws, times)) / sw, 0.0
+    else:
+        sx = sum(w * x for w, x in zip(ws, xs))
+        sy = sum(w * y for w, y in zip(ws, times))
+        sxx = sum(w * x * x for w, x in zip(ws, xs))
+        sxy = sum(w * x * y for w, x, y in zip(ws, xs, times))
+        det = sw * sxx - sx * sx
+        if det <= 0:
+            return Fit(name, 0.0, 0.0, math.inf)
+        b = (sw * sxy - sx * sy) / det
+        a = (sy - b * sx) / sw
+        if b < 0:
+            # a shrinking cost is no better than the constant model
+            return Fit(name, a, b, math.inf)
+    error = math.sqrt(sum(((a + b * x) - y) ** 2 / (y * y)
+                          for x, y in zip(xs, times)) / len(times))
+    return Fit(name, a, b, error)
+
+
+def fit(sizes: t.Sequence[int], times: t.Sequence[float],
+        tolerance: float = default_tolerance) -> t.List[Fit]:
+    """ Fit every model to (sizes, times); return the fits, best first.
+
+        The best fit is the slowest-growing model whose error is within
+        'tolerance' (relative, plus a tenth of it in absolute terms) of
+        the smallest error, so timing noise does not promote a constant
+        cost to O(log n) or a linear one to O(n log n).  The remaining
+        fits follow in order of error.
+        """
+    if len(sizes) != len(times) or len(sizes) < 3:
+        raise ValueError("need at least three (size, time) pairs")
+    if min(sizes) < 1 or min(times) <= 0:
+        raise ValueError("sizes must be >= 1 and times positive")
+    fits = sorted((_fit_model(name, sizes, times) for name in models),
+                  key=lambda f: f.error)
+    limit = fits[0].error * (1 + tolerance) + tolerance / 10
+    best = next(f for f in sorted(fits, key=lambda f: list(models).index(
+        f.model)) if f.error <= limit)
+    return [best] + [f for f in fits if f is not best]
+
+
+def sweep(func: t.Callable, make_input: t.Callable[[int], t.Any],
+          sizes: t.Iterable[int] = default_sizes,
+          repeat: int = 3,
+          trial_time: float = default_trial_time,
+          timer: t.Callable = default_timer) -> SweepResult:
+    """ Time func(make_input(n)) for every n in 'sizes' and fit models.
+
+        make_input(n) is called once per size, outside the timed region.
+        At each size the loop count is chosen so one trial takes about
+        'trial_time' seconds, and the best of 'repeat' trials is kept as
+        the per-call time.
+        """
+    sizes = sorted(sizes)
+    times = []
+    for n in sizes:
+        arg = make_input(n)
+        tm = Timer(functools.partial(func, arg), timer=timer)
+        number = _loops_for(tm, trial_time)
+        times.append(min(tm.repeat(repeat, number)) / number)
+        del arg, tm
+    return SweepResult(sizes, times, fit(sizes, times))
@@ -0,0 +1,153 @@
+#! /usr/bin/env python3
+""" Log-bucketed latency histogram in the style of HdrHistogram.
+
+    Values are non-negative integers (nanoseconds, by convention).  Each
+    power of two is split into 2**(bits - 1) equal sub-buckets, so every
+    recorded value is kept to within a relative error of 2**(1 - bits)
+    (about 1.6% with the default of 7 bits) while the whole 64-bit range
+    fits in a few thousand counters.  Values below 2**bits are counted
+    exactly.
+
+    Histograms with the same 'bits' can be merged, which is how per-thread
+    and per-file histograms are combined.
+
+    Classes:
+
+        LogHistogram
+    """
+
+import typing as t
+from array import array
+from bisect import bisect_left, bisect_right
+
+__all__ = ["LogHistogram"]
+
+default_bits: int = 7
+
+
+class LogHistogram:
+    """ Counts of integer values in logarithmic buckets.
+
+        - bits: sub-bucket resolution; relative error is 2**(1 - bits)
+        """
+
+    __slots__ = ("bits", "counts", "total", "min", "max")
+
+    def __init__(self, bits: int = default_bits):
+        if not 1 < bits < 32:
+            raise ValueError("bits must be between 2 and 31")
+        self.bits = bits
+        half = 1 << (bits - 1)
+        self.counts = array("Q", bytes(8 * ((64 - bits) * half + 2 * half)))
+        self.total = 0
+        self.min: t.Optional[int] = None
+        self.max: t.Optional[int] = None
+
+    def index(self, value: int) -> int:
+        """ Return the bucket index of 'value'. """
+        shift = value.bit_length() - self.bits
+        if shift <= 0:
+            return value
+        return (shift << (self.bits - 1)) + (value >> shift)
+
+    def bounds(self, index: int) -> t.Tuple[int, int]:
+        """ Return the lowest and highest value counted in bucket 'index'. """
+        half = 1 << (self.bits - 1)
+        if index < 2 * half:
+            return index, index
+        shift = index // half - 1
+        low = (index - shift * half) << shift
+        return low, low + (1 << shift) - 1
+
+    def add(self, value: int, count: int = 1) -> None:
+        """ Record 'value' 'count' times. """
+        if value < 0:
+            raise ValueError("histogram values must not be negative")
+        self.counts[self.index(value)] += count
+        self.total += count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def update(self, values: t.Iterable[int]) -> None:
+        """ Record every non-negative value in 'values'.
+
+            The values are sorted first (in C) so that the Python loop
+            runs once per occupied bucket rather than once per value;
+            negative values are ignored.
+            """
+        values = sorted(values)
+        i = bisect_left(values, 0)
+        n = len(values)
+        if i == n:
+            return
+        counts = self.counts
+        if self.min is None or values[i] < self.min:
+            self.min = values[i]
+        if self.max is None or values[-1] > self.max:
+            self.max = values[-1]
+        self.total += n - i
+        while i < n:
+            index = self.index(values[i])
+            j = bisect_right(values, self.bounds(index)[1], i)
+            counts[index] += j - i
+            i = j
+
+    def merge(self, other: "LogHistogram") -> "LogHistogram":
+        """ Add the counts of 'other' to this histogram and return it. """
+        if other.bits != self.bits:
+            raise ValueError("cannot merge histograms of different bits")
+        if not other.total:
+            return self
+        counts = self.counts
+        for i, count in enumerate(other.counts):
+            if count:
+                counts[i] += count
+        self.total += other.total
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+        return self
+
+    def copy(self) -> "LogHistogram":
+        """ Return an independent copy of this histogram. """
+        new = LogHistogram(self.bits)
+        return new.merge(self)
+
+    def percentile(self, percent: float) -> int:
+        """ Return the value below which 'percent' % of values fall.
+
+            The result is the highest value equivalent to the bucket that
+            holds the requested rank, clipped to the recorded maximum.
+            Returns 0 for an empty histogram.
+            """
+        if not self.total:
+            return 0
+        rank = max(1, -(-self.total * percent // 100))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count:
+                seen += count
+                if seen >= rank:
+                    return min(self.bounds(i)[1], self.max)
+        return self.max
+
+    def mean(self) -> float:
+        """ Mean of the recorded values, using bucket midpoints. """
+        if not self.total:
+            return 0.0
+        acc = 0
+        for i, count in enumerate(self.counts):
+            if count:
+                low, high = self.bounds(i)
+                acc += count * (low + high) / 2
+        return acc / self.total
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __repr__(self) -> str:
+        return ("LogHistogram(total=%d, min=%s, max=%s)"
+                % (self.total, self.min, self.max))
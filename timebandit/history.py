@@ -0,0 +1,321 @@
+#! /usr/bin/env python3
+""" Persistent benchmark history with regression detection.
+
+    History keeps every recorded run in a SQLite file.  A run is keyed by
+    the benchmark name, a hash of the timed code (code_hash()), the
+    Python version and a fingerprint of the host (host_fingerprint()), and
+    holds the per-loop times of all its repetitions.
+
+    check() compares the latest run of a benchmark against a rolling
+    baseline: the runs before it with the same name, Python version and
+    host (the code hash is expected to change between runs and is only
+    reported).  Each run is summarized by the logarithm of its best
+    per-loop time; the latest run is a regression when it lies above the
+    one-sided prediction interval of the baseline runs *and* is more than
+    'threshold' slower than their geometric mean, so both run-to-run noise
+    and trivial differences are ignored.
+
+    Typical use:
+
+        with History() as history:
+            history.record("sort", Timer(func).repeat(), code=func)
+            if history.check("sort").regression:
+                ...
+
+    or from the command line: 'timebandit -S NAME stmt' records a run,
+    'timebandit history' lists runs and 'timebandit check' exits with
+    status 1 on a regression.
+
+    Classes:
+
+        History
+        Run
+        Check
+
+    Functions:
+
+        code_hash(*parts) -> str
+        host_fingerprint() -> str
+        python_version() -> str
+    """
+
+import functools
+import hashlib
+import math
+import os
+import platform
+import sqlite3
+import time
+import types
+import typing as t
+from array import array
+
+from timebandit.result import TimingResult
+from timebandit.stats import prediction_interval
+
+__all__ = ["History", "Run", "Check", "code_hash", "host_fingerprint",
+           "python_version", "default_history_path"]
+
+default_history_path: str = os.environ.get("TIMEBANDIT_HISTORY",
+                                           ".timebandit.sqlite")
+# number of earlier runs forming the rolling baseline
+default_baseline: int = 10
+default_confidence: float = 0.95
+# a regression must also be slower than the baseline by this fraction
+default_threshold: float = 0.05
+
+_schema = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    code_hash TEXT NOT NULL,
+    python TEXT NOT NULL,
+    host TEXT NOT NULL,
+    created REAL NOT NULL,
+    number INTEGER NOT NULL,
+    samples BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_key ON runs (name, python, host, id);
+"""
+
+
+def _names(code: types.CodeType) -> t.Iterator[str]:
+    """ Global names used by 'code' and the code nested in it. """
+    yield from code.co_names
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            yield from _names(const)
+
+
+def _feed(h, obj: t.Any, seen: t.Set[int]) -> None:
+    """ Add 'obj' to hash 'h', following functions into their code,
+        defaults, closures and the module-level functions they call.
+        """
+    if isinstance(obj, types.CodeType):
+        h.update(obj.co_code)
+        h.update(repr((obj.co_names, obj.co_varnames)).encode())
+        for const in obj.co_consts:
+            _feed(h, const, seen)
+    elif isinstance(obj, functools.partial):
+        for part in (obj.func, obj.args, obj.keywords):
+            _feed(h, part, seen)
+    elif isinstance(obj, (types.FunctionType, types.MethodType)):
+        func = getattr(obj, "__func__", obj)
+        if id(func) in seen:
+            h.update(func.__qualname__.encode())
+            return
+        seen.add(id(func))
+        _feed(h, func.__code__, seen)
+        _feed(h, (func.__defaults__, func.__kwdefaults__), seen)
+        for cell in func.__closure__ or ():
+            try:
+                _feed(h, cell.cell_contents, seen)
+            except ValueError:  # empty cell
+                pass
+        for name in sorted(set(_names(func.__code__))):
+            value = func.__globals__.get(name)
+            if (isinstance(value, types.FunctionType)
+                    and value.__module__ == func.__module__):
+                _feed(h, value, seen)
+    elif isinstance(obj, (tuple, list)):
+        h.update(b"(")
+        for item in obj:
+            _feed(h, item, seen)
+        h.update(b")")
+    elif isinstance(obj, dict):
+        _feed(h, sorted(obj.items(), key=repr), seen)
+    elif callable(obj) and not isinstance(obj, (str, type)):
+        h.update(("%s.%s" % (getattr(obj, "__module__", None),
+                             getattr(obj, "__qualname__", repr(obj))))
+                 .encode())
+    else:
+        h.update(repr(obj).encode())
+
+
+def code_hash(*parts: t.Any) -> str:
+    """ Return a short hex digest of the timed code.
+
+        Functions are hashed by their bytecode, names and constants
+        (nested code included), their defaults, the values in their
+        closure and, recursively, the functions of their own module that
+        they reference, so editing any of these changes the hash but
+        moving the function does not.  functools.partial objects are
+        hashed by function and arguments, other callables by qualified
+        name, and strings and other values by repr() (an object whose
+        repr() shows its address hashes differently in every process).
+        """
+    h = hashlib.sha256()
+    seen: t.Set[int] = set()
+    for part in parts:
+        _feed(h, part, seen)
+    return h.hexdigest()[:16]
+
+
+def python_version() -> str:
+    """ Return e.g. 'CPython 3.11.4'. """
+    return "%s %s" % (platform.python_implementation(),
+                      platform.python_version())
+
+
+def host_fingerprint() -> str:
+    """ Return a short digest of the host name, machine and CPU count. """
+    host = (platform.node(), platform.system(), platform.machine(),
+            platform.processor(), os.cpu_count())
+    return hashlib.sha256(repr(host).encode()).hexdigest()[:12]
+
+
+class Run(t.NamedTuple):
+    """ One recorded run; 'samples' are per-loop times in seconds. """
+    id: int
+    name: str
+    code_hash: str
+    python: str
+    host: str
+    created: float
+    number: int
+    samples: TimingResult
+
+    @property
+    def best(self) -> float:
+        return self.samples.min()
+
+
+class Check(t.NamedTuple):
+    """ Latest run of a benchmark compared to its rolling baseline.
+
+        - latest: the run being checked
+        - baseline: number of earlier runs compared against
+        - ratio: best time of 'latest' over the baseline's geometric mean
+        - limit: ratio above which 'latest' falls outside the prediction
+            interval of the baseline (inf with fewer than two runs)
+        - regression: ratio above both 'limit' and 1 + threshold
+        - code_changed: the baseline contains a different code hash
+        """
+    name: str
+    latest: Run
+    baseline: int
+    ratio: float
+    limit: float
+    regression: bool
+    code_changed: bool
+
+
+class History:
+    """ SQLite store of benchmark runs; usable as a context manager. """
+
+    def __init__(self, path: str = None):
+        self.path = path or default_history_path
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(_schema)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "History":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def record(self, name: str, result: t.Sequence[float], number: int = None,
+               code: t.Any = None) -> int:
+        """ Store a run and return its id.
+
+            'result' holds the times of the repetitions; a TimingResult is
+            converted to per-loop times using its own 'number', anything
+            else is divided by 'number' (default 1).  'code' is what
+            identifies the timed code for code_hash() (a function, a
+            statement string or a tuple of them); it defaults to 'name'.
+            """
+        if isinstance(result, TimingResult):
+            number = result.number
+            samples = array("d", result.per_loop())
+        else:
+            number = number or 1
+            samples = array("d", (dt / number for dt in result))
+        if not samples:
+            raise ValueError("no samples")
+        parts = code if isinstance(code, tuple) else (
+            name if code is None else code,)
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (name, code_hash, python, host, created,"
+                " number, samples) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, code_hash(*parts), python_version(),
+                 host_fingerprint(), time.time(), number,
+                 samples.tobytes()))
+        return cursor.lastrowid
+
+    def _run(self, row: tuple) -> Run:
+        samples = array("d")
+        samples.frombytes(row[7])
+        return Run(*row[:7], TimingResult(samples, 1, backend="array"))
+
+    def names(self) -> t.List[str]:
+        """ Return the names of all recorded benchmarks, sorted. """
+        return [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT name FROM runs ORDER BY name")]
+
+    def runs(self, name: str, limit: int = None, python: str = None,
+             host: str = None, before: int = None) -> t.List[Run]:
+        """ Return runs of 'name', newest first.
+
+            'python' and 'host' restrict the runs to one Python version
+            and host fingerprint, 'before' to runs older than that id.
+            """
+        query = ("SELECT id, name, code_hash, python, host, created, number,"
+                 " samples FROM runs WHERE name = ?")
+        params: t.List[t.Any] = [name]
+        for column, value in (("python", python), ("host", host)):
+            if value is not None:
+                query += " AND %s = ?" % column
+                params.append(value)
+        if before is not None:
+            query += " AND id < ?"
+            params.append(before)
+        query += " ORDER BY id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [self._run(row)
+                for row in self.connection.execute(query, params)]
+
+    def check(self, name: str, baseline: int = default_baseline,
+              confidence: float = default_confidence,
+              threshold: float = default_threshold) -> Check:
+        """ Compare the latest run of 'name' with up to 'baseline' earlier
+            runs on the same Python version and host.
+
+            Runs whose best time is 0 (below the clock's resolution) have
+            no place on the log scale: they are left out of the baseline,
+            and a latest run of 0 is reported with ratio 0, never as a
+            regression.  Raises KeyError if 'name' has no runs.
+            """
+        latest = self.runs(name, 1)
+        if not latest:
+            raise KeyError(name)
+        latest = latest[0]
+        base = [run for run in self.runs(name, baseline, latest.python,
+                                         latest.host, before=latest.id)
+                if run.best > 0]
+        if not base:
+            return Check(name, latest, 0, 1.0, math.inf, False, False)
+        changed = any(run.code_hash != latest.code_hash for run in base)
+        if latest.best <= 0:
+            return Check(name, latest, len(base), 0.0, math.inf, False,
+                         changed)
+        logs = [math.log(run.best) for run in base]
+        # a two-sided interval at 2c - 1 has its upper end at the one-sided
+        # 'confidence' quantile
+        mean, half = prediction_interval(logs, 2 * confidence - 1)
+        ratio = math.exp(math.log(latest.best) - mean)
+        limit = math.exp(half)
+        return Check(name, latest, len(base), ratio, limit,
+                     ratio > limit and ratio > 1 + threshold, changed)
+
+    def check_all(self, baseline: int = default_baseline,
+                  confidence: float = default_confidence,
+                  threshold: float = default_threshold) -> t.List[Check]:
+        """ Return check() of every recorded benchmark. """
+        return [self.check(name, baseline, confidence, threshold)
+                for name in self.names()]
@@ -0,0 +1,110 @@
+#! /usr/bin/env python3
+""" Instrumentation hooks for timing events.
+
+    Events and the arguments their hooks receive:
+
+    - on_timer_created(timer): a Timer (or subclass) was constructed
+    - on_trial(timer, number, seconds): Timer.timeit() timed 'number'
+      loops (cached results are not trials)
+    - on_repeat_done(timer, result): Timer.repeat() returns 'result'
+
+    Each event is a plain list of callables.  The call sites test the
+    list before building any arguments, so an event without hooks costs
+    one truth test and nothing is formatted or logged.  Hooks run in the
+    timing thread between trials, never inside the timed loop; an
+    exception in a hook propagates to the caller.
+
+    Typical use:
+
+        from timebandit import hooks
+
+        @hooks.register("on_trial")
+        def trace(timer, number, seconds):
+            print(timer.func, number, seconds)
+
+        hooks.use_loguru()      # or log every event with loguru
+
+    Functions:
+
+        register(event, hook) -> hook
+        unregister(event, hook)
+        clear(event)
+        emit(hooks, *args)
+        use_loguru(level) -> list
+    """
+
+import typing as t
+
+__all__ = ["on_timer_created", "on_trial", "on_repeat_done", "events",
+           "register", "unregister", "clear", "emit", "use_loguru"]
+
+on_timer_created: t.List[t.Callable[..., None]] = []
+on_trial: t.List[t.Callable[..., None]] = []
+on_repeat_done: t.List[t.Callable[..., None]] = []
+
+events: t.Dict[str, t.List[t.Callable[..., None]]] = {
+    "on_timer_created": on_timer_created,
+    "on_trial": on_trial,
+    "on_repeat_done": on_repeat_done,
+}
+
+
+def _event(name: str) -> t.List[t.Callable[..., None]]:
+    try:
+        return events[name]
+    except KeyError:
+        raise ValueError("unknown event %r; expected one of %s"
+                         % (name, ", ".join(events))) from None
+
+
+def register(event: str, hook: t.Callable = None):
+    """ Add 'hook' to 'event' and return it; without 'hook', return a
+        decorator that does so.
+        """
+    if hook is None:
+        return lambda hook: register(event, hook)
+    _event(event).append(hook)
+    return hook
+
+
+def unregister(event: str, hook: t.Callable) -> None:
+    """ Remove 'hook' from 'event'; ValueError if it is not registered. """
+    _event(event).remove(hook)
+
+
+def clear(event: str = None) -> None:
+    """ Remove every hook of 'event', or of all events. """
+    for name in [event] if event else list(events):
+        del _event(name)[:]
+
+
+def emit(hooks: t.List[t.Callable[..., None]], *args: t.Any) -> None:
+    """ Call every hook in 'hooks' with 'args'. """
+    for hook in tuple(hooks):
+        hook(*args)
+
+
+def use_loguru(level: str = "DEBUG") -> t.List[t.Tuple[str, t.Callable]]:
+    """ Log every event through loguru at 'level'.
+
+        Returns the (event, hook) pairs registered, for unregister().
+        Requires loguru.
+        """
+    from loguru import logger
+
+    def created(timer) -> None:
+        logger.log(level, "timer created: func={!r} setup={!r} timer={!r}",
+                   timer.func, timer.setup, timer.timer)
+
+    def trial(timer, number, seconds) -> None:
+        logger.log(level, "trial: func={!r} number={} seconds={}",
+                   timer.func, number, seconds)
+
+    def repeat_done(timer, result) -> None:
+        logger.log(level, "repeat done: func={!r} {!r}", timer.func, result)
+
+    pairs = [("on_timer_created", created), ("on_trial", trial),
+             ("on_repeat_done", repeat_done)]
+    for event, hook in pairs:
+        register(event, hook)
+    return pairs
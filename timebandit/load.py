@@ -0,0 +1,174 @@
+#! /usr/bin/env python3
+""" Open-loop, fixed-rate load generation.
+
+    Every Timer mode is closed-loop: the next call starts only when the
+    previous one has returned, so a slow call delays the calls behind it
+    and they are never measured as slow.  Under sustained load this
+    "coordinated omission" hides exactly the queueing a service sees.
+
+    load() instead fixes the schedule in advance: call i is due at
+    start + i / rate.  A pool of worker threads takes the calls in order,
+    waits for each one's due time if it is early, and records
+
+    - latency: from the *intended* start to the end of the call, which
+      includes any time the call spent waiting for a free worker
+      (the coordinated-omission correction);
+    - service time: from the actual start to the end of the call.
+
+    Past saturation the latency percentiles grow with the backlog while
+    the service time stays flat, which reproduces what clients of an
+    overloaded service observe.  Latencies are kept in LogHistograms, so
+    memory use does not grow with the number of calls.
+
+    Typical use:
+
+        result = load(handler, rate=500, duration=10, workers=8)
+        print(result.throughput, result.percentiles())
+
+    Classes:
+
+        LoadResult
+
+    Functions:
+
+        load(func, rate, duration, ...) -> LoadResult
+    """
+
+import itertools
+import threading
+import time
+import typing as t
+
+from timebandit.histogram import LogHistogram, default_bits
+
+__all__ = ["LoadResult", "load"]
+
+default_workers: int = 8
+default_percentiles: t.Tuple[float, ...] = (50, 90, 99, 99.9)
+
+
+class LoadResult(t.NamedTuple):
+    """ Outcome of a load run; histograms hold nanoseconds.
+
+        - rate: target calls per second
+        - duration, workers: the run settings
+        - scheduled: calls due during the run (rate * duration)
+        - completed: calls that returned (errors included)
+        - errors: calls that raised
+        - elapsed: seconds from the start to the last call's return
+        - late: calls started more than one interval behind schedule
+        - latency: intended start to end of each call (corrected)
+        - service: actual start to end of each call
+        """
+    rate: float
+    duration: float
+    workers: int
+    scheduled: int
+    completed: int
+    errors: int
+    elapsed: float
+    late: int
+    latency: LogHistogram
+    service: LogHistogram
+
+    @property
+    def throughput(self) -> float:
+        """ Completed calls per second. """
+        return self.completed / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def dropped(self) -> int:
+        """ Scheduled calls never started because the run ended first. """
+        return self.scheduled - self.completed
+
+    @property
+    def saturated(self) -> bool:
+        """ True if the workers fell behind the schedule. """
+        return self.late > 0 and self.throughput < 0.95 * self.rate
+
+    def percentiles(self, percents: t.Iterable[float] = default_percentiles,
+                    service: bool = False) -> t.Dict[float, float]:
+        """ Return {percent: seconds} of the corrected latency (or of the
+            service time).
+            """
+        h = self.service if service else self.latency
+        return {p: h.percentile(p) * 1e-9 for p in percents}
+
+
+def load(func: t.Callable, rate: float, duration: float,
+         workers: int = default_workers,
+         setup: t.Callable = None,
+         args: tuple = (),
+         bits: int = default_bits) -> LoadResult:
+    """ Call func(*args) 'rate' times per second for 'duration' seconds
+        from 'workers' threads, open-loop, and return a LoadResult.
+
+        'setup' is called once before the schedule starts.  Calls that
+        raise are counted in 'errors' and still timed.  No call is
+        started once 'duration' has passed, so calls still queued behind
+        the schedule at that point are dropped (see LoadResult.dropped).
+        """
+    if rate <= 0 or duration <= 0:
+        raise ValueError("rate and duration must be positive")
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if setup is not None:
+        setup()
+    clock = time.perf_counter_ns
+    interval = round(1e9 / rate)
+    calls = int(duration * rate)
+    ticket = itertools.count().__next__
+    lock = threading.Lock()
+    latencies: t.List[LogHistogram] = []
+    services: t.List[LogHistogram] = []
+    counts = [0, 0, 0]  # completed, errors, late
+    ends = [0]
+
+    def worker(start: int) -> None:
+        latency, service = LogHistogram(bits), LogHistogram(bits)
+        completed = errors = late = 0
+        end = start
+        while True:
+            i = ticket()
+            if i >= calls:
+                break
+            intended = start + i * interval
+            now = clock()
+            if now < intended:
+                time.sleep((intended - now) * 1e-9)
+                now = clock()
+            elif now - intended > interval:
+                late += 1
+            if now - start >= duration * 1e9:
+                break
+            try:
+                func(*args)
+            except Exception:
+                errors += 1
+            end = clock()
+            latency.add(end - intended)
+            service.add(end - now)
+            completed += 1
+        with lock:
+            latencies.append(latency)
+            services.append(service)
+            counts[0] += completed
+            counts[1] += errors
+            counts[2] += late
+            ends[0] = max(ends[0], end)
+
+    start = clock()
+    threads = [threading.Thread(target=worker, args=(start,), daemon=True,
+                                name="timebandit-load-%d" % n)
+               for n in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latency, service = LogHistogram(bits), LogHistogram(bits)
+    for h in latencies:
+        latency.merge(h)
+    for h in services:
+        service.merge(h)
+    return LoadResult(rate, duration, workers, calls, counts[0], counts[1],
+                      (ends[0] - start) * 1e-9, counts[2], latency, service)
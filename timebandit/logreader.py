@@ -0,0 +1,180 @@
+#! /usr/bin/env python3
+""" Streaming reader for loguru timing logs.
+
+    Log files are memory-mapped and parsed lazily in a generator
+    pipeline:
+
+        lines -> records -> timings -> per-key LogHistogram
+
+    so multi-GB files are processed with bounded memory: only one line is
+    decoded at a time and each key holds a fixed-size histogram.  Lines
+    are expected in loguru's default format:
+
+        2020-09-01 12:00:00.000 | INFO     | module:function:42 - message
+
+    A record counts as a timing when its message contains a duration
+    such as '1.5 msec' or '250 ns' (the units printed by the timebandit
+    CLI, plus their short forms).  The duration is aggregated under the
+    record's 'module:function' location unless a 'key' function says
+    otherwise.
+
+    The reader remembers the byte offset just past the last complete line
+    it consumed; save() and load() persist it so a later run only reads
+    lines appended since.  A file that shrank below the saved offset is
+    assumed to have been rotated and is read again from the start.
+
+    Classes:
+
+        LogRecord
+        LogReader
+    """
+
+import json
+import mmap
+import os
+import re
+import typing as t
+from pathlib import Path
+
+from timebandit.histogram import LogHistogram, default_bits
+
+__all__ = ["LogRecord", "LogReader", "parse_duration"]
+
+# key under which timings are counted once 'max_keys' keys exist
+overflow_key: str = "<other>"
+
+_record_re = re.compile(
+    rb"^(?P<time>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d(?:\.\d+)?)\s*\|\s*"
+    rb"(?P<level>\w+)\s*\|\s*"
+    rb"(?P<name>[^:\s]+):(?P<function>[^:\s]+):(?P<line>\d+) - "
+    rb"(?P<message>.*?)\r?$")
+
+_duration_re = re.compile(
+    r"(?P<value>\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)\s*"
+    r"(?P<unit>nsec|usec|msec|sec|ns|us|\u00b5s|ms|s)\b")
+
+_unit_ns = {"nsec": 1, "ns": 1,
+            "usec": 1000, "us": 1000, "\u00b5s": 1000,
+            "msec": 1000000, "ms": 1000000,
+            "sec": 1000000000, "s": 1000000000}
+
+
+class LogRecord(t.NamedTuple):
+    """ One parsed log line and the byte offset just past it. """
+    time: str
+    level: str
+    name: str
+    function: str
+    line: int
+    message: str
+    offset: int
+
+    @property
+    def location(self) -> str:
+        return "%s:%s" % (self.name, self.function)
+
+
+def parse_duration(message: str) -> t.Optional[int]:
+    """ Return the first duration in 'message' in nanoseconds, or None. """
+    match = _duration_re.search(message)
+    if match is None:
+        return None
+    return int(float(match["value"]) * _unit_ns[match["unit"]])
+
+
+class LogReader:
+    """ Incremental reader of one loguru log file.
+
+        - path: the log file
+        - offset: byte offset to start reading at (default 0)
+        - key: function mapping a LogRecord to its aggregation key
+            (default: the record's 'module:function' location)
+        - max_keys: at most this many keys get their own histogram;
+            timings of further keys are counted under '<other>'
+        - bits: histogram resolution (see timebandit.histogram)
+        """
+
+    def __init__(self, path: t.Union[str, Path], offset: int = 0,
+                 key: t.Callable[[LogRecord], str] = None,
+                 max_keys: int = 10000, bits: int = default_bits):
+        self.path = Path(path)
+        self.offset = offset
+        self.key = key or (lambda record: record.location)
+        self.max_keys = max_keys
+        self.bits = bits
+        self.histograms: t.Dict[str, LogHistogram] = {}
+
+    def lines(self) -> t.Iterator[t.Tuple[bytes, int]]:
+        """ Yield (line, end_offset) for every complete new line.
+
+            'self.offset' advances as lines are consumed, so stopping the
+            iteration early loses nothing.
+            """
+        with self.path.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < self.offset:
+                self.offset = 0
+            if size == self.offset:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = self.offset
+                while True:
+                    end = mm.find(b"\n", pos)
+                    if end < 0:
+                        return
+                    line = mm[pos:end]
+                    pos = end + 1
+                    self.offset = pos
+                    yield line, pos
+
+    def records(self) -> t.Iterator[LogRecord]:
+        """ Yield a LogRecord for every new line in loguru format.
+
+            Continuation lines (tracebacks, multi-line messages) are
+            skipped.
+            """
+        match = _record_re.match
+        for line, offset in self.lines():
+            m = match(line)
+            if m is None:
+                continue
+            yield LogRecord(m["time"].decode(), m["level"].decode(),
+                            m["name"].decode(), m["function"].decode(),
+                            int(m["line"]),
+                            m["message"].decode("utf-8", "replace"), offset)
+
+    def timings(self) -> t.Iterator[t.Tuple[str, int]]:
+        """ Yield (key, nanoseconds) for every new record with a duration. """
+        key = self.key
+        for record in self.records():
+            ns = parse_duration(record.message)
+            if ns is not None:
+                yield key(record), ns
+
+    def aggregate(self) -> t.Dict[str, LogHistogram]:
+        """ Fold all new timings into the per-key histograms.
+
+            Returns 'self.histograms', which keeps growing across calls.
+            """
+        histograms = self.histograms
+        for key, ns in self.timings():
+            histogram = histograms.get(key)
+            if histogram is None:
+                if len(histograms) >= self.max_keys:
+                    key = overflow_key
+                histogram = histograms.setdefault(key,
+                                                  LogHistogram(self.bits))
+            histogram.add(ns)
+        return histograms
+
+    def save(self, state: t.Union[str, Path]) -> None:
+        """ Write the current offset of this reader to the JSON file 'state'.
+            """
+        Path(state).write_text(json.dumps({"path": str(self.path),
+                                           "offset": self.offset}))
+
+    @classmethod
+    def load(cls, state: t.Union[str, Path], **kwargs) -> "LogReader":
+        """ Return a reader resuming at the offset saved in 'state'. """
+        data = json.loads(Path(state).read_text())
+        return cls(data["path"], data["offset"], **kwargs)
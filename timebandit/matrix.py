@@ -0,0 +1,298 @@
+#! /usr/bin/env python3
+""" Run the same benchmarks under several Python interpreters.
+
+    Comparing CPython builds (minor versions, debug and release builds,
+    free-threaded and GIL builds) means timing identical code under each
+    of them.  run() takes a list of interpreter paths and a list of suite
+    benchmarks (see timebandit.suite.discover) and times every benchmark
+    under every interpreter with Timer.repeat().
+
+    The work is spread over 'jobs' slots, one per CPU.  A slot starts one
+    long-lived worker per interpreter ('python -m timebandit.matrix
+    --worker CPU'), pinned to the slot's CPU, and talks to it over its
+    stdin and stdout pipes in JSON lines:
+
+    - the worker first writes a hello: {"python", "executable", "debug",
+      "free_threaded", "cpu"};
+    - each request line {"file", "name", "number", "repeat"} is answered
+      by one result line {"number", "times", "best", "median"} (per-loop
+      seconds) or {"error"};
+    - the worker exits when its stdin is closed.
+
+    Anything the benchmarks print goes to the worker's stderr.  A worker
+    imports each benchmark file once and runs the benchmarks given to it
+    one after another, so unlike 'timebandit run' benchmarks of one file
+    share a process.  Slots pick (interpreter, benchmark) pairs in an
+    order that interleaves the interpreters, so all of them are timed
+    under similar machine load.
+
+    Matrix.table() lays the results out side by side, with the speed of
+    each interpreter relative to the first one.
+
+    From the command line:
+
+        timebandit matrix -p PYTHON [-p PYTHON...] [-j N] [-n N] path...
+
+    Classes:
+
+        Interpreter
+        Matrix
+
+    Functions:
+
+        run(interpreters, benchmarks, ...) -> Matrix
+    """
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+from timebandit.result import format_time
+
+__all__ = ["Interpreter", "Matrix", "run"]
+
+
+class Interpreter(t.NamedTuple):
+    """ An interpreter as described by its worker's hello. """
+    path: str
+    python: str
+    debug: bool
+    free_threaded: bool
+
+    @property
+    def label(self) -> str:
+        """ E.g. 'CPython 3.13.0 debug'. """
+        return " ".join([self.python] + ["debug"] * self.debug
+                        + ["free-threaded"] * self.free_threaded)
+
+
+class Matrix(t.NamedTuple):
+    """ Results of run().
+
+        - interpreters: the Interpreters, in the order given
+        - benchmarks: the suite Benchmarks, in the order given
+        - results: {(benchmark id, interpreter index): result dict}, as
+          the worker answered (plus 'elapsed')
+        """
+    interpreters: t.List[Interpreter]
+    benchmarks: t.List[t.Any]
+    results: t.Dict[t.Tuple[str, int], t.Dict[str, t.Any]]
+
+    @property
+    def failed(self) -> bool:
+        return any("error" in r for r in self.results.values())
+
+    def speedup(self, bench_id: str, index: int,
+                baseline: int = 0) -> t.Optional[float]:
+        """ Best time under 'baseline' over best time under 'index'
+            (above 1: faster than the baseline), or None.
+            """
+        base = self.results.get((bench_id, baseline), {}).get("best")
+        best = self.results.get((bench_id, index), {}).get("best")
+        return base / best if base and best else None
+
+    def table(self, time_unit: str = None, precision: int = 3) -> str:
+        """ Return a text table: one row per benchmark, one column per
+            interpreter holding the best per-loop time and the speedup
+            relative to the first interpreter, then a key of the columns.
+            """
+        labels = ["[%d]" % (i + 1) for i in range(len(self.interpreters))]
+        rows = [["benchmark"] + labels]
+        for bench in self.benchmarks:
+            row = [bench.id]
+            for i in range(len(self.interpreters)):
+                result = self.results.get((bench.id, i), {})
+                if "best" not in result:
+                    row.append("error" if "error" in result else "-")
+                    continue
+                cell = format_time(result["best"], time_unit, precision)
+                ratio = self.speedup(bench.id, i)
+                row.append(cell if ratio is None
+                           else "%s %5.2fx" % (cell, ratio))
+            rows.append(row)
+        widths = [max(len(row[c]) for row in rows)
+                  for c in range(len(rows[0]))]
+        lines = ["  ".join(cell.ljust(w) if c == 0 else cell.rjust(w)
+                           for c, (cell, w) in enumerate(zip(row, widths)))
+                 .rstrip() for row in rows]
+        lines.append("")
+        lines.extend("%s %s (%s)" % (label, interp.label, interp.path)
+                     for label, interp in zip(labels, self.interpreters))
+        return "\n".join(lines)
+
+
+class _Worker:
+    """ Parent side of one worker process. """
+
+    def __init__(self, python: str, cpu: t.Optional[int],
+                 env: t.Dict[str, str]):
+        self.proc = subprocess.Popen(
+            [python, "-m", "timebandit.matrix", "--worker",
+             "" if cpu is None else str(cpu)],
+            env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, universal_newlines=True, bufsize=1)
+        # drain stderr so benchmark output cannot fill the pipe
+        self.stderr: t.List[str] = []
+        self._drain = threading.Thread(target=self._read_stderr, daemon=True)
+        self._drain.start()
+        self.hello = self._receive()
+
+    def _read_stderr(self) -> None:
+        for line in self.proc.stderr:
+            self.stderr.append(line)
+
+    def _receive(self) -> t.Dict[str, t.Any]:
+        line = self.proc.stdout.readline()
+        if not line:
+            self.proc.wait()
+            self._drain.join()
+            err = "".join(self.stderr).strip().splitlines()
+            raise RuntimeError(err[-1] if err else
+                               "worker exited with status %d"
+                               % self.proc.returncode)
+        return json.loads(line)
+
+    def request(self, **message: t.Any) -> t.Dict[str, t.Any]:
+        self.proc.stdin.write(json.dumps(message) + "\n")
+        self.proc.stdin.flush()
+        return self._receive()
+
+    def close(self) -> None:
+        self.proc.stdin.close()
+        self.proc.wait()
+        self.proc.stdout.close()
+        self._drain.join()
+        self.proc.stderr.close()
+
+
+def run(interpreters: t.Sequence[str], benchmarks: t.Sequence[t.Any],
+        jobs: int = None, number: int = 0, repeat: int = 5,
+        callback: t.Callable[[t.Any, int, t.Dict[str, t.Any]], None] = None
+        ) -> Matrix:
+    """ Time every benchmark under every interpreter; return a Matrix.
+
+        'jobs' slots run at a time (default: one per available CPU); with
+        more than one, each slot's workers are pinned to its own CPU.
+        'number' 0 lets each interpreter pick its loop count with
+        Timer.autorange().  'callback' is called with (benchmark,
+        interpreter index, result) as results arrive.  Raises
+        RuntimeError if an interpreter cannot start a worker (for
+        example because it cannot import timebandit).
+        """
+    import time
+    from timebandit.parallel import available_cpus
+    from timebandit.suite import _environment
+    if not interpreters:
+        raise ValueError("no interpreters given")
+    cpus = available_cpus()
+    jobs = max(1, min(jobs or len(cpus), len(cpus)))
+    env = _environment()
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (os.path.abspath(os.curdir), env["PYTHONPATH"]) if p)
+
+    # start one worker per interpreter first: fails fast on a broken one
+    described: t.List[Interpreter] = []
+    for python in interpreters:
+        try:
+            worker = _Worker(python, None, env)
+        except (OSError, RuntimeError) as err:
+            raise RuntimeError("%s: %s" % (python, err)) from err
+        worker.close()
+        described.append(Interpreter(python, worker.hello["python"],
+                                     worker.hello["debug"],
+                                     worker.hello["free_threaded"]))
+
+    pending = [(bench, i) for bench in benchmarks
+               for i in range(len(interpreters))]
+    lock = threading.Lock()
+    results: t.Dict[t.Tuple[str, int], t.Dict[str, t.Any]] = {}
+
+    def slot(cpu: t.Optional[int]) -> None:
+        workers: t.Dict[int, _Worker] = {}
+        try:
+            while True:
+                with lock:
+                    if not pending:
+                        return
+                    bench, i = pending.pop(0)
+                start = time.perf_counter()
+                try:
+                    if i not in workers:
+                        workers[i] = _Worker(interpreters[i], cpu, env)
+                    result = workers[i].request(file=bench.file,
+                                                name=bench.name,
+                                                number=number, repeat=repeat)
+                except (OSError, RuntimeError) as err:
+                    workers.pop(i, None)
+                    result = {"error": str(err)}
+                result["elapsed"] = time.perf_counter() - start
+                with lock:
+                    results[bench.id, i] = result
+                    if callback is not None:
+                        callback(bench, i, result)
+        finally:
+            for worker in workers.values():
+                worker.close()
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for future in [executor.submit(slot, cpu if jobs > 1 else None)
+                       for cpu in cpus[:jobs]]:
+            future.result()
+    return Matrix(described, list(benchmarks), results)
+
+
+def _worker_main(argv: t.List[str]) -> int:
+    """ Answer benchmark requests on stdin; see the module docstring. """
+    import importlib.util
+    import sysconfig
+    from timebandit.history import python_version
+    from timebandit.parallel import pin_to_cpu
+    from timebandit.timeit import Timer
+
+    cpu = int(argv[0]) if argv and argv[0] else None
+    if cpu is not None and not pin_to_cpu(cpu):
+        cpu = None
+    out, sys.stdout = sys.stdout, sys.stderr
+    modules: t.Dict[str, t.Any] = {}
+
+    def send(message: t.Dict[str, t.Any]) -> None:
+        out.write(json.dumps(message) + "\n")
+        out.flush()
+
+    send({"python": python_version(), "executable": sys.executable,
+          "debug": hasattr(sys, "gettotalrefcount"),
+          "free_threaded": bool(sysconfig.get_config_var("Py_GIL_DISABLED")),
+          "cpu": cpu})
+    for line in sys.stdin:
+        request = json.loads(line)
+        path = os.path.abspath(request["file"])
+        try:
+            if path not in modules:
+                sys.path.insert(0, os.path.dirname(path))
+                spec = importlib.util.spec_from_file_location(
+                    "_bench_%d" % len(modules), path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                modules[path] = module
+            timer = Timer(getattr(modules[path], request["name"]))
+            number = request["number"]
+            if number <= 0:
+                number, _ = timer.autorange()
+            times = timer.repeat(request["repeat"], number).per_loop()
+        except Exception as exc:
+            send({"error": "%s: %s" % (type(exc).__name__, exc)})
+            continue
+        send({"number": number, "times": list(times), "best": times.min(),
+              "median": times.median()})
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--worker"]:
+        sys.exit(_worker_main(sys.argv[2:]))
+    from timebandit._cli import main
+    sys.exit(main(["matrix"] + sys.argv[1:]))
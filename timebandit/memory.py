@@ -0,0 +1,139 @@
+#! /usr/bin/env python3
+""" Allocation and memory profiling alongside timing.
+
+    Timer.timeit() turns GC off and reports elapsed time only, which
+    hides the allocation churn behind many latency spikes.  measure()
+    runs a separate, untimed pass of the same compiled template with
+    tracemalloc tracing and GC enabled, and records:
+
+    - the bytes allocated by each call, taken as the peak of traced
+      memory during the call above the level at its start (so memory
+      allocated and freed inside the call is counted);
+    - the peak of traced memory over the whole pass;
+    - the bytes still held after the pass, per call;
+    - the number of collections of each GC generation, counted with a
+      gc.callbacks hook.
+
+    The per-call figures come from the per-call sample template driven by
+    a "clock" that reads tracemalloc instead of time, so setup and
+    argument pools behave exactly as in the timing pass; what the clock
+    itself allocates is measured around an empty statement and
+    subtracted.  Tracing is never active while anything is being timed.
+
+    Classes:
+
+        MemoryStats
+
+    Functions:
+
+        measure(timer, number) -> MemoryStats
+    """
+
+import gc
+import statistics
+import tracemalloc
+import typing as t
+from array import array
+
+__all__ = ["MemoryStats", "measure"]
+
+# calls traced per memory pass at most; tracing costs microseconds a call
+default_memory_number: int = 10000
+
+
+class MemoryStats(t.NamedTuple):
+    """ Memory behaviour of one traced pass.
+
+        - number: calls traced
+        - allocated_per_call: mean bytes allocated per call
+        - max_allocated: most bytes allocated by a single call
+        - peak: peak traced memory during the pass, above its start
+        - retained_per_call: bytes still held after the pass, per call
+        - collections: GC collections run, per generation (0, 1, 2)
+        """
+    number: int
+    allocated_per_call: float
+    max_allocated: float
+    peak: int
+    retained_per_call: float
+    collections: t.Tuple[int, int, int]
+
+
+def _memory_clock(high: t.List[int]) -> t.Callable[[], int]:
+    """ Return a 'timer' for the sample template that measures memory.
+
+        Calls alternate: the first of each pair resets the traced peak and
+        returns the current traced size, the second returns the peak, so
+        'second - first' is the high-water allocation of the call between
+        them.  The highest peak seen is kept in high[0].  Without
+        tracemalloc.reset_peak() (Python < 3.9) only the net change of
+        each call is seen.
+        """
+    get = tracemalloc.get_traced_memory
+    reset = getattr(tracemalloc, "reset_peak", None)
+    starting = [True]
+
+    def clock() -> int:
+        if starting[0]:
+            starting[0] = False
+            current = get()[0]
+            if reset is not None:
+                reset()
+            return current
+        starting[0] = True
+        current, peak = get()
+        if reset is None:
+            peak = current
+        if peak > high[0]:
+            high[0] = peak
+        return peak
+
+    return clock
+
+
+def measure(timer, number: int = default_memory_number) -> MemoryStats:
+    """ Trace 'number' calls of timer's function and return MemoryStats.
+
+        'timer' is a timebandit.timeit.Timer (or subclass).  GC stays
+        enabled during the pass so that collections can be counted; it is
+        restored to its previous state afterwards.
+        """
+    collections = [0, 0, 0]
+
+    def count(phase: str, info: t.Dict[str, int]) -> None:
+        if phase == "start":
+            collections[info["generation"]] += 1
+
+    from timebandit.timeit import _empty_sample_inner
+
+    buf = array("d", bytes(8 * number))
+    empty = array("d", bytes(8 * 100))
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    gcold = gc.isenabled()
+    gc.enable()
+    gc.callbacks.append(count)
+    try:
+        _empty_sample_inner(range(len(empty)), _memory_clock([0]), empty)
+        start = tracemalloc.get_traced_memory()[0]
+        high = [start]
+        timer.sample_inner(range(number), _memory_clock(high), buf)
+        end = tracemalloc.get_traced_memory()[0]
+    finally:
+        gc.callbacks.remove(count)
+        if not gcold:
+            gc.disable()
+        if not tracing:
+            tracemalloc.stop()
+    # the clock's own allocations, seen around an empty statement
+    baseline = statistics.median(empty)
+    for i, size in enumerate(buf):
+        buf[i] = size - baseline if size > baseline else 0.0
+    calls = number * getattr(timer, "concurrency", 1)
+    return MemoryStats(number,
+                       sum(buf) / calls if calls else 0.0,
+                       max(buf, default=0.0),
+                       max(high[0], end) - start,
+                       (end - start) / calls if calls else 0.0,
+                       tuple(collections))
@@ -0,0 +1,122 @@
+#! /usr/bin/env python3
+""" Parallel execution of Timer.repeat() across a process pool.
+
+    Each worker process is pinned to its own CPU (where the platform
+    supports it), runs its share of the repetitions and reports back its
+    timings together with a noise level measured on that core.  The noise
+    level is the relative spread of a short calibration loop run in the
+    worker before and after its timings; a core that is busy with other
+    work shows up as a large spread.  Timings from workers that are much
+    noisier than their peers are dropped before the results are merged so
+    a busy core doesn't skew the min().
+
+    Functions:
+
+        parallel_repeat(timer, repeat, number, workers) -> (list, list)
+        available_cpus() -> list
+        pin_to_cpu(cpu) -> bool
+    """
+
+import os
+import statistics
+import typing as t
+from concurrent.futures import ProcessPoolExecutor
+
+__all__ = ["WorkerReport", "parallel_repeat", "available_cpus", "pin_to_cpu"]
+
+# number of calibration samples taken before and after each worker's timings
+noise_samples: int = 5
+# loops per calibration sample
+noise_number: int = 10000
+# a worker is noisy if its noise exceeds both this floor ...
+noise_floor: float = 0.05
+# ... and this multiple of the median noise of all workers
+noise_factor: float = 3.0
+
+
+class WorkerReport(t.NamedTuple):
+    """ Result of one worker: the CPU it ran on, its timings and noise. """
+    cpu: t.Optional[int]
+    pid: int
+    timings: t.List[float]
+    noise: float
+    noisy: bool = False
+
+
+def available_cpus() -> t.List[int]:
+    """ Return the sorted list of CPUs this process may run on. """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def pin_to_cpu(cpu: int) -> bool:
+    """ Pin the calling process to 'cpu'.  Return False if unsupported. """
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError:
+        return False
+    return True
+
+
+def _noise(samples: t.Sequence[float]) -> float:
+    """ Relative spread (stdev / mean) of calibration samples. """
+    mean = statistics.mean(samples)
+    if len(samples) < 2 or mean <= 0:
+        return 0.0
+    return statistics.stdev(samples) / mean
+
+
+def _worker(func: t.Callable, setup: t.Callable, timer: t.Callable,
+            unroll: int, pool: t.Optional[tuple], cpu: t.Optional[int],
+            repeat: int, number: int,
+            gc_mode: str = "disabled") -> WorkerReport:
+    """ Run 'repeat' timings of 'func' in this process, pinned to 'cpu'. """
+    from timebandit.timeit import Timer, _pass
+
+    if cpu is not None and not pin_to_cpu(cpu):
+        cpu = None
+    calibrate = Timer(_pass, timer=timer)
+    samples = [calibrate.timeit(noise_number) for _ in range(noise_samples)]
+    timed = Timer(func, setup, timer, unroll=unroll, pool=pool,
+                  gc_mode=gc_mode)
+    timings = list(timed.repeat(repeat, number))
+    samples += [calibrate.timeit(noise_number) for _ in range(noise_samples)]
+    return WorkerReport(cpu, os.getpid(), timings, _noise(samples))
+
+
+def _mark_noisy(reports: t.List[WorkerReport]) -> t.List[WorkerReport]:
+    """ Flag reports that are much noisier than the median worker. """
+    limit = max(noise_floor,
+                noise_factor * statistics.median(r.noise for r in reports))
+    return [r._replace(noisy=r.noise > limit) for r in reports]
+
+
+def parallel_repeat(timer, repeat: int, number: int,
+                    workers: int) -> t.Tuple[t.List[float],
+                                             t.List[WorkerReport]]:
+    """ Run timer.repeat(repeat, number) spread over 'workers' processes.
+
+        'timer' is a timebandit.timeit.Timer; its func, setup and timer
+        callables, its argument pool, 'unroll' and 'gc_mode' are sent to
+        the workers, so they must be picklable.  The number of workers is capped at the number
+        of repetitions and at the number of available CPUs so that every
+        worker gets its own core.
+
+        Returns the merged timings of all quiet workers and the list of
+        WorkerReport objects (including the dropped, noisy ones).
+        """
+    cpus = available_cpus()
+    workers = max(1, min(workers, repeat, len(cpus)))
+    share, extra = divmod(repeat, workers)
+    chunks = [share + (i < extra) for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_worker, timer.func, timer.setup, timer.timer,
+                               timer.unroll, timer.pool, cpus[i], chunk,
+                               number, timer.gc_mode)
+                   for i, chunk in enumerate(chunks)]
+        reports = _mark_noisy([f.result() for f in futures])
+    timings = [dt for r in reports if not r.noisy for dt in r.timings]
+    return timings, reports
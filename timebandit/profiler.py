@@ -0,0 +1,189 @@
+#! /usr/bin/env python3
+""" Low-overhead latency profiling of production functions.
+
+    The profile decorator records the latency of every call with
+    time.perf_counter_ns().  Each thread writes into its own preallocated
+    array-backed ring buffer, so recording takes no lock and allocates
+    nothing; when a ring wraps around, its samples are folded into the
+    thread's LogHistogram.  Queries merge the per-thread histograms with
+    the samples not folded yet, so p50/p99/p999 are available at any time
+    while the function keeps running.
+
+    Typical use:
+
+        @profile
+        def handler(request):
+            ...
+
+        handler.profile.percentile(99)   # seconds
+        print(handler.profile.summary())
+
+    Classes:
+
+        Profile
+
+    Functions:
+
+        profile(func) -> func
+        profiles() -> dict
+    """
+
+import functools
+import itertools
+import threading
+import time
+import typing as t
+from array import array
+
+from timebandit.histogram import LogHistogram, default_bits
+
+__all__ = ["Profile", "profile", "profiles"]
+
+default_buffer_size: int = 4096
+
+_registry: t.Dict[str, "Profile"] = {}
+_registry_lock = threading.Lock()
+
+
+class _Ring:
+    """ One thread's sample ring and the histogram its samples fold into.
+
+        Free slots hold -1; 'cursor' hands out the next slot to write.
+        """
+
+    __slots__ = ("samples", "cursor", "histogram")
+
+    def __init__(self, size: int, bits: int):
+        self.samples = array("q", [-1]) * size
+        self.cursor = itertools.count()
+        self.histogram = LogHistogram(bits)
+
+    def fold(self) -> None:
+        """ Move the samples recorded so far into the histogram. """
+        samples = self.samples
+        self.histogram.update(samples)
+        samples[:] = array("q", [-1]) * len(samples)
+        self.cursor = itertools.count()
+
+
+class Profile:
+    """ Latency record of one profiled function.
+
+        - name: the name the function is registered under
+        - buffer_size: samples per thread before folding into histograms
+        - bits: histogram resolution (see timebandit.histogram)
+
+        All times returned by the query methods are in seconds.
+        """
+
+    def __init__(self, name: str, buffer_size: int = default_buffer_size,
+                 bits: int = default_bits):
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be positive")
+        self.name = name
+        self.buffer_size = buffer_size
+        self.bits = bits
+        self._local = threading.local()
+        self._rings: t.List[_Ring] = []
+        self._lock = threading.Lock()
+
+    def _ring(self) -> _Ring:
+        """ Create and register the ring of the calling thread. """
+        ring = _Ring(self.buffer_size, self.bits)
+        with self._lock:
+            self._rings.append(ring)
+        self._local.ring = ring
+        return ring
+
+    def wrap(self, func: t.Callable) -> t.Callable:
+        """ Return 'func' wrapped so that every call is recorded. """
+        local = self._local
+        new_ring = self._ring
+        clock = time.perf_counter_ns
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                try:
+                    ring = local.ring
+                except AttributeError:
+                    ring = new_ring()
+                try:
+                    ring.samples[next(ring.cursor)] = elapsed
+                except IndexError:
+                    ring.fold()
+                    ring.samples[next(ring.cursor)] = elapsed
+
+        wrapper.profile = self
+        return wrapper
+
+    def histogram(self) -> LogHistogram:
+        """ Return a snapshot histogram (in nanoseconds) of all threads.
+
+            Rings are read without stopping their writers, so samples
+            recorded while the snapshot is taken may or may not be in it.
+            """
+        merged = LogHistogram(self.bits)
+        with self._lock:
+            rings = self._rings[:]
+        for ring in rings:
+            merged.merge(ring.histogram)
+            merged.update(ring.samples)
+        return merged
+
+    def percentile(self, percent: float) -> float:
+        """ Return the 'percent' percentile latency in seconds. """
+        return self.histogram().percentile(percent) * 1e-9
+
+    def summary(self) -> t.Dict[str, float]:
+        """ Return count, mean, p50, p99, p999 and max (in seconds). """
+        h = self.histogram()
+        return {"count": h.total,
+                "mean": h.mean() * 1e-9,
+                "p50": h.percentile(50) * 1e-9,
+                "p99": h.percentile(99) * 1e-9,
+                "p999": h.percentile(99.9) * 1e-9,
+                "max": (h.max or 0) * 1e-9}
+
+    def reset(self) -> None:
+        """ Forget all samples recorded so far. """
+        with self._lock:
+            for ring in self._rings:
+                ring.samples[:] = array("q", [-1]) * self.buffer_size
+                ring.cursor = itertools.count()
+                ring.histogram = LogHistogram(self.bits)
+
+    def __repr__(self) -> str:
+        return "Profile(%r)" % self.name
+
+
+def profile(func: t.Callable = None, *, name: str = None,
+            buffer_size: int = default_buffer_size,
+            bits: int = default_bits):
+    """ Decorator recording the latency of every call to 'func'.
+
+        Usable bare (@profile) or with arguments (@profile(name='x')).
+        The Profile is attached to the wrapper as 'wrapper.profile' and
+        registered under 'name' (default: the function's module and
+        qualified name) in profiles().
+        """
+    def decorate(func):
+        key = name or "%s.%s" % (func.__module__, func.__qualname__)
+        p = Profile(key, buffer_size, bits)
+        with _registry_lock:
+            _registry[key] = p
+        return p.wrap(func)
+
+    if func is None:
+        return decorate
+    return decorate(func)
+
+
+def profiles() -> t.Dict[str, Profile]:
+    """ Return a copy of the registry of profiled functions by name. """
+    with _registry_lock:
+        return dict(_registry)
@@ -0,0 +1,244 @@
+#! /usr/bin/env python3
+""" pytest plugin: the 'bandit' fixture for performance assertions.
+
+    Enable it with 'pytest_plugins = ["timebandit.pytest_plugin"]' in a
+    conftest.py, or with '-p timebandit.pytest_plugin'.  Then:
+
+        def test_lookup_is_fast(bandit):
+            result = bandit(lookup, args=("key",))
+            assert result.min() < 1e-6
+
+    bandit(func, ...) times 'func' with a Timer and returns the per-loop
+    TimingResult, with the empty-loop overhead subtracted from each time
+    (clipped at 0).  The loop overhead and the clock granularity are
+    calibrated once per session, on the first timed test, and set the
+    trial length.  Each test then picks its loop count from a single
+    probe trial scaled to that length (a second, longer probe if one
+    loop is too short for the clock), instead of an autorange search
+    from one loop upwards.
+
+    Options:
+
+        --bandit-only: run only tests that use the 'bandit' fixture
+        --bandit-skip: skip tests that use the 'bandit' fixture
+        --bandit-json=PATH: write all timings of the session to PATH as
+            JSON (with pytest-xdist, each worker writes PATH.<worker>)
+
+    With pytest-xdist, each worker is pinned to its own CPU when it first
+    times a function, so workers that time nothing are left alone; if
+    there are more workers than CPUs the fixture refuses to time (the
+    test is skipped), since workers sharing a core disturb each other.
+
+    Classes:
+
+        Bandit
+        Calibration
+    """
+
+import json
+import math
+import os
+import time
+import typing as t
+
+import pytest
+
+from timebandit.timeit import (Timer, calibrate, default_repeat,
+                               default_timer)
+
+__all__ = ["Bandit", "Calibration"]
+
+# trial length is this many clock ticks, but at least 'min_trial_time'
+trial_ticks: int = 10000
+min_trial_time: float = 0.005
+# samples taken to find the clock granularity
+granularity_samples: int = 1000
+# a probe trial is long enough to scale from at this many clock ticks
+probe_ticks: int = 1000
+
+
+class Calibration(t.NamedTuple):
+    """ Session-wide timing settings.
+
+        - loop: overhead of one empty timing loop iteration, in seconds
+        - call: overhead of one empty function call, in seconds
+        - granularity: smallest step seen on the clock, in seconds
+        - trial_time: target duration of one repetition, in seconds
+        """
+    loop: float
+    call: float
+    granularity: float
+    trial_time: float
+
+
+def _granularity(timer: t.Callable) -> float:
+    """ Smallest nonzero difference between consecutive clock readings. """
+    steps = []
+    for _ in range(granularity_samples):
+        t0 = t1 = timer()
+        while t1 == t0:
+            t1 = timer()
+        steps.append(t1 - t0)
+    return min(steps)
+
+
+def _xdist_conflict() -> t.Optional[str]:
+    """ Pin this xdist worker to its own CPU; return why timing is unsafe,
+        or None.
+        """
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if not worker:
+        return None
+    from timebandit.parallel import available_cpus, pin_to_cpu
+    count = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", "1"))
+    cpus = available_cpus()
+    if count > len(cpus):
+        return ("%d pytest-xdist workers share %d CPU%s; run timing tests "
+                "with fewer workers or --bandit-skip"
+                % (count, len(cpus), 's' if len(cpus) != 1 else ''))
+    index = int(worker.lstrip("gw") or 0)
+    pin_to_cpu(cpus[index % len(cpus)])
+    return None
+
+
+class Bandit:
+    """ Per-session state: calibration, the xdist check and the results. """
+
+    def __init__(self, config, timer: t.Callable = default_timer):
+        self.config = config
+        self.timer = timer
+        self.results: t.List[t.Dict[str, t.Any]] = []
+        self._calibration: t.Optional[Calibration] = None
+        self._conflict: t.Optional[str] = None
+        self._pinned = False
+
+    @property
+    def conflict(self) -> t.Optional[str]:
+        """ Why timing is unsafe under xdist, or None.  The first check
+            pins the worker, so sessions that time nothing stay unpinned.
+            """
+        if not self._pinned:
+            self._conflict = _xdist_conflict()
+            self._pinned = True
+        return self._conflict
+
+    @property
+    def calibration(self) -> Calibration:
+        if self._calibration is None:
+            overhead = calibrate(self.timer)
+            granularity = _granularity(self.timer)
+            self._calibration = Calibration(
+                overhead.loop, overhead.call, granularity,
+                max(min_trial_time, granularity * trial_ticks))
+        return self._calibration
+
+    def loops(self, timer: Timer) -> int:
+        """ Return the loop count that makes one trial of 'timer' take
+            about the calibrated trial time.
+            """
+        c = self.calibration
+        number = 1
+        taken = timer.timeit(number)
+        if taken < c.granularity * probe_ticks:
+            # even the cheapest loop is resolvable after this many loops
+            number = math.ceil(c.granularity * probe_ticks
+                               / (c.loop + c.call * timer.unroll))
+            taken = timer.timeit(number)
+        if taken <= 0:
+            return number
+        return max(1, round(number * c.trial_time / taken))
+
+    def measure(self, nodeid: str, func: t.Callable, args: tuple = (),
+                kwargs: t.Dict[str, t.Any] = None, setup: t.Callable = None,
+                number: int = None, repeat: int = default_repeat,
+                unroll: int = 1, pool: t.Iterable = None):
+        """ Time func(*args, **kwargs) and return the per-loop result. """
+        if self.conflict:
+            pytest.skip(self.conflict)
+        if args or kwargs:
+            if pool is not None:
+                raise ValueError("pass either args/kwargs or a pool")
+            pool = [(tuple(args), dict(kwargs)) if kwargs else tuple(args)]
+        timer = Timer(func, setup, self.timer, unroll=unroll, pool=pool)
+        if number is None:
+            number = self.loops(timer)
+        result = timer.repeat(repeat, number).per_loop()
+        overhead = self.calibration.loop
+        result = result._new([dt - overhead if dt > overhead else 0.0
+                              for dt in result])
+        result.overhead = overhead
+        self.results.append({
+            "test": nodeid,
+            "name": getattr(func, "__qualname__", None) or repr(func),
+            "number": number,
+            "unroll": unroll,
+            "times": list(result),
+            "best": result.min(),
+            "median": result.median(),
+        })
+        return result
+
+    def write(self, path: str) -> None:
+        from timebandit.history import host_fingerprint, python_version
+        worker = os.environ.get("PYTEST_XDIST_WORKER")
+        if worker:
+            path = "%s.%s" % (path, worker)
+        calibration = (self._calibration._asdict()
+                       if self._calibration is not None else None)
+        with open(path, "w") as f:
+            json.dump({"python": python_version(), "host": host_fingerprint(),
+                       "created": time.time(), "calibration": calibration,
+                       "benchmarks": self.results}, f, indent=2)
+
+
+def pytest_addoption(parser) -> None:
+    group = parser.getgroup("timebandit", "timebandit performance tests")
+    group.addoption("--bandit-only", action="store_true", default=False,
+                    help="only run tests that use the 'bandit' fixture")
+    group.addoption("--bandit-skip", action="store_true", default=False,
+                    help="skip tests that use the 'bandit' fixture")
+    group.addoption("--bandit-json", metavar="PATH", default=None,
+                    help="write the session's timings to PATH as JSON")
+
+
+def pytest_configure(config) -> None:
+    if config.getoption("bandit_only") and config.getoption("bandit_skip"):
+        raise pytest.UsageError(
+            "--bandit-only and --bandit-skip are mutually exclusive")
+    config.pluginmanager.register(Bandit(config), "bandit-session")
+
+
+def pytest_collection_modifyitems(config, items) -> None:
+    if config.getoption("bandit_only"):
+        selected = [i for i in items if "bandit" in i.fixturenames]
+        deselected = [i for i in items if "bandit" not in i.fixturenames]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+    elif config.getoption("bandit_skip"):
+        skip = pytest.mark.skip(reason="--bandit-skip")
+        for item in items:
+            if "bandit" in item.fixturenames:
+                item.add_marker(skip)
+
+
+def pytest_sessionfinish(session) -> None:
+    path = session.config.getoption("bandit_json")
+    bandit = session.config.pluginmanager.get_plugin("bandit-session")
+    if path and bandit is not None:
+        bandit.write(path)
+
+
+@pytest.fixture
+def bandit(request) -> t.Callable:
+    """ Time a function: bandit(func, args=(), kwargs=None, setup=None,
+        number=None, repeat=5, unroll=1, pool=None) -> TimingResult of
+        per-loop times, loop overhead subtracted.  'number' defaults to
+        the session calibration.
+        """
+    session = request.config.pluginmanager.get_plugin("bandit-session")
+
+    def measure(func: t.Callable, **options):
+        return session.measure(request.node.nodeid, func, **options)
+
+    return measure
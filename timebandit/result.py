@@ -0,0 +1,265 @@
+#! /usr/bin/env python3
+""" Compact container for timing samples.
+
+    TimingResult keeps its samples in one contiguous buffer of C doubles:
+    a NumPy array when NumPy is installed, otherwise an array('d').  Each
+    sample costs 8 bytes instead of a boxed float, and the statistics run
+    over the whole buffer at once (NumPy, or the C-implemented builtins
+    for array('d')) instead of re-walking a list in Python.
+
+    The buffer is exported without copying through the buffer protocol:
+    memoryview(result.buffer()) (or memoryview(result) on Python 3.12+),
+    numpy.asarray(result.samples), or struct/array consumers.
+
+    Classes:
+
+        TimingResult
+
+    Functions:
+
+        format_time(dt, time_unit, precision) -> str
+    """
+
+import math
+import typing as t
+from array import array
+from collections.abc import Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+__all__ = ["TimingResult", "format_time", "units"]
+
+# time units for display, in seconds
+units: t.Dict[str, float] = {"nsec": 1e-9, "usec": 1e-6, "msec": 1e-3,
+                             "sec": 1.0}
+
+# modified z-score above which reject_outliers() drops a sample
+default_outlier_threshold: float = 3.5
+# scales the MAD to the standard deviation of a normal distribution
+_mad_scale: float = 0.6745
+
+
+class TimingResult(Sequence):
+    """ Sequence of timings, in seconds, backed by a contiguous buffer.
+
+        - samples: the timings; copied into the buffer once (an
+            array('d') is adopted as is by the 'array' backend)
+        - number: loops timed per sample (1 for per-call samples)
+        - overhead: timer overhead already subtracted from each sample
+        - backend: 'numpy', 'array' or None to use NumPy if installed
+        - memory: MemoryStats of the traced memory passes, if any (see
+            timebandit.memory)
+        - clocks: ClockDelta of every sample, if read (see
+            timebandit.clocks)
+        - stacks: StackProfile sampled during the run, if any (see
+            timebandit.sampler)
+        - stability: how the run was stabilized, with its noise score, if
+            it was (see timebandit.stabilize)
+
+        TimingResult objects are treated as immutable; the statistics are
+        computed on demand and the sorted copy used for order statistics
+        is cached.
+        """
+
+    __slots__ = ("samples", "number", "overhead", "memory", "clocks",
+                 "stacks", "stability", "_sorted")
+
+    def __init__(self, samples: t.Iterable[float] = (), number: int = 1,
+                 overhead: float = 0.0, backend: str = None,
+                 memory: t.List = None, clocks: t.List = None):
+        if backend is None:
+            backend = "numpy" if np is not None else "array"
+        if backend == "numpy":
+            if np is None:
+                raise ValueError("NumPy is not installed")
+            self.samples = np.array(samples, dtype=np.float64)
+            if self.samples.ndim != 1:
+                self.samples = self.samples.reshape(-1)
+        elif backend == "array":
+            self.samples = (samples if isinstance(samples, array)
+                            and samples.typecode == "d"
+                            else array("d", samples))
+        else:
+            raise ValueError("backend must be 'numpy' or 'array'")
+        self.number = number
+        self.overhead = overhead
+        self.memory = memory
+        self.clocks = clocks
+        self.stacks = None
+        self.stability = None
+        self._sorted = None
+
+    @property
+    def backend(self) -> str:
+        return "array" if isinstance(self.samples, array) else "numpy"
+
+    def _new(self, samples, number: int = None) -> "TimingResult":
+        """ Return a result of the same backend holding 'samples'. """
+        return TimingResult(samples, self.number if number is None
+                            else number, self.overhead, self.backend)
+
+    # ---- Sequence protocol and buffer export
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._new(self.samples[index])
+        return float(self.samples[index])
+
+    def __iter__(self) -> t.Iterator[float]:
+        return map(float, self.samples)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (TimingResult, Sequence)):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return "TimingResult(%r, number=%d)" % (list(self), self.number)
+
+    def buffer(self) -> memoryview:
+        """ Return a zero-copy memoryview (format 'd') of the samples. """
+        return memoryview(self.samples)
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return memoryview(self.samples)
+
+    @property
+    def nbytes(self) -> int:
+        """ Size of the sample buffer in bytes. """
+        return len(self.samples) * 8
+
+    # ---- statistics
+
+    def _ordered(self):
+        if self._sorted is None:
+            if self.backend == "numpy":
+                self._sorted = np.sort(self.samples)
+            else:
+                self._sorted = array("d", sorted(self.samples))
+        return self._sorted
+
+    def _check(self) -> None:
+        if not len(self.samples):
+            raise ValueError("no samples")
+
+    def per_loop(self) -> "TimingResult":
+        """ Return the samples divided by 'number' (time per loop). """
+        if self.number == 1:
+            return self
+        if self.backend == "numpy":
+            result = self._new(self.samples / self.number, 1)
+        else:
+            number = self.number
+            result = self._new(array("d", [dt / number
+                                           for dt in self.samples]), 1)
+        result.memory = self.memory
+        result.clocks = self.clocks
+        result.stacks = self.stacks
+        result.stability = self.stability
+        return result
+
+    def min(self) -> float:
+        self._check()
+        if self.backend == "numpy":
+            return float(self.samples.min())
+        return min(self.samples)
+
+    def max(self) -> float:
+        self._check()
+        if self.backend == "numpy":
+            return float(self.samples.max())
+        return max(self.samples)
+
+    def mean(self) -> float:
+        self._check()
+        if self.backend == "numpy":
+            return float(self.samples.mean())
+        return math.fsum(self.samples) / len(self.samples)
+
+    def stdev(self) -> float:
+        """ Sample standard deviation (0.0 for fewer than two samples). """
+        n = len(self.samples)
+        if n < 2:
+            return 0.0
+        if self.backend == "numpy":
+            return float(self.samples.std(ddof=1))
+        mean = self.mean()
+        return math.sqrt(math.fsum((x - mean) ** 2 for x in self.samples)
+                         / (n - 1))
+
+    def median(self) -> float:
+        return self.percentile(50)
+
+    def percentile(self, percent: float) -> float:
+        """ Return the 'percent' percentile, interpolating linearly. """
+        self._check()
+        ordered = self._ordered()
+        pos = (len(ordered) - 1) * percent / 100
+        low = int(pos)
+        high = min(low + 1, len(ordered) - 1)
+        return float(ordered[low] + (ordered[high] - ordered[low])
+                     * (pos - low))
+
+    def percentiles(self, percents: t.Sequence[float] = (50, 90, 99, 99.9)
+                    ) -> t.Dict[float, float]:
+        """ Return {percent: duration} for each of 'percents'. """
+        return {percent: self.percentile(percent) for percent in percents}
+
+    def mad(self) -> float:
+        """ Median absolute deviation from the median. """
+        median = self.median()
+        if self.backend == "numpy":
+            return float(np.median(np.abs(self.samples - median)))
+        deviations = sorted(abs(x - median) for x in self.samples)
+        n = len(deviations)
+        mid = n // 2
+        return (deviations[mid] if n % 2
+                else (deviations[mid - 1] + deviations[mid]) / 2)
+
+    def reject_outliers(self, threshold: float = default_outlier_threshold
+                        ) -> "TimingResult":
+        """ Return the samples whose modified z-score is <= 'threshold'.
+
+            The modified z-score is 0.6745 * |x - median| / MAD (Iglewicz
+            and Hoaglin); with a MAD of zero all samples are kept.
+            """
+        mad = self.mad()
+        if not mad:
+            return self._new(self.samples)
+        median = self.median()
+        limit = threshold * mad / _mad_scale
+        if self.backend == "numpy":
+            return self._new(
+                self.samples[np.abs(self.samples - median) <= limit])
+        return self._new(array("d", [x for x in self.samples
+                                     if abs(x - median) <= limit]))
+
+    def summary(self) -> t.Dict[str, float]:
+        """ Return count, min, median, mean, stdev, max and MAD. """
+        return {"count": len(self), "min": self.min(),
+                "median": self.median(), "mean": self.mean(),
+                "stdev": self.stdev(), "max": self.max(), "mad": self.mad()}
+
+
+def format_time(dt: float, time_unit: str = None, precision: int = 3) -> str:
+    """ Format 'dt' seconds in 'time_unit', or the largest unit <= dt. """
+    unit = time_unit
+    scale: float = 1.0
+
+    if unit is not None:
+        scale = units[unit]
+    else:
+        scales = [(scale, unit) for unit, scale in units.items()]
+        scales.sort(reverse=True)
+        for scale, unit in scales:
+            if dt >= scale:
+                break
+
+    return "%.*g %s" % (precision, dt / scale, unit)
@@ -0,0 +1,203 @@
+#! /usr/bin/env python3
+""" Sampling stack profiler for timed runs.
+
+    StackSampler records the Python stack of one thread at a fixed
+    interval while it is started.  Two modes are available:
+
+    - 'signal': a SIGPROF interval timer interrupts the main thread every
+      'interval' seconds of CPU time and the handler records the
+      interrupted frame.  Cheapest and most precise; Unix main thread only.
+    - 'thread': a background thread wakes every 'interval' seconds of
+      wall-clock time and reads the target thread's frame from
+      sys._current_frames().  Works anywhere, and sees blocking too, but
+      under the GIL it gets to run only at the interpreter's switch
+      interval (see sys.setswitchinterval).
+
+    The handler only counts tuples of code objects, so sampling costs a
+    few microseconds per sample; labels are built when the profile is
+    read.  If a 'root' code object is given, only the part of each stack
+    above it is kept: Timer.repeat(stacks=...) passes its compiled inner
+    loop, so the samples show the benchmarked function and its callees
+    under a '<timed loop>' root, and samples taken outside the loop are
+    only counted.
+
+    StackProfile.collapsed() returns the 'collapsed stack' text read by
+    flamegraph.pl, speedscope and similar tools: one 'root;caller;callee
+    count' line per stack.  With the measured time of the run known, the
+    counts can be given in microseconds of that time instead.
+
+    Classes:
+
+        StackSampler
+        StackProfile
+    """
+
+import collections
+import os
+import signal
+import sys
+import threading
+import types
+import typing as t
+
+__all__ = ["StackSampler", "StackProfile", "default_interval"]
+
+# seconds between samples
+default_interval: float = 0.001
+
+root_label: str = "<timed loop>"
+
+
+def _label(code: types.CodeType) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return ("%s (%s:%d)" % (name, os.path.basename(code.co_filename),
+                            code.co_firstlineno)).replace(";", ":")
+
+
+class StackProfile(t.NamedTuple):
+    """ Stack samples of a run.
+
+        - stacks: sample count per stack, as label tuples, root first
+        - interval: seconds between samples
+        - mode: 'signal' or 'thread'
+        - outside: samples taken outside the root (not in 'stacks')
+        - elapsed: measured time the samples represent, if known
+        """
+    stacks: t.Dict[t.Tuple[str, ...], int]
+    interval: float
+    mode: str
+    outside: int = 0
+    elapsed: t.Optional[float] = None
+
+    @property
+    def total(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self, unit: str = "samples") -> str:
+        """ Return collapsed-stack text, heaviest stack first.
+
+            'unit' is 'samples' for sample counts or 'usec' to share the
+            'elapsed' time out over the stacks in proportion to their
+            samples.
+            """
+        if unit == "usec":
+            if self.elapsed is None:
+                raise ValueError("elapsed time unknown")
+            scale = self.elapsed * 1e6 / (self.total or 1)
+        elif unit == "samples":
+            scale = 1
+        else:
+            raise ValueError("unit must be 'samples' or 'usec'")
+        lines = []
+        for stack, count in sorted(self.stacks.items(),
+                                   key=lambda item: -item[1]):
+            value = round(count * scale)
+            if value:
+                lines.append("%s %d" % (";".join(stack), value))
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def write(self, path: str, unit: str = "samples") -> None:
+        with open(path, "w") as f:
+            f.write(self.collapsed(unit))
+
+    def inclusive(self) -> t.List[t.Tuple[str, float]]:
+        """ Return (label, fraction of samples) of every frame label,
+            counting a sample once for each label on its stack, heaviest
+            first.
+            """
+        counts: t.Counter[str] = collections.Counter()
+        for stack, count in self.stacks.items():
+            for label in set(stack):
+                counts[label] += count
+        total = self.total or 1
+        return [(label, count / total) for label, count in counts.most_common()]
+
+
+class StackSampler:
+    """ Sample the stack of the thread that calls start().
+
+        start() and stop() may be called repeatedly; samples accumulate
+        until profile() is read.  Also a context manager.
+        """
+
+    def __init__(self, interval: float = default_interval, mode: str = None,
+                 root: types.CodeType = None):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if mode is None:
+            mode = ("signal" if hasattr(signal, "setitimer")
+                    and threading.current_thread() is threading.main_thread()
+                    else "thread")
+        if mode not in ("signal", "thread"):
+            raise ValueError("mode must be 'signal' or 'thread'")
+        if mode == "signal" and not hasattr(signal, "setitimer"):
+            raise ValueError("signal mode needs signal.setitimer")
+        self.interval = interval
+        self.mode = mode
+        self.root = root
+        self.counts: t.Counter[t.Tuple[types.CodeType, ...]] = \
+            collections.Counter()
+        self.outside = 0
+        self._previous = None
+        self._thread: t.Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._target: t.Optional[int] = None
+
+    def _record(self, frame: t.Optional[types.FrameType]) -> None:
+        root = self.root
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            if code is root:
+                break
+            stack.append(code)
+            frame = frame.f_back
+        else:
+            if root is not None:
+                self.outside += 1
+                return
+        self.counts[tuple(stack)] += 1
+
+    def _handler(self, signum: int, frame: types.FrameType) -> None:
+        self._record(frame)
+
+    def _run(self) -> None:
+        frames = sys._current_frames
+        while not self._stop.wait(self.interval):
+            self._record(frames().get(self._target))
+
+    def start(self) -> None:
+        if self.mode == "signal":
+            self._previous = signal.signal(signal.SIGPROF, self._handler)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._target = threading.get_ident()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name="timebandit-sampler")
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self.mode == "signal":
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous or signal.SIG_DFL)
+        elif self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "StackSampler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def profile(self, elapsed: float = None) -> StackProfile:
+        """ Return the samples so far as a StackProfile, root first. """
+        prefix = (root_label,) if self.root is not None else ()
+        stacks: t.Dict[t.Tuple[str, ...], int] = collections.Counter()
+        for codes, count in self.counts.items():
+            stacks[prefix + tuple(_label(c) for c in reversed(codes))] += count
+        return StackProfile(dict(stacks), self.interval, self.mode,
+                            self.outside, elapsed)
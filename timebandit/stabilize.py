@@ -0,0 +1,173 @@
+#! /usr/bin/env python3
+""" Environment stabilization and a pre-run system-noise probe.
+
+    Timer.timeit() only turns GC off.  On shared machines frequency
+    scaling, other tenants and a cold first loop move results by tens of
+    percent between runs, and the CLI's "worst is 4x best" warning only
+    fires after the time has been spent.  stable_repeat() prepares the
+    run first:
+
+    1. pin: the process is pinned to one CPU (the last one it may use,
+       which is usually the one least loaded by interrupts) for the run,
+       and its previous affinity restored afterwards;
+    2. probe: an empty timing loop is run a few times and the relative
+       spread of those runs is the noise score (0 on a quiet machine); the
+       load average per CPU is recorded alongside;
+    3. decide: above 'max_noise' the run is either refused (NoisyMachine
+       is raised), widened (more repetitions, in proportion to the noise,
+       so min() has more chances to see an undisturbed run) or run as is;
+    4. warm up: the timed loop runs until the last 'window' trials agree
+       to within 'tolerance' (steady state: caches, branch predictors and
+       specializing bytecode warmed up, CPU clock ramped) or 'max_rounds'
+       trials have passed.
+
+    The GC mode is a Timer setting (Timer(gc_mode=...)): "disabled",
+    "frozen" or "enabled".  The Stability record is attached to the
+    result as 'stability'.
+
+    Classes:
+
+        Stability
+        NoisyMachine
+
+    Functions:
+
+        stable_repeat(timer, repeat, number, ...) -> TimingResult
+        probe_noise(timer) -> float
+        warm_up(timer, number) -> (int, bool)
+    """
+
+import math
+import os
+import statistics
+import typing as t
+
+from timebandit.parallel import _noise, available_cpus, pin_to_cpu
+
+__all__ = ["Stability", "NoisyMachine", "stable_repeat", "probe_noise",
+           "warm_up"]
+
+# empty-loop runs of the noise probe, and loops per run
+probe_samples: int = 10
+probe_number: int = 10000
+# noise score above which the machine is considered too noisy
+default_max_noise: float = 0.05
+# a widened run repeats at most this many times as often
+max_widen: int = 4
+# warm-up: trials compared, their allowed relative spread, and a cap
+warmup_window: int = 3
+warmup_tolerance: float = 0.02
+warmup_rounds: int = 20
+
+noise_actions: t.Tuple[str, ...] = ("widen", "refuse", "ignore")
+
+
+class NoisyMachine(RuntimeError):
+    """ Raised when the noise probe refuses a run. """
+
+    def __init__(self, noise: float, limit: float):
+        super().__init__("system noise %.1f%% exceeds the %.1f%% limit"
+                         % (noise * 100, limit * 100))
+        self.noise = noise
+        self.limit = limit
+
+
+class Stability(t.NamedTuple):
+    """ How a run was stabilized.
+
+        - cpu: CPU the run was pinned to, or None (also with workers)
+        - noise: noise score of the probe (relative spread)
+        - load: 1-minute load average per available CPU, if known
+        - repeat: repetitions run (after any widening)
+        - widened: True if 'repeat' was raised because of noise
+        - warmup_rounds: warm-up trials run
+        - steady: True if warm-up reached steady state
+        - gc_mode: the Timer's GC mode
+        """
+    cpu: t.Optional[int]
+    noise: float
+    load: t.Optional[float]
+    repeat: int
+    widened: bool
+    warmup_rounds: int
+    steady: bool
+    gc_mode: str
+
+
+def probe_noise(timer: t.Callable = None, samples: int = probe_samples,
+                number: int = probe_number) -> float:
+    """ Return the relative spread of 'samples' empty-loop timings. """
+    from timebandit.timeit import Timer, _pass, default_timer
+    probe = Timer(_pass, timer=timer or default_timer)
+    probe.timeit(number)
+    return _noise([probe.timeit(number) for _ in range(samples)])
+
+
+def warm_up(timer, number: int, window: int = warmup_window,
+            tolerance: float = warmup_tolerance,
+            max_rounds: int = warmup_rounds) -> t.Tuple[int, bool]:
+    """ Run timer.timeit(number) until the last 'window' trials are within
+        'tolerance' of their median.  Return (trials run, steady).
+        """
+    trials: t.List[float] = []
+    while len(trials) < max_rounds:
+        trials.append(timer.timeit(number))
+        recent = trials[-window:]
+        if len(recent) == window:
+            mid = statistics.median(recent)
+            if mid > 0 and max(abs(x - mid) for x in recent) <= tolerance * mid:
+                return len(trials), True
+    return len(trials), False
+
+
+def _load() -> t.Optional[float]:
+    if not hasattr(os, "getloadavg"):
+        return None
+    try:
+        return os.getloadavg()[0] / len(available_cpus())
+    except OSError:
+        return None
+
+
+def stable_repeat(timer, repeat: int, number: int, pin: bool = True,
+                  warmup: bool = True, max_noise: float = default_max_noise,
+                  on_noise: str = "widen", **kwargs):
+    """ Pin, probe, warm up, then return timer.repeat(repeat, number).
+
+        'on_noise' says what happens when the noise score exceeds
+        'max_noise': "widen" the run, "refuse" it (raise NoisyMachine) or
+        "ignore" the score.  Further keyword arguments are passed on to
+        timer.repeat().  With 'workers' the original affinity is restored
+        before the repetitions, as each worker pins itself to its own CPU.
+        The result's 'stability' holds the Stability.
+        """
+    if on_noise not in noise_actions:
+        raise ValueError("on_noise must be one of %s"
+                         % ", ".join(noise_actions))
+    previous = (os.sched_getaffinity(0)
+                if pin and hasattr(os, "sched_getaffinity") else None)
+    cpu = available_cpus()[-1] if pin else None
+    if cpu is not None and not pin_to_cpu(cpu):
+        cpu = None
+    try:
+        noise = probe_noise(timer.timer)
+        widened = False
+        if noise > max_noise:
+            if on_noise == "refuse":
+                raise NoisyMachine(noise, max_noise)
+            if on_noise == "widen":
+                factor = min(max_widen, math.ceil(noise / max_noise))
+                repeat, widened = repeat * factor, factor > 1
+        rounds, steady = warm_up(timer, number) if warmup else (0, False)
+        if kwargs.get("workers") and previous is not None:
+            # the workers pin themselves; they need the whole CPU set
+            os.sched_setaffinity(0, previous)
+            previous, cpu = None, None
+        result = timer.repeat(repeat, number, **kwargs)
+    finally:
+        if previous is not None:
+            os.sched_setaffinity(0, previous)
+    result.stability = Stability(cpu, noise, _load(), repeat, widened,
+                                 rounds, steady,
+                                 getattr(timer, "gc_mode", "disabled"))
+    return result
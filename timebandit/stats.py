@@ -0,0 +1,96 @@
+#! /usr/bin/env python3
+""" Small statistics helpers used by the timing engines.
+
+    Only the standard library is used; the Student t quantiles are
+    computed with the Cornish-Fisher expansion (Abramowitz & Stegun
+    26.7.5), which is accurate to a few parts in a thousand for the
+    degrees of freedom seen in benchmarking.
+
+    Functions:
+
+        t_quantile(p, df) -> float
+        confidence_interval(samples, confidence) -> (float, float)
+        relative_precision(samples, confidence) -> float
+        prediction_interval(samples, confidence) -> (float, float)
+        welch_interval(a, b, confidence) -> (float, float)
+    """
+
+import math
+import statistics
+import typing as t
+
+__all__ = ["t_quantile", "confidence_interval", "relative_precision",
+           "prediction_interval", "welch_interval"]
+
+
+def t_quantile(p: float, df: int) -> float:
+    """ Return the 'p' quantile of Student's t distribution with 'df'
+        degrees of freedom.
+        """
+    if df < 1:
+        raise ValueError("df must be at least 1")
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = statistics.NormalDist().inv_cdf(p)
+    n = float(df)
+    z3, z5, z7, z9 = z ** 3, z ** 5, z ** 7, z ** 9
+    return (z
+            + (z3 + z) / (4 * n)
+            + (5 * z5 + 16 * z3 + 3 * z) / (96 * n ** 2)
+            + (3 * z7 + 19 * z5 + 17 * z3 - 15 * z) / (384 * n ** 3)
+            + (79 * z9 + 776 * z7 + 1482 * z5 - 1920 * z3 - 945 * z)
+            / (92160 * n ** 4))
+
+
+def confidence_interval(samples: t.Sequence[float],
+                        confidence: float = 0.95) -> t.Tuple[float, float]:
+    """ Return (mean, half_width) of the two-sided confidence interval
+        for the mean of 'samples'.  The half width is infinite for fewer
+        than two samples.
+        """
+    mean = statistics.fmean(samples)
+    if len(samples) < 2:
+        return mean, math.inf
+    sem = statistics.stdev(samples, mean) / math.sqrt(len(samples))
+    return mean, t_quantile(0.5 + confidence / 2, len(samples) - 1) * sem
+
+
+def relative_precision(samples: t.Sequence[float],
+                       confidence: float = 0.95) -> float:
+    """ Half width of the confidence interval as a fraction of the mean. """
+    mean, half = confidence_interval(samples, confidence)
+    return half / mean if mean > 0 else math.inf
+
+
+def prediction_interval(samples: t.Sequence[float],
+                        confidence: float = 0.95) -> t.Tuple[float, float]:
+    """ Return (mean, half_width) of the two-sided interval expected to
+        hold one further observation drawn like 'samples'.  The half
+        width is infinite for fewer than two samples.
+        """
+    mean = statistics.fmean(samples)
+    n = len(samples)
+    if n < 2:
+        return mean, math.inf
+    spread = statistics.stdev(samples, mean) * math.sqrt(1 + 1 / n)
+    return mean, t_quantile(0.5 + confidence / 2, n - 1) * spread
+
+
+def welch_interval(a: t.Sequence[float], b: t.Sequence[float],
+                   confidence: float = 0.95) -> t.Tuple[float, float]:
+    """ Return (difference, half_width) of the Welch confidence interval
+        for mean(a) - mean(b).  Both samples need at least two values.
+        """
+    na, nb = len(a), len(b)
+    if na < 2 or nb < 2:
+        return statistics.fmean(a) - statistics.fmean(b), math.inf
+    va, vb = statistics.variance(a) / na, statistics.variance(b) / nb
+    diff = statistics.fmean(a) - statistics.fmean(b)
+    se2 = va + vb
+    if se2 == 0:
+        return diff, 0.0
+    df = se2 ** 2 / (va ** 2 / (na - 1) + vb ** 2 / (nb - 1))
+    q = t_quantile(0.5 + confidence / 2, max(1, int(df)))
+    return diff, q * math.sqrt(se2)
@@ -0,0 +1,243 @@
+#! /usr/bin/env python3
+""" Benchmark discovery and a suite runner with subprocess isolation.
+
+    discover() finds the module-level 'bench_*' functions of 'bench*.py'
+    files below a directory (or of a single file given by path).  Files are
+    parsed, not imported, so discovery itself warms nothing up.  A
+    benchmark function takes no arguments; it can be tagged with the
+    tags() decorator, which discovery reads from the source:
+
+        from timebandit.suite import tags
+
+        @tags("slow", "io")
+        def bench_read_log():
+            ...
+
+    run() executes every benchmark in a fresh Python subprocess, so the
+    imports, caches and allocator state of one benchmark cannot warm up
+    another.  Up to 'jobs' subprocesses run at a time, each pinned to its
+    own CPU where the platform allows it.  Each result is a dict that can
+    be written as one JSON line; run() yields them as benchmarks finish.
+
+    From the command line:
+
+        timebandit run [-j N] [-k PATTERN] [-t TAG] [-n N] [-r N] path...
+
+    Classes:
+
+        Benchmark
+
+    Functions:
+
+        discover(path) -> list
+        select(benchmarks, pattern, tags) -> list
+        run(benchmarks, ...) -> iterator of dict
+        tags(*names) -> decorator
+    """
+
+import ast
+import fnmatch
+import json
+import os
+import subprocess
+import sys
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+__all__ = ["Benchmark", "discover", "select", "run", "tags"]
+
+# subprocess time limit per benchmark, in seconds
+default_timeout: float = 600.0
+
+
+class Benchmark(t.NamedTuple):
+    """ A discovered benchmark function. """
+    file: str
+    name: str
+    tags: t.Tuple[str, ...] = ()
+
+    @property
+    def id(self) -> str:
+        return "%s::%s" % (self.file, self.name)
+
+
+def tags(*names: str) -> t.Callable:
+    """ Decorator attaching tags to a benchmark function. """
+    def decorate(func: t.Callable) -> t.Callable:
+        func.tags = tuple(names)
+        return func
+    return decorate
+
+
+def _decorator_tags(node: ast.FunctionDef) -> t.Tuple[str, ...]:
+    """ Return the string arguments of a tags(...) decorator on 'node'. """
+    found: t.List[str] = []
+    for dec in node.decorator_list:
+        if not isinstance(dec, ast.Call):
+            continue
+        func = dec.func
+        name = func.attr if isinstance(func, ast.Attribute) else getattr(
+            func, "id", None)
+        if name == "tags":
+            found += [arg.value for arg in dec.args
+                      if isinstance(arg, ast.Constant)
+                      and isinstance(arg.value, str)]
+    return tuple(found)
+
+
+def _discover_file(path: str) -> t.List[Benchmark]:
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), path)
+    return [Benchmark(path, node.name, _decorator_tags(node))
+            for node in tree.body
+            if isinstance(node, ast.FunctionDef)
+            and node.name.startswith("bench_")]
+
+
+def discover(path: str) -> t.List[Benchmark]:
+    """ Return the benchmarks of file 'path' or of the 'bench*.py' files
+        below directory 'path', in file and source order.
+        """
+    if not os.path.isdir(path):
+        return _discover_file(path)
+    found = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.startswith("bench") and name.endswith(".py"):
+                found += _discover_file(os.path.join(root, name))
+    return found
+
+
+def select(benchmarks: t.Iterable[Benchmark], pattern: str = None,
+           tags: t.Iterable[str] = None) -> t.List[Benchmark]:
+    """ Keep benchmarks whose name matches 'pattern' and that carry at
+        least one of 'tags'.  'pattern' is a shell-style wildcard, or a
+        substring if it contains no wildcard.
+        """
+    if pattern is not None and not any(c in pattern for c in "*?["):
+        pattern = "*%s*" % pattern
+    wanted = set(tags or ())
+    return [b for b in benchmarks
+            if (pattern is None or fnmatch.fnmatchcase(b.name, pattern))
+            and (not wanted or wanted.intersection(b.tags))]
+
+
+def _command(bench: Benchmark, number: int, repeat: int,
+             cpu: t.Optional[int]) -> t.List[str]:
+    return [sys.executable, "-m", "timebandit.suite", "--worker",
+            bench.file, bench.name, str(number), str(repeat),
+            "" if cpu is None else str(cpu)]
+
+
+def _environment() -> t.Dict[str, str]:
+    """ Environment for workers: make this copy of timebandit importable. """
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (root, env.get("PYTHONPATH")) if p)
+    return env
+
+
+def _run_one(bench: Benchmark, number: int, repeat: int,
+             cpu: t.Optional[int], env: t.Dict[str, str],
+             timeout: float) -> t.Dict[str, t.Any]:
+    """ Run one benchmark in a fresh subprocess and return its result. """
+    result: t.Dict[str, t.Any] = {"file": bench.file, "name": bench.name,
+                                  "tags": list(bench.tags)}
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run(_command(bench, number, repeat, cpu), env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              universal_newlines=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        result["error"] = "timed out after %g secs" % timeout
+    else:
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode == 0 and lines:
+            try:
+                result.update(json.loads(lines[-1]))
+            except ValueError as err:
+                result["error"] = "bad worker output: %s" % err
+        else:
+            err = proc.stderr.strip().splitlines()
+            result["error"] = err[-1] if err else (
+                "exit status %d" % proc.returncode)
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def run(benchmarks: t.Sequence[Benchmark], jobs: int = None,
+        number: int = 0, repeat: int = 5,
+        timeout: float = default_timeout) -> t.Iterator[t.Dict[str, t.Any]]:
+    """ Run every benchmark in its own subprocess; yield results as they
+        finish.
+
+        'jobs' subprocesses run at a time (default: one per available
+        CPU); when more than one runs, each is pinned to its own CPU.
+        Each benchmark is timed with Timer.repeat(repeat, number);
+        'number' 0 picks it with Timer.autorange().  A result holds
+        'file', 'name', 'tags', 'number', 'times' (per-loop seconds),
+        'best', 'median', 'python', 'cpu' and 'elapsed' (wall seconds
+        including the subprocess start), or 'error' if the benchmark
+        failed.
+        """
+    from timebandit.parallel import available_cpus
+    cpus = available_cpus()
+    jobs = max(1, min(jobs or len(cpus), len(cpus)))
+    free = cpus[:jobs]
+    env = _environment()
+    pending = list(benchmarks)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        running = {}
+        while pending or running:
+            while pending and free:
+                cpu = free.pop()
+                bench = pending.pop(0)
+                future = executor.submit(_run_one, bench, number, repeat,
+                                         cpu if jobs > 1 else None, env,
+                                         timeout)
+                running[future] = cpu
+            future = next(as_completed(running))
+            free.append(running.pop(future))
+            yield future.result()
+
+
+def _worker_main(argv: t.List[str]) -> int:
+    """ Time one benchmark and print its result as a JSON line. """
+    import importlib.util
+    from timebandit.history import python_version
+    from timebandit.parallel import pin_to_cpu
+    from timebandit.timeit import Timer
+
+    path, name, number, repeat, cpu = argv
+    number, repeat = int(number), int(repeat)
+    cpu = int(cpu) if cpu and pin_to_cpu(int(cpu)) else None
+    sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+    # the result line must be the last one on stdout; anything the
+    # benchmark prints goes to stderr
+    out, sys.stdout = sys.stdout, sys.stderr
+    try:
+        spec = importlib.util.spec_from_file_location(
+            "_bench_" + os.path.splitext(os.path.basename(path))[0], path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        timer = Timer(getattr(module, name))
+        if number <= 0:
+            number, _ = timer.autorange()
+        times = timer.repeat(repeat, number).per_loop()
+    finally:
+        sys.stdout.flush()
+        sys.stdout = out
+    print(json.dumps({"number": number, "times": list(times),
+                      "best": times.min(), "median": times.median(),
+                      "python": python_version(), "cpu": cpu}))
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--worker"]:
+        sys.exit(_worker_main(sys.argv[2:]))
+    from timebandit._cli import main
+    sys.exit(main(["run"] + sys.argv[1:]))
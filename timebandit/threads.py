@@ -0,0 +1,172 @@
+#! /usr/bin/env python3
+""" Multi-threaded contention and scaling benchmarks.
+
+    scaling() runs the timed function concurrently on 1, 2, 4, ... N
+    threads.  At each level all threads are released together from a
+    barrier, each one times its own loop, and the level reports the
+    aggregate throughput (calls per second of wall-clock time) together
+    with the per-call latency seen by every thread.
+
+    Scaling efficiency at N threads is throughput(N) / (N * throughput(1)):
+    1.0 means perfect linear scaling, 1/N means the threads run no faster
+    together than one does alone (as with a contended GIL).  Whether the
+    GIL was enabled is recorded, so GIL and free-threaded builds can be
+    compared.
+
+    Classes:
+
+        ScalingLevel
+        ScalingReport
+
+    Functions:
+
+        scaling(func, ...) -> ScalingReport
+    """
+
+import gc
+import itertools
+import os
+import sys
+import threading
+import typing as t
+
+from timebandit.result import TimingResult
+from timebandit.timeit import Timer, default_repeat, default_timer
+
+__all__ = ["ScalingLevel", "ScalingReport", "scaling", "thread_levels"]
+
+default_number: int = 10000
+
+
+class ScalingLevel(t.NamedTuple):
+    """ Result of one thread count.
+
+        - threads: number of threads run together
+        - throughput: total calls per second of wall-clock time
+        - latency: mean per-call latency of each thread, in seconds
+        - efficiency: throughput / (threads * single-thread throughput)
+        """
+    threads: int
+    throughput: float
+    latency: TimingResult
+    efficiency: float
+
+
+class ScalingReport(t.NamedTuple):
+    """ Scaling levels in increasing thread count, and the run settings. """
+    levels: t.List[ScalingLevel]
+    number: int
+    gil_enabled: bool
+
+    def curve(self) -> t.List[t.Tuple[int, float]]:
+        """ Return the scaling-efficiency curve as (threads, efficiency). """
+        return [(level.threads, level.efficiency) for level in self.levels]
+
+    def table(self, width: int = 30) -> str:
+        """ Return the report as a text table with an efficiency bar. """
+        lines = ["%7s  %14s  %12s  %12s  %s"
+                 % ("threads", "calls/sec", "mean latency", "max latency",
+                    "efficiency")]
+        for level in self.levels:
+            bar = "#" * round(min(level.efficiency, 1.0) * width)
+            lines.append("%7d  %14.6g  %12.4g  %12.4g  %5.1f%% %s"
+                         % (level.threads, level.throughput,
+                            level.latency.mean(), level.latency.max(),
+                            level.efficiency * 100, bar))
+        return "\n".join(lines)
+
+
+def thread_levels(max_threads: int = None) -> t.List[int]:
+    """ Return 1, 2, 4, ... up to 'max_threads' (default: CPU count),
+        always ending with 'max_threads' itself.
+        """
+    if max_threads is None:
+        max_threads = os.cpu_count() or 1
+    levels = [1 << i for i in range(max_threads.bit_length())
+              if 1 << i <= max_threads]
+    if levels[-1] != max_threads:
+        levels.append(max_threads)
+    return levels
+
+
+def _gil_enabled() -> bool:
+    check = getattr(sys, "_is_gil_enabled", None)
+    return True if check is None else check()
+
+
+def _run_level(timers: t.List[Timer], number: int,
+               clock: t.Callable) -> t.Tuple[float, t.List[float]]:
+    """ Run every timer on its own thread, released by one barrier.
+
+        Returns the wall-clock time of the whole level and each thread's
+        loop time.
+        """
+    n = len(timers)
+    barrier = threading.Barrier(n + 1)
+    elapsed = [0.0] * n
+    errors: t.List[BaseException] = []
+
+    def work(i: int) -> None:
+        it = itertools.repeat(None, number)
+        timer = timers[i]
+        barrier.wait()
+        try:
+            elapsed[i] = timer.inner(it, timer.timer)
+        except BaseException as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=work, args=(i,), daemon=True)
+               for i in range(n)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = clock()
+    for thread in threads:
+        thread.join()
+    wall = clock() - start
+    if errors:
+        raise errors[0]
+    return wall, elapsed
+
+
+def scaling(func: t.Callable, setup: t.Callable = None,
+            threads: t.Sequence[int] = None,
+            number: int = default_number,
+            repeat: int = default_repeat,
+            timer: t.Callable = default_timer) -> ScalingReport:
+    """ Measure how 'func' scales when called from many threads at once.
+
+        Each level in 'threads' (default: thread_levels()) is run
+        'repeat' times; each thread runs 'setup' once and then calls
+        'func' 'number' times.  Setup runs after the threads are released,
+        so it counts towards the wall-clock time and should be cheap.
+        The run with the highest throughput is kept for each level.  GC
+        is disabled for the duration of each run.
+        """
+    levels = sorted(set(threads or thread_levels()))
+    if levels[0] < 1:
+        raise ValueError("thread counts must be positive")
+    results: t.List[ScalingLevel] = []
+    base: t.Optional[float] = None
+    for n in levels:
+        best: t.Optional[t.Tuple[float, t.List[float]]] = None
+        for _ in range(repeat):
+            timers = [Timer(func, setup, timer) for _ in range(n)]
+            gcold = gc.isenabled()
+            gc.disable()
+            try:
+                wall, elapsed = _run_level(timers, number, timer)
+            finally:
+                if gcold:
+                    gc.enable()
+            if best is None or wall < best[0]:
+                best = (wall, elapsed)
+        wall, elapsed = best
+        throughput = n * number / wall if wall > 0 else float("inf")
+        if base is None:
+            base = throughput / n
+        results.append(ScalingLevel(
+            n, throughput,
+            TimingResult([dt / number for dt in elapsed]),
+            throughput / (n * base) if base else 0.0))
+    return ScalingReport(results, number, _gil_enabled())
@@ -23,6 +23,14 @@
     -s/--setup S: statement to be executed once initially (default 'pass').
                     Execution time of this setup statement is NOT timed.
     -p/--process: use time.process_time() (default is time.perf_counter())
+    -a/--adaptive P: time adaptively until the per-loop time is known to
+                    within +/- P (a fraction, e.g. 0.01); ignores -n and -r
+    -m/--max-time S: time budget in seconds for -a (default 10)
+    -S/--save NAME: record the run as benchmark NAME in the history file
+                    (see 'timebandit history' and 'timebandit check')
+    --db PATH: history file for -S (default $TIMEBANDIT_HISTORY or
+                    .timebandit.sqlite)
+    --stabilize: pin, probe noise and warm up first (see timebandit.stabilize)
     -v/--verbose: print raw timing results; repeat for more digits precision
     -u/--unit: set the output time unit (nsec, usec, msec, or sec)
     -h/--help: print this usage message and exit
@@ -34,6 +42,12 @@
     argument in quotes and using leading spaces.  Multiple -s options are
     treated similarly.
 
+    A single 'module:callable' argument is a target instead: it is imported
+    and timed in a fresh interpreter, which reports the cold import time,
+    the first call (lazy initialization, cache fills) and the steady-state
+    time per loop.  -s must then also be a 'module:callable'; it is called
+    once before the first call.  See timebandit.coldstart.
+
     If -n is not given, a suitable number of loops is calculated by trying
     increasing numbers from the sequence 1, 2, 5, 10, 20, 50, ... until the
     total time is at least 0.2 seconds.
@@ -50,26 +64,32 @@
     Functions:
 
         timeit(string, string) -> float
-        repeat(string, string) -> list
+        repeat(string, string) -> TimingResult
         default_timer() -> float
 
     """
 
+import contextlib
 import gc
 import sys
 import time
 import itertools
+import statistics
 import typing as t
-from loguru import logger
+from array import array
+
+from timebandit import hooks
+from timebandit.result import TimingResult
 
-__all__ = ["Timer", "timeit", "repeat", "default_timer", "default_repeat"]
+__all__ = ["Timer", "TimingResult", "Overhead", "calibrate", "timeit", "repeat",
+           "default_timer", "default_repeat"]
 
 dummy_src_name: str = "<timeit-src>"
 default_number: int = 1000000
 default_repeat: int = 5
-default_timer: time.perf_counter = time.perf_counter()
-
-logger.info('timeit initialized')
+default_sample_number: int = 10000
+default_timer: time.perf_counter = time.perf_counter
+gc_modes: t.Tuple[str, ...] = ("disabled", "frozen", "enabled")
 
 _globals: t.Dict[str, t.Any] = globals
 
@@ -85,6 +105,19 @@ def inner(_it, _timer{init}):
     return _timer() - _t0
 """
 
+# Per-call variant of the template: '_buf' is a preallocated buffer
+# (array('d') or anything supporting item assignment) that receives the
+# duration of each call, so nothing is allocated per call apart from the
+# timer's own return values.
+sample_template: str = """
+def inner(_it, _timer, _buf{init}):
+    {setup}
+    for _i in _it:
+        _t0 = _timer()
+        {stmt}
+        _buf[_i] = _timer() - _t0
+"""
+
 
 def reindent(src, indent):
     """Helper to reindent a multi-line statement."""
@@ -96,6 +129,131 @@ def _pass():
     pass
 
 
+# Appended to the setup of a Timer with an argument pool: after one full
+# pass itertools.cycle replays its saved copy without allocating.
+_pool_setup: str = """_next = _cycle(_pool).__next__
+for _j in _pool:
+    _next()"""
+
+
+def _materialize(pool: t.Iterable) -> t.Tuple[tuple, bool]:
+    """ Turn an argument pool into a tuple of argument entries.
+
+        Returns (entries, keywords).  Without keyword arguments each
+        entry is an args tuple; if any entry has keyword arguments, every
+        entry is an (args, kwargs) pair and 'keywords' is True.
+        """
+    entries = []
+    keywords = False
+    for entry in pool:
+        if (isinstance(entry, tuple) and len(entry) == 2
+                and isinstance(entry[0], tuple)
+                and isinstance(entry[1], dict)):
+            keywords = True
+        elif not isinstance(entry, tuple):
+            entry = (entry,)
+        entries.append(entry)
+    if not entries:
+        raise ValueError("argument pool is empty")
+    if keywords:
+        entries = [entry if len(entry) == 2 and isinstance(entry[0], tuple)
+                   and isinstance(entry[1], dict) else (entry, {})
+                   for entry in entries]
+    return tuple(entries), keywords
+
+
+def _compile_inner(src: str, global_ns: t.Dict[str, t.Any],
+                   local_ns: t.Dict[str, t.Any]) -> t.Callable:
+    """ Compile a formatted template and return its 'inner' function. """
+    code = compile(src, dummy_src_name, "exec")
+    exec(code, global_ns, local_ns)
+    return local_ns["inner"]
+
+
+@contextlib.contextmanager
+def _gc_mode(gc_mode: str = "disabled") -> t.Iterator[None]:
+    """ Set up garbage collection for timing, and restore it afterwards.
+
+        GC is disabled, or with 'gc_mode' "enabled" left on, or with
+        "frozen" left on after moving every existing object to the
+        permanent generation (gc.freeze()), so only garbage made by the
+        timed code is collected.
+        """
+    gcold: bool = gc.isenabled()
+    if gc_mode == "disabled":
+        gc.disable()
+    else:
+        if gc_mode == "frozen":
+            gc.collect()
+            gc.freeze()
+        gc.enable()
+    try:
+        yield
+    finally:
+        if gc_mode == "frozen":
+            gc.unfreeze()
+        if gcold:
+            gc.enable()
+        else:
+            gc.disable()
+
+
+def _time_inner(inner: t.Callable, number: int, timer: t.Callable,
+                gc_mode: str = "disabled") -> float:
+    """ Run a compiled 'inner' for 'number' loops under 'gc_mode' (see
+        _gc_mode()).
+        """
+    it: t.Iterator[int] = itertools.repeat(None, number)
+    with _gc_mode(gc_mode):
+        return inner(it, timer)
+
+
+# 'inner' timing only the timer calls of the sample template, used to
+# measure the timer overhead that Timer.sample() subtracts
+_empty_sample_inner: t.Callable = _compile_inner(
+    sample_template.format(stmt="pass", setup="pass", init=""), {}, {})
+
+# 'inner' timing only the loop, used by calibrate()
+_empty_inner: t.Callable = _compile_inner(
+    template.format(stmt="pass", setup="pass", init=""), {}, {})
+
+# calibrate() results, by timer function
+_overhead_cache: t.Dict[t.Callable, "Overhead"] = {}
+
+# statements per loop iteration used to calibrate the call overhead
+_calibrate_unroll: int = 10
+
+
+class Overhead(t.NamedTuple):
+    """ Measurement overhead, in seconds.
+
+        - loop: cost of one iteration of the empty timing loop
+        - call: cost of calling an empty function, excluding the loop
+        """
+    loop: float
+    call: float
+
+
+def calibrate(timer: t.Callable = default_timer, number: int = 100000,
+              repeat: int = default_repeat,
+              refresh: bool = False) -> Overhead:
+    """ Measure the empty-loop and call overhead of the timing template.
+
+        The result is cached per timer for the life of the interpreter;
+        pass refresh=True to measure again.  Each figure is the best of
+        'repeat' runs of 'number' loops.
+        """
+    if not refresh and timer in _overhead_cache:
+        return _overhead_cache[timer]
+    loop = min(_time_inner(_empty_inner, number, timer)
+               for _ in range(repeat)) / number
+    calls = Timer(_pass, timer=timer, unroll=_calibrate_unroll)
+    unrolled = min(calls.repeat(repeat, number)) / number
+    overhead = Overhead(loop, max(unrolled - loop, 0.0) / _calibrate_unroll)
+    _overhead_cache[timer] = overhead
+    return overhead
+
+
 class Timer:
     """ Modified to accept only callable functions, not code snippets
         passed as strings.
@@ -109,6 +267,14 @@ class Timer:
             begins (default: '_pass')
         - timer: (optional) the timer used for timing
         - globals: (optional) namespace to be used
+        - unroll: (optional) number of times the function is called per
+            loop iteration (default 1)
+        - pool: (optional) argument pool; see below
+        - cache: (optional) a timebandit.cache.ResultCache, or True for
+            the default one; see below
+        - gc_mode: (optional) garbage collection while timing: "disabled"
+            (default), "frozen" (enabled, with all objects existing
+            before the loop frozen) or "enabled"
 
         'func' and 'setup' default to 'pass()'; the 'timer' function
         is platform-dependent (see module doc string).  If 'globals'
@@ -117,14 +283,35 @@ class Timer:
 
         To measure the execution time of the function, use the
         timeit() method.  The repeat() method is a convenience to call
-        timeit() multiple times and return a list of results.
+        timeit() multiple times and return a TimingResult.
+
+        For functions that run in tens of nanoseconds the loop itself
+        dominates the measurement.  Use 'unroll' to call the function
+        several times per loop iteration and per_call() to get the time
+        of a single call with the calibrated loop overhead removed.
+
+        To time the function against varied inputs, pass a 'pool': a
+        sequence or generator whose entries are argument tuples, single
+        (non-tuple) arguments, or (args_tuple, kwargs_dict) pairs.  The
+        pool is materialized into a tuple before timing and each call
+        takes the next entry, cycling through the pool; the cycle is
+        primed in the untimed setup so that timing allocates nothing per
+        call (except the kwargs dict, if entries carry keyword arguments).
+
+        With a 'cache', timeit() and repeat() first look for a stored
+        result of the same code, setup, timer, pool and interpreter (see
+        timebandit.cache) and only time the function on a miss.
 
         """
 
     def __init__(self, func: t.Callable = None,
                  setup: t.Callable = None,
                  timer: time.perf_counter = default_timer,
-                 globals: t.Dict[str, t.Any] = None):
+                 globals: t.Dict[str, t.Any] = None,
+                 unroll: int = 1,
+                 pool: t.Iterable = None,
+                 cache=None,
+                 gc_mode: str = "disabled"):
         """Constructor.  See class doc string. """
         src: str = ''
         init: str = ''
@@ -132,17 +319,25 @@ class Timer:
         global_ns: t.Dict[str, t.Any] = _globals(
         ) if globals is None else globals
 
-        logger.info(f"{src=}")
-        logger.info(f"{init=}")
-        logger.info(f"{local_ns=}")
-
         self.setup = setup if setup else _pass
         self.func = func if func else _pass
         self.timer: time.perf_counter = timer
-
-        logger.info(f"{self.func=}")
-        logger.info(f"{self.setup=}")
-        logger.info(f"{self.timer=}")
+        self.worker_reports: t.List = []
+        if unroll < 1:
+            raise ValueError("unroll must be at least 1")
+        self.unroll: int = unroll
+        if gc_mode not in gc_modes:
+            raise ValueError("gc_mode must be one of %s" % ", ".join(gc_modes))
+        self.gc_mode: str = gc_mode
+        self.pool: t.Optional[tuple] = None
+        keywords: bool = False
+        if pool is not None:
+            self.pool, keywords = _materialize(pool)
+        if cache is True:
+            from timebandit.cache import default_cache
+            cache = default_cache()
+        self.cache = None if cache is False else cache
+        self._cache_key: t.Optional[str] = None
 
         if callable(self.setup):
             local_ns['_setup'] = self.setup
@@ -156,11 +351,22 @@ class Timer:
             stmt = '_func()'
         else:
             raise ValueError("func is not callable")
-        src = template.format(stmt=stmt, setup=setup, init=init)
+        if self.pool is not None:
+            local_ns['_pool'] = self.pool
+            local_ns['_cycle'] = itertools.cycle
+            init += ', _pool=_pool, _cycle=_cycle'
+            setup = reindent(setup + "\n" + _pool_setup, 4)
+            stmt = ('_a, _k = _next(); _func(*_a, **_k)' if keywords
+                    else '_func(*_next())')
+        src = template.format(stmt=reindent("\n".join([stmt] * unroll), 8),
+                              setup=setup, init=init)
         self.src = src  # Save for traceback display
-        code: str = compile(src, dummy_src_name, "exec")
-        exec(code, global_ns, local_ns)
-        self.inner = local_ns["inner"]
+        self.inner = _compile_inner(src, global_ns, local_ns)
+        self.sample_inner = _compile_inner(
+            sample_template.format(stmt=stmt, setup=setup, init=init),
+            global_ns, dict(local_ns))
+        if hooks.on_timer_created:
+            hooks.emit(hooks.on_timer_created, self)
 
     def print_exc(self, file: t.Union[t.IO[str], None] = None) -> None:
         """Helper to print a traceback from the timed code.
@@ -199,26 +405,107 @@ class Timer:
             argument is the number of times through the loop, defaulting
             to one million.  The main statement, the setup statement and
             the timer function to be used are passed to the constructor.
+
+            With 'unroll' set, each loop calls the function 'unroll'
+            times, so 'number' * 'unroll' calls are timed.
             """
-        it: t.Iterator[int] = itertools.repeat(None, number)
-        gcold: bool = gc.isenabled()
-        gc.disable()
-        try:
-            timing: float = self.inner(it, self.timer)
-        finally:
-            if gcold:
-                gc.enable()
+        if self.cache is not None:
+            return self._cached("timeit(%d)" % number, number,
+                                lambda: [_time_inner(self.inner, number,
+                                                     self.timer,
+                                                     self.gc_mode)])[0]
+        timing = _time_inner(self.inner, number, self.timer, self.gc_mode)
+        if hooks.on_trial:
+            hooks.emit(hooks.on_trial, self, number, timing)
         return timing
 
-    def repeat(self, repeat=default_repeat, number=default_number):
+    def per_call(self, number: int = default_number,
+                 repeat: int = default_repeat,
+                 body_only: bool = False) -> float:
+        """ Return the best overhead-corrected time of a single call.
+
+            Runs repeat(repeat, number), subtracts the calibrated loop
+            overhead (see calibrate()) from the best run and divides by
+            the number of calls made.  With 'body_only', the overhead of
+            calling an empty function is subtracted as well, leaving the
+            time spent inside the function.  The result is clipped at 0.
+            """
+        overhead = calibrate(self.timer)
+        calls = number * self.unroll
+        spent = min(self.repeat(repeat, number)) - number * overhead.loop
+        if body_only:
+            spent -= calls * overhead.call
+        return max(spent, 0.0) / calls
+
+    def sample(self, number: int = default_sample_number,
+               correct: bool = True) -> TimingResult:
+        """ Time each of 'number' calls of the main statement separately.
+
+            The durations are written into a preallocated array('d'), so
+            tail latency (p99 and up) is visible rather than folded into
+            a single loop total.  If 'correct' is true, the overhead of
+            the timer calls themselves is measured first (as the median
+            of timing an empty statement) and subtracted from every
+            sample, clipping at zero.  Returns a TimingResult with one
+            sample per call.
+            """
+        buf = array("d", bytes(8 * number))
+        overhead: float = 0.0
+        with _gc_mode(self.gc_mode):
+            if correct:
+                empty = array("d", bytes(8 * min(number, 1000)))
+                _empty_sample_inner(range(len(empty)), self.timer, empty)
+                overhead = statistics.median(empty) if empty else 0.0
+            self.sample_inner(range(number), self.timer, buf)
+        if overhead:
+            for i, dt in enumerate(buf):
+                buf[i] = dt - overhead if dt > overhead else 0.0
+        return TimingResult(buf, 1, overhead, backend="array")
+
+    def repeat(self, repeat=default_repeat, number=default_number,
+               workers: int = None, memory: bool = False,
+               clocks: bool = False,
+               stacks: t.Optional[float] = None,
+               stabilize: bool = False) -> TimingResult:
         """ Call timeit() a few times.
 
             This is a convenience function that calls the timeit()
-            repeatedly, returning a list of results.  The first argument
+            repeatedly, returning a TimingResult.  The first argument
             specifies how many times to call timeit(), defaulting to 5;
             the second argument specifies the timer argument, defaulting
             to one million.
 
+            If 'workers' is given, the repetitions are spread over a pool
+            of that many processes, each pinned to its own CPU (see
+            timebandit.parallel).  Timings from workers that report a
+            noisy core are dropped; the per-worker reports are kept in
+            'self.worker_reports'.  'func', 'setup' and 'timer' must be
+            picklable in this mode.
+
+            If 'memory' is true, every repetition is followed by a
+            separate, untimed memory pass (see memory()); the resulting
+            MemoryStats are kept in the result's 'memory' list.
+
+            If 'clocks' is true, every repetition reads the wall, process
+            and thread CPU clocks and the rusage counters instead of
+            'timer' (see timebandit.clocks); the samples are then the
+            perf_counter wall times and the ClockDelta of each repetition
+            is kept in the result's 'clocks' list.  Not available with
+            'workers'.
+
+            If 'stacks' is given, the stack of the timed function is
+            sampled every 'stacks' seconds while the loops run (see
+            timebandit.sampler) and the StackProfile is kept in the
+            result's 'stacks' attribute; its collapsed() text feeds
+            flamegraph tools.  Not available with 'workers' or 'clocks'.
+
+            If 'stabilize' is true, the run is prepared first: the process
+            is pinned to one CPU, system noise is probed (a noisy machine
+            gets more repetitions) and the loop is warmed up to a steady
+            state; the Stability record with the noise score is kept in
+            the result's 'stability' attribute.  See
+            timebandit.stabilize.stable_repeat() for the options.
+
             Note: it's tempting to calculate mean and standard deviation
             from the result vector and report these.  However, this is not
             very useful.  In a typical case, the lowest value gives a
@@ -230,11 +517,99 @@ class Timer:
             interested in.  After that, you should look at the entire
             vector and apply common sense rather than statistics.
             """
-        r = []
-        for _ in range(repeat):
-            t = self.timeit(number)
-            r.append(t)
-        return r
+        if stabilize:
+            from timebandit.stabilize import stable_repeat
+            return stable_repeat(self, repeat, number, workers=workers,
+                                 memory=memory, clocks=clocks, stacks=stacks)
+        result = self._repeat(repeat, number, workers, memory, clocks, stacks)
+        if hooks.on_repeat_done:
+            hooks.emit(hooks.on_repeat_done, self, result)
+        return result
+
+    def _repeat(self, repeat: int, number: int, workers: t.Optional[int],
+                memory: bool, clocks: bool,
+                stacks: t.Optional[float]) -> TimingResult:
+        if stacks and (workers or clocks):
+            raise ValueError("stacks are not sampled with workers or clocks")
+        if self.cache is not None and not (workers or memory or clocks
+                                           or stacks):
+            return self._cached("repeat(%d, %d)" % (repeat, number), number,
+                                lambda: [_time_inner(self.inner, number,
+                                                     self.timer,
+                                                     self.gc_mode)
+                                         for _ in range(repeat)])
+        stats = [] if memory else None
+        if clocks:
+            if workers:
+                raise ValueError("clocks are not collected with workers")
+            from timebandit.clocks import repeat_clocks
+            deltas = []
+            for _ in range(repeat):
+                deltas += repeat_clocks(self, 1, number)
+                if memory:
+                    stats.append(self.memory(number))
+            return TimingResult([d.wall for d in deltas], number,
+                                memory=stats, clocks=deltas)
+        if workers:
+            from timebandit.parallel import parallel_repeat
+            r, self.worker_reports = parallel_repeat(
+                self, repeat, number, workers)
+            if memory:
+                stats = [self.memory(number) for _ in r]
+            return TimingResult(r, number, memory=stats)
+        # a cached timeit() would repeat one result
+        timeit = (self.timeit if self.cache is None
+                  else lambda n: _time_inner(self.inner, n, self.timer,
+                                             self.gc_mode))
+        sampler = None
+        if stacks:
+            from timebandit.sampler import StackSampler
+            sampler = StackSampler(stacks, root=self.inner.__code__)
+        r = array("d", bytes(8 * repeat))
+        for i in range(repeat):
+            if sampler:
+                sampler.start()
+                try:
+                    r[i] = timeit(number)
+                finally:
+                    sampler.stop()
+            else:
+                r[i] = timeit(number)
+            if memory:
+                stats.append(self.memory(number))
+        result = TimingResult(r, number, memory=stats)
+        if sampler:
+            result.stacks = sampler.profile(sum(r))
+        return result
+
+    def _cached(self, call: str, number: int,
+                measure: t.Callable[[], t.Sequence[float]]) -> TimingResult:
+        """ Return the cached result of 'call', or measure and store it. """
+        from timebandit.cache import timer_key
+        if self._cache_key is None:
+            self._cache_key = timer_key(self)
+        key = "%s:%s" % (self._cache_key, call)
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry.samples
+        result = TimingResult(measure(), number, backend="array")
+        name = getattr(self.func, "__qualname__", None) or repr(self.func)
+        self.cache.put(key, name, result, number)
+        return result
+
+    def memory(self, number: int = None):
+        """ Trace calls of the main statement for allocations and GC.
+
+            Runs up to 'number' calls (capped at
+            timebandit.memory.default_memory_number) with tracemalloc and
+            GC enabled, outside of any timing, and returns a MemoryStats
+            with the bytes allocated per call, the peak traced memory and
+            the GC collections per generation.
+            """
+        from timebandit.memory import default_memory_number, measure
+        if number is None or number > default_memory_number:
+            number = default_memory_number
+        return measure(self, number)
 
     def autorange(self, callback=None) -> t.Tuple[int, float]:
         """ Return the number of loops and time taken so that total time >= 0.2.
@@ -260,14 +635,57 @@ class Timer:
                     return (number, time_taken)
             i *= 10
 
+    def adaptive(self, precision: float = 0.01, max_time: float = 10.0,
+                 callback=None, **kwargs):
+        """ Time until the per-loop estimate is within +/- 'precision'.
+
+            Statistically adaptive alternative to autorange() followed by
+            repeat(): the loop count grows geometrically, the calibration
+            trials are reused as samples and timing stops once the
+            confidence interval on the per-loop time is tight enough or
+            'max_time' seconds have passed.  Returns an AdaptiveResult
+            holding the per-loop time and the achieved precision; see
+            timebandit.adaptive for the remaining keyword arguments.
+            """
+        from timebandit.adaptive import adaptive
+        return adaptive(self, precision=precision, max_time=max_time,
+                        callback=callback, **kwargs)
+
+    def load(self, rate: float, duration: float, workers: int = 8):
+        """ Call the function open-loop at 'rate' calls per second.
+
+            Runs the setup function once, then calls the function on a
+            fixed schedule from 'workers' threads for 'duration' seconds
+            and returns a LoadResult with the throughput and the latency
+            measured from each call's intended start (see
+            timebandit.load).  The argument pool and 'unroll' are not
+            used.
+            """
+        from timebandit.load import load
+        return load(self.func, rate, duration, workers, setup=self.setup)
+
+
+def _loops_for(timer: Timer, trial_time: float) -> int:
+    """ Return a loop count so that one trial takes about 'trial_time'. """
+    number = 1
+    while True:
+        time_taken = timer.timeit(number)
+        if time_taken >= trial_time:
+            return number
+        if time_taken <= 0:
+            number *= 10
+        else:
+            number = max(number + 1, int(number * trial_time / time_taken))
+
 
 def timeit(func: t.Callable = _pass,
            setup: t.Callable = _pass,
            timer: time.perf_counter = default_timer,
            number: int = default_number,
-           globals: t.Dict[str, t.Any] = None) -> float:
+           globals: t.Dict[str, t.Any] = None,
+           cache=None) -> float:
     """Convenience function to create Timer object and call timeit method."""
-    return Timer(func, setup, timer, globals).timeit(number)
+    return Timer(func, setup, timer, globals, cache=cache).timeit(number)
 
 
 def repeat(func: t.Callable = _pass,
@@ -275,9 +693,12 @@ def repeat(func: t.Callable = _pass,
            timer: time.perf_counter = default_timer,
            number: int = default_number,
            repeat: int = default_repeat,
-           globals: t.Dict[str, t.Any] = None) -> t.List[float]:
+           globals: t.Dict[str, t.Any] = None,
+           workers: int = None,
+           cache=None) -> TimingResult:
     """Convenience function to create Timer object and call repeat method."""
-    return Timer(func, setup, timer, globals).repeat(repeat, number)
+    return Timer(func, setup, timer, globals, cache=cache).repeat(
+        repeat, number, workers)
 
 
 if __name__ == "__main__":